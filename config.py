@@ -65,6 +65,79 @@ class Config:
         self.CACHE_DIR = self.CONTENT_DIR / 'Cache'
         self.MEMORY_DIR = self.PROJECT_ROOT / 'memory'
 
+        # Cache settings
+        # Upper bound (bytes of JSON on disk) for parsed cache files kept in memory
+        self.CACHE_MEMORY_MAX_BYTES = int(os.getenv("CACHE_MEMORY_MAX_BYTES", 256 * 1024 * 1024))
+        # Write new pages as gzip-framed JSON Lines packs instead of one JSON file per page
+        self.CACHE_COMPRESS = os.getenv("CACHE_COMPRESS", "false").lower() in ("1", "true", "yes")
+        # Freshness policy: seconds before a cached page counts as stale, per source
+        # (None = never stale; archive captures don't change)
+        self.CACHE_MAX_AGE = {
+            'firecrawl': int(os.getenv("CACHE_MAX_AGE_FIRECRAWL", 24 * 60 * 60)),
+            'commoncrawl': None,
+            'wayback': None
+        }
+        # Extra seconds a stale page may still be served while it is refreshed in the background
+        self.CACHE_STALE_WHILE_REVALIDATE = int(os.getenv("CACHE_STALE_WHILE_REVALIDATE", 6 * 24 * 60 * 60))
+        # Cache budget (0 = unlimited); the coldest pages are evicted once it is exceeded
+        self.CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", 0))
+        self.CACHE_MAX_PAGES = int(os.getenv("CACHE_MAX_PAGES", 0))
+        # 'lru' (least recently used) or 'lfu' (least frequently used)
+        self.CACHE_EVICTION_POLICY = os.getenv("CACHE_EVICTION_POLICY", "lru").lower()
+        # Negative cache: seconds to remember that a source had nothing for a URL/year
+        self.CACHE_NEGATIVE_TTL = {
+            'firecrawl': int(os.getenv("CACHE_NEGATIVE_TTL_FIRECRAWL", 60 * 60)),
+            'commoncrawl': int(os.getenv("CACHE_NEGATIVE_TTL_COMMONCRAWL", 7 * 24 * 60 * 60)),
+            'wayback': int(os.getenv("CACHE_NEGATIVE_TTL_WAYBACK", 24 * 60 * 60))
+        }
+        # ...and to hold off retrying a fetch that failed outright
+        self.CACHE_NEGATIVE_ERROR_TTL = int(os.getenv("CACHE_NEGATIVE_ERROR_TTL", 5 * 60))
+
+        # Index settings
+        # Scraping index engine: 'whoosh' (pure Python) or 'sqlite' (SQLite FTS5).
+        # Move existing documents across with 'migrate-index <backend>'
+        self.INDEX_BACKEND = os.getenv("INDEX_BACKEND", "whoosh").lower()
+        # Worker processes for reindex! (Whoosh multiprocessing writer), and memory per worker
+        self.REINDEX_PROCS = int(os.getenv("REINDEX_PROCS", os.cpu_count() or 1))
+        self.REINDEX_LIMIT_MB = int(os.getenv("REINDEX_LIMIT_MB", 128))
+        # Store page bodies (content/raw_text) in the scraping index. When false the index
+        # keeps only postings plus doc_key, and snippets are read from the page cache.
+        # Applies to newly created indexes (use 'reindex! full' to switch an existing one)
+        self.INDEX_STORE_BODIES = os.getenv("INDEX_STORE_BODIES", "true").lower() in ("1", "true", "yes")
+        # Background indexing queue: commit once this many documents are waiting,
+        # or this many seconds after the oldest one was queued
+        self.INDEX_BATCH_SIZE = int(os.getenv("INDEX_BATCH_SIZE", 500))
+        self.INDEX_FLUSH_SECONDS = float(os.getenv("INDEX_FLUSH_SECONDS", 5))
+
+        # Common Crawl fetch settings
+        # WARC range requests in flight at once, and at most this many per host
+        self.CC_FETCH_CONCURRENCY = int(os.getenv("CC_FETCH_CONCURRENCY", 16))
+        self.CC_FETCH_PER_HOST = int(os.getenv("CC_FETCH_PER_HOST", 8))
+        # Retries for throttled (429/503) or failed requests, with exponential backoff from this many seconds
+        self.CC_FETCH_RETRIES = int(os.getenv("CC_FETCH_RETRIES", 4))
+        self.CC_FETCH_BACKOFF = float(os.getenv("CC_FETCH_BACKOFF", 1.0))
+        self.CC_FETCH_TIMEOUT = int(os.getenv("CC_FETCH_TIMEOUT", 60))
+        # Records in the same WARC file less than this many bytes apart are fetched
+        # with one range request, up to CC_RANGE_MAX_BYTES per request
+        self.CC_RANGE_MAX_GAP = int(os.getenv("CC_RANGE_MAX_GAP", 64 * 1024))
+        self.CC_RANGE_MAX_BYTES = int(os.getenv("CC_RANGE_MAX_BYTES", 16 * 1024 * 1024))
+        # CDX index queries in flight at once (the index server throttles hard)
+        self.CC_CDX_CONCURRENCY = int(os.getenv("CC_CDX_CONCURRENCY", 4))
+        # CDX records handed to the WARC fetch stage at a time while index pages are still streaming in
+        self.CC_FETCH_BATCH = int(os.getenv("CC_FETCH_BATCH", 256))
+        # Seconds the local copy of collinfo.json (the list of crawls) stays fresh
+        self.CC_COLLINFO_TTL = int(os.getenv("CC_COLLINFO_TTL", 24 * 60 * 60))
+
+        # Parsing settings
+        # WARC decompression and HTML-to-text run off the event loop in a pool of
+        # 'process' workers (default) or 'thread's (fine with lxml, which releases the GIL)
+        self.PARSE_EXECUTOR = os.getenv("PARSE_EXECUTOR", "process").lower()
+        self.PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", os.cpu_count() or 1))
+        # Pages per task submitted to the pool
+        self.PARSE_BATCH = int(os.getenv("PARSE_BATCH", 16))
+        # BeautifulSoup parser: 'html.parser' or 'lxml'
+        self.PARSE_HTML_PARSER = os.getenv("PARSE_HTML_PARSER", "html.parser")
+
         # Memory settings
         self.MEMORY_INDEX_DIR = self.MEMORY_DIR / 'Index'
         self.OPERATIONAL_MEMORY_FILE = self.MEMORY_DIR / 'operational_memory.json'
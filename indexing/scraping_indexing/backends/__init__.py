@@ -0,0 +1,131 @@
+# =====================================
+# SCRAPING INDEX BACKENDS
+# =====================================
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import re
+import sys
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.append(str(project_root))
+
+from config import config
+
+# Filters understood by search_pages
+FILTER_KEYS = ('domain', 'date_from', 'date_to', 'source', 'entity_types')
+
+
+def keyword_runs(keyword: str, word: str = r'\w+') -> List[Tuple[str, str]]:
+    """
+    How each word run of a literal keyword (runs matched by the tokenizer's
+    `word` pattern) must appear among a text's tokens wherever the keyword
+    occurs as a case-insensitive substring: (run, kind) with kind 'exact'
+    (a whole token), 'prefix' (starts a token), 'suffix' (ends a token) or
+    'infix' (anywhere in a token). Only the first and last runs can sit inside
+    a longer token, since the keyword's own separators bound the others.
+    """
+    keyword = keyword.lower()
+    runs = []
+    for m in re.finditer(word, keyword):
+        open_left, open_right = m.start() == 0, m.end() == len(keyword)
+        kind = ('infix' if open_left and open_right else 'suffix' if open_left
+                else 'prefix' if open_right else 'exact')
+        runs.append((m.group(), kind))
+    return runs
+
+
+class IndexBackend:
+    """
+    Engine behind the scraping index.
+
+    Documents are the field dicts ScrapingIndexer._document() builds, keyed by
+    doc_key (the cache's page key); a backend upserts them together with
+    their paragraphs (split_paragraphs() of 'content') and answers the
+    searches in scraping_index_searcher. Fragments are dicts with
+    'before'/'match'/'after' around the first matched term and 'highlighted'
+    with every matched term wrapped in ** **.
+
+    Selected by config.INDEX_BACKEND; see get_backend().
+    """
+
+    name = ''
+
+    @property
+    def state_path(self) -> Path:
+        """Where ScrapingIndexer keeps its reindex state for this backend."""
+        raise NotImplementedError
+
+    def exists(self) -> bool:
+        """Whether the index (including its paragraphs) has been created."""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Drop every document and recreate an empty index."""
+        raise NotImplementedError
+
+    def prepare(self, derived_fields: Callable[[Dict], Dict]) -> None:
+        """Bring an index written by an older version up to date (once per process)."""
+
+    def write(self, docs: Iterable[Dict], removed: Iterable[str] = (), procs: int = 1) -> int:
+        """Upsert `docs` and delete the `removed` doc_keys in one commit; returns documents written."""
+        raise NotImplementedError
+
+    def iter_documents(self) -> Iterator[Dict]:
+        """Every indexed document's stored fields (bodies may be missing)."""
+        raise NotImplementedError
+
+    def search_pages(self, query: str, filters: Dict, page: int = 1, pagelen: int = 20,
+                     sort_by_date: bool = False, facets: Tuple[str, ...] = (), top: int = 1) -> Dict:
+        """
+        Ranked page hits for `query` ('' matches everything) restricted by
+        `filters` (FILTER_KEYS). Returns {'total', 'page', 'pagecount', 'hits',
+        'facets'}; each hit has doc_key, url, timestamp, domain, source, score
+        and up to `top` fragments.
+        """
+        raise NotImplementedError
+
+    def page_paragraphs(self, query: str, doc_key: str, top: int = 3, radius: int = 2) -> List[Dict]:
+        """The `top` paragraphs of one page matching `query`, each {'ordinal', 'context'}."""
+        raise NotImplementedError
+
+    def search_paragraphs(self, query: str, domain: Optional[str] = None, limit: int = 20,
+                          radius: int = 2) -> List[Dict]:
+        """
+        Matching paragraphs across pages, each with url, timestamp, ordinal,
+        paragraph, score and 'context' ({'ordinal', 'text'} for up to `radius`
+        paragraphs either side).
+        """
+        raise NotImplementedError
+
+    @contextmanager
+    def prefilter(self, keyword: str):
+        """
+        Yields check(doc_key) for a literal `keyword` that a keyword scan will
+        match as a case-insensitive substring: None if the page isn't indexed
+        (or has no paragraphs indexed), otherwise the ordinals of its paragraphs
+        the keyword can occur in (empty: cannot match). The answer must be a
+        superset of the scan's matches, so only terms the index is sure to hold
+        for every occurrence (see keyword_runs) may narrow it; yields None when
+        no such term is left for this keyword.
+        """
+        yield None
+
+
+_backends: Dict[str, IndexBackend] = {}
+
+
+def get_backend(name: Optional[str] = None) -> IndexBackend:
+    """Shared backend instance by name ('whoosh' or 'sqlite'), config.INDEX_BACKEND by default."""
+    name = (name or config.INDEX_BACKEND).lower()
+    if name not in _backends:
+        if name == 'whoosh':
+            from indexing.scraping_indexing.backends.whoosh_backend import WhooshBackend
+            _backends[name] = WhooshBackend(project_root / 'indexing' / 'scraping_indexing' / 'index')
+        elif name == 'sqlite':
+            from indexing.scraping_indexing.backends.sqlite_backend import SqliteBackend
+            _backends[name] = SqliteBackend(project_root / 'indexing' / 'scraping_indexing' / 'fts' / 'index.sqlite')
+        else:
+            raise ValueError(f"Unknown index backend: {name} (expected 'whoosh' or 'sqlite')")
+    return _backends[name]
@@ -0,0 +1,348 @@
+# =====================================
+# SQLITE FTS5 INDEX BACKEND
+# =====================================
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import math
+import re
+import sqlite3
+import sys
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.append(str(project_root))
+
+from config import config
+from indexing.scraping_indexing.backends import IndexBackend, keyword_runs
+from indexing.scraping_indexing.paragraph_index import split_paragraphs
+
+TOKENIZER = "unicode61 remove_diacritics 2"
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS docs (
+    id                INTEGER PRIMARY KEY,
+    doc_key           TEXT NOT NULL UNIQUE,
+    url               TEXT,
+    domain            TEXT,
+    timestamp         TEXT,
+    date              TEXT,
+    year              TEXT,
+    source            TEXT,
+    entity_types      TEXT,
+    title             TEXT,
+    raw_text          TEXT,
+    metadata          TEXT,
+    entities_person   TEXT,
+    entities_company  TEXT,
+    entities_email    TEXT,
+    entities_phone    TEXT,
+    entities_location TEXT,
+    outlinks          TEXT,
+    backlinks         TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_docs_domain_date ON docs (domain, date);
+CREATE INDEX IF NOT EXISTS idx_docs_date ON docs (date);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(content, tokenize='{TOKENIZER}', prefix='2 3');
+CREATE TABLE IF NOT EXISTS paragraphs (
+    id      INTEGER PRIMARY KEY,
+    doc_key TEXT NOT NULL,
+    ordinal INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_paragraphs_doc ON paragraphs (doc_key, ordinal);
+CREATE VIRTUAL TABLE IF NOT EXISTS paragraphs_fts USING fts5(text, tokenize='{TOKENIZER}', prefix='2 3');
+"""
+
+DOC_COLUMNS = ['doc_key', 'url', 'domain', 'timestamp', 'date', 'year', 'source', 'entity_types',
+               'title', 'raw_text', 'metadata', 'entities_person', 'entities_company', 'entities_email',
+               'entities_phone', 'entities_location', 'outlinks', 'backlinks']
+
+# Columns search_pages can facet on
+FACET_COLUMNS = ('domain', 'source', 'year', 'date', 'entity_types')
+
+# snippet() markers, turned into before/match/after and ** ** highlighting
+MARK_START, MARK_END = '\x02', '\x03'
+
+
+def fts_query(query: str) -> str:
+    """
+    A Whoosh-style query (words, "phrases", AND/OR/NOT, parentheses, trailing
+    * for a prefix) as an FTS5 MATCH expression. Every term is quoted, so
+    punctuation in the query can't break the FTS5 syntax.
+    """
+    parts = []
+    for token in re.findall(r'"[^"]*"|[()]|[^\s()]+', query):
+        if token in ('AND', 'OR', 'NOT', '(', ')'):
+            parts.append(token)
+            continue
+        words = re.findall(r'\w+', token)
+        if not words:
+            continue
+        phrase = '"' + ' '.join(words) + '"'
+        if token.endswith('*') and not token.startswith('"'):
+            phrase += '*'
+        parts.append(phrase)
+    # Operators left dangling once punctuation-only tokens are dropped
+    while parts and parts[0] in ('AND', 'OR', 'NOT'):
+        parts.pop(0)
+    while parts and parts[-1] in ('AND', 'OR', 'NOT'):
+        parts.pop()
+    return ' '.join(parts)
+
+
+def _fragment(snippet: str) -> Dict:
+    """A snippet() string as a fragment dict (see IndexBackend)."""
+    def clean(text: str) -> str:
+        return text.replace(MARK_START, '').replace(MARK_END, '')
+
+    highlighted = snippet.replace(MARK_START, '**').replace(MARK_END, '**')
+    start = snippet.find(MARK_START)
+    if start < 0:
+        return {'before': '', 'match': '', 'after': clean(snippet), 'highlighted': highlighted}
+    end = snippet.find(MARK_END, start)
+    end = end if end >= 0 else len(snippet)
+    return {
+        'before': clean(snippet[:start]),
+        'match': snippet[start + 1:end],
+        'after': clean(snippet[end + 1:]),
+        'highlighted': highlighted
+    }
+
+
+class SqliteBackend(IndexBackend):
+    """
+    SQLite FTS5 backend: docs holds the stored fields, docs_fts the page text
+    (rowid = docs.id), and paragraphs / paragraphs_fts one row per paragraph.
+    Ranking is FTS5's bm25(), snippets come from snippet(), and the tables
+    carry 2- and 3-character prefix indexes so 'term*' queries stay cheap.
+    Runs in-process with no service; the database is a single file.
+
+    FTS5 needs the text to build snippets, so page text is always kept in
+    docs_fts; INDEX_STORE_BODIES only controls whether raw_text is stored.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+
+    @property
+    def state_path(self) -> Path:
+        return self.db_path.parent / 'reindex_state.json'
+
+    @contextmanager
+    def _connect(self):
+        exists = self.db_path.exists()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), timeout=60)
+        conn.row_factory = sqlite3.Row
+        if not exists:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def exists(self) -> bool:
+        return self.db_path.exists()
+
+    def clear(self) -> None:
+        for suffix in ('', '-wal', '-shm'):
+            path = self.db_path.with_name(self.db_path.name + suffix)
+            if path.exists():
+                path.unlink()
+        with self._connect():
+            pass
+
+    def _delete(self, conn, doc_key: str) -> None:
+        row = conn.execute("SELECT id FROM docs WHERE doc_key = ?", (doc_key,)).fetchone()
+        if row:
+            conn.execute("DELETE FROM docs_fts WHERE rowid = ?", (row['id'],))
+            conn.execute("DELETE FROM docs WHERE id = ?", (row['id'],))
+        conn.execute("DELETE FROM paragraphs_fts WHERE rowid IN (SELECT id FROM paragraphs WHERE doc_key = ?)", (doc_key,))
+        conn.execute("DELETE FROM paragraphs WHERE doc_key = ?", (doc_key,))
+
+    def write(self, docs: Iterable[Dict], removed: Iterable[str] = (), procs: int = 1) -> int:
+        written = 0
+        placeholders = ', '.join('?' for _ in DOC_COLUMNS)
+        # One transaction: readers keep seeing the previous state until commit
+        with self._connect() as conn:
+            for key in removed:
+                self._delete(conn, key)
+            for fields in docs:
+                self._delete(conn, fields['doc_key'])
+                row = dict(fields)
+                if not config.INDEX_STORE_BODIES:
+                    row['raw_text'] = None
+                cur = conn.execute(
+                    f"INSERT INTO docs ({', '.join(DOC_COLUMNS)}) VALUES ({placeholders})",
+                    [row.get(col) for col in DOC_COLUMNS]
+                )
+                conn.execute("INSERT INTO docs_fts (rowid, content) VALUES (?, ?)",
+                             (cur.lastrowid, fields.get('content') or ''))
+                for ordinal, paragraph in enumerate(split_paragraphs(fields.get('content') or '')):
+                    if not paragraph.strip():
+                        continue
+                    cur = conn.execute("INSERT INTO paragraphs (doc_key, ordinal) VALUES (?, ?)",
+                                       (fields['doc_key'], ordinal))
+                    conn.execute("INSERT INTO paragraphs_fts (rowid, text) VALUES (?, ?)", (cur.lastrowid, paragraph))
+                written += 1
+        return written
+
+    def iter_documents(self) -> Iterator[Dict]:
+        with self._connect() as conn:
+            for row in conn.execute("SELECT d.*, f.content FROM docs d JOIN docs_fts f ON f.rowid = d.id ORDER BY d.id"):
+                fields = dict(row)
+                fields.pop('id', None)
+                yield fields
+
+    @staticmethod
+    def _filters(filters: Dict) -> Tuple[List[str], List]:
+        clauses, params = [], []
+        if filters.get('domain'):
+            clauses.append('d.domain = ?')
+            params.append(filters['domain'])
+        if filters.get('date_from'):
+            clauses.append("d.date != '' AND d.date >= ?")
+            params.append(filters['date_from'])
+        if filters.get('date_to'):
+            clauses.append("d.date != '' AND d.date <= ?")
+            params.append(filters['date_to'])
+        if filters.get('source'):
+            clauses.append('d.source = ?')
+            params.append(filters['source'])
+        for entity_type in filters.get('entity_types') or []:
+            clauses.append("(' ' || d.entity_types || ' ') LIKE ?")
+            params.append(f"% {entity_type} %")
+        return clauses, params
+
+    def search_pages(self, query: str, filters: Dict, page: int = 1, pagelen: int = 20,
+                     sort_by_date: bool = False, facets: Tuple[str, ...] = (), top: int = 1) -> Dict:
+        clauses, params = self._filters(filters)
+        match = fts_query(query) if query.strip() else ''
+        if query.strip() and not match:
+            return {'total': 0, 'page': page, 'pagecount': 0, 'hits': [], 'facets': {}}
+        if match:
+            base = "FROM docs_fts JOIN docs d ON d.id = docs_fts.rowid WHERE docs_fts MATCH ?"
+            params = [match] + params
+            rank = "bm25(docs_fts)"
+            snip = f"snippet(docs_fts, 0, '{MARK_START}', '{MARK_END}', '...', 48)"
+        else:
+            base = "FROM docs d WHERE 1"
+            rank, snip = "0", "NULL"
+        if clauses:
+            base += " AND " + " AND ".join(clauses)
+        order = "d.date DESC" if sort_by_date else (f"{rank}" if match else "d.id")
+
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) {base}", params).fetchone()[0]
+            pagecount = math.ceil(total / pagelen) if total else 0
+            page = max(1, min(page, pagecount or 1))
+            rows = conn.execute(
+                f"SELECT d.doc_key, d.url, d.timestamp, d.domain, d.source, {rank} AS rank, {snip} AS snip "
+                f"{base} ORDER BY {order} LIMIT ? OFFSET ?",
+                params + [pagelen, (page - 1) * pagelen]
+            ).fetchall()
+
+            facet_counts = {}
+            for name in facets:
+                if name not in FACET_COLUMNS:
+                    continue
+                if name == 'entity_types':
+                    counts = Counter()
+                    for row in conn.execute(f"SELECT d.entity_types {base}", params):
+                        counts.update((row[0] or '').split())
+                    facet_counts[name] = dict(counts)
+                else:
+                    facet_counts[name] = {
+                        row[0]: row[1] for row in
+                        conn.execute(f"SELECT d.{name}, COUNT(*) {base} GROUP BY d.{name}", params)
+                    }
+
+        hits = [{
+            'doc_key': row['doc_key'],
+            'url': row['url'],
+            'timestamp': row['timestamp'] or '',
+            'domain': row['domain'] or '',
+            'source': row['source'] or '',
+            # FTS5 has one snippet per row
+            'fragments': [_fragment(row['snip'])] if row['snip'] and top else [],
+            # bm25() is lower-is-better
+            'score': -row['rank']
+        } for row in rows]
+        return {'total': total, 'page': page, 'pagecount': pagecount, 'hits': hits, 'facets': facet_counts}
+
+    def _neighbours(self, conn, doc_key: str, ordinal: int, radius: int) -> List[Dict]:
+        rows = conn.execute(
+            "SELECT p.ordinal, f.text FROM paragraphs p JOIN paragraphs_fts f ON f.rowid = p.id "
+            "WHERE p.doc_key = ? AND p.ordinal BETWEEN ? AND ? ORDER BY p.ordinal",
+            (doc_key, ordinal - radius, ordinal + radius)
+        ).fetchall()
+        return [{'ordinal': row['ordinal'], 'text': row['text']} for row in rows]
+
+    def page_paragraphs(self, query: str, doc_key: str, top: int = 3, radius: int = 2) -> List[Dict]:
+        match = fts_query(query)
+        if not match:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT p.ordinal FROM paragraphs_fts f JOIN paragraphs p ON p.id = f.rowid "
+                "WHERE paragraphs_fts MATCH ? AND p.doc_key = ? ORDER BY bm25(paragraphs_fts) LIMIT ?",
+                (match, doc_key, top)
+            ).fetchall()
+            return [{'ordinal': row['ordinal'], 'context': self._neighbours(conn, doc_key, row['ordinal'], radius)}
+                    for row in rows]
+
+    def search_paragraphs(self, query: str, domain: Optional[str] = None, limit: int = 20,
+                          radius: int = 2) -> List[Dict]:
+        match = fts_query(query)
+        if not match:
+            return []
+        sql = ("SELECT p.doc_key, p.ordinal, f.text, d.url, d.timestamp, bm25(paragraphs_fts) AS rank "
+               "FROM paragraphs_fts f JOIN paragraphs p ON p.id = f.rowid JOIN docs d ON d.doc_key = p.doc_key "
+               "WHERE paragraphs_fts MATCH ?")
+        params: List = [match]
+        if domain:
+            sql += " AND d.domain = ?"
+            params.append(domain)
+        with self._connect() as conn:
+            rows = conn.execute(sql + " ORDER BY rank LIMIT ?", params + [limit]).fetchall()
+            return [{
+                'url': row['url'],
+                'timestamp': row['timestamp'],
+                'ordinal': row['ordinal'],
+                'paragraph': row['text'],
+                'context': self._neighbours(conn, row['doc_key'], row['ordinal'], radius),
+                'score': -row['rank']
+            } for row in rows]
+
+    @contextmanager
+    def prefilter(self, keyword: str):
+        # unicode61 tokens are letter/digit runs. FTS5 has no suffix or infix
+        # matching, so runs that may sit at the end or middle of a token are left out
+        terms = [f'"{run}"' if kind == 'exact' else f'"{run}"*'
+                 for run, kind in keyword_runs(keyword, r'[^\W_]+') if kind in ('exact', 'prefix')]
+        if not terms or not self.exists():
+            yield None
+            return
+        match = ' '.join(terms)
+
+        with self._connect() as conn:
+            # Rowids only; no ranking or snippets
+            matched = {row[0] for row in conn.execute("SELECT rowid FROM docs_fts WHERE docs_fts MATCH ?", (match,))}
+
+            def check(doc_key: str):
+                row = conn.execute("SELECT id FROM docs WHERE doc_key = ?", (doc_key,)).fetchone()
+                if row is None:
+                    return None
+                if row['id'] not in matched:
+                    return set()
+                # Paragraphs are always written together with their page here
+                return {r[0] for r in conn.execute(
+                    "SELECT p.ordinal FROM paragraphs_fts f JOIN paragraphs p ON p.id = f.rowid "
+                    "WHERE paragraphs_fts MATCH ? AND p.doc_key = ?", (match, doc_key))}
+
+            yield check
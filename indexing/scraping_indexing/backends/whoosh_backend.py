@@ -0,0 +1,365 @@
+# =====================================
+# WHOOSH INDEX BACKEND
+# =====================================
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import sys
+import traceback
+
+from whoosh import highlight, index, sorting
+from whoosh.analysis import StandardAnalyzer
+from whoosh.fields import Schema, TEXT, ID, STORED, KEYWORD
+from whoosh.qparser import QueryParser
+from whoosh.query import And, Every, Prefix, Term, TermRange, Wildcard
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.append(str(project_root))
+
+from config import config
+from indexing.scraping_indexing.backends import IndexBackend, keyword_runs
+from indexing.scraping_indexing.paragraph_index import paragraph_index
+
+
+def hit_body(hit, field: str = 'content') -> str:
+    """
+    Page body for a search hit: stored in the index, or (for indexes built
+    without stored bodies) read from the page cache via the hit's doc_key.
+    """
+    body = hit.get(field)
+    if body is None and hit.get('doc_key'):
+        from scraping.caching.scrape_caching import content_cache
+        page = content_cache.page_store.load_page(hit['doc_key'])
+        body = (page or {}).get(field)
+    return body or ''
+
+class ContextFormatter(highlight.Formatter):
+    """
+    Formats highlight fragments as dicts instead of markup: the text around
+    the first matched term ('before'/'match'/'after', as callers expect) plus
+    the whole fragment with every matched term wrapped in ** **.
+    """
+
+    def format_fragment(self, fragment, replace=False):
+        text = fragment.text
+        matches = [t for t in fragment.matches if t.startchar is not None]
+        marked = []
+        index = fragment.startchar
+        for t in matches:
+            if t.startchar < index:
+                continue
+            marked.append(text[index:t.startchar])
+            marked.append(f"**{text[t.startchar:t.endchar]}**")
+            index = t.endchar
+        marked.append(text[index:fragment.endchar])
+
+        first = matches[0] if matches else None
+        return {
+            'before': text[fragment.startchar:first.startchar] if first else '',
+            'match': text[first.startchar:first.endchar] if first else '',
+            'after': text[first.endchar:fragment.endchar] if first else text[fragment.startchar:fragment.endchar],
+            'highlighted': ''.join(marked)
+        }
+
+    def format(self, fragments, replace=False):
+        return [self.format_fragment(f, replace=replace) for f in fragments]
+
+
+class WhooshBackend(IndexBackend):
+    """
+    The original pure-Python backend: the page index in index/ and the
+    paragraph index in paragraph_index/. Snippets come from Whoosh's
+    Highlighter over stored bodies, or over the cached page when the index
+    was built without them (INDEX_STORE_BODIES=false).
+    """
+
+    name = 'whoosh'
+
+    def __init__(self, index_dir: Path):
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(exist_ok=True)
+        self.analyzer = StandardAnalyzer()
+
+        # Initialize or get existing index
+        if not index.exists_in(str(self.index_dir)):
+            self._create_index()
+        # Checked on first write rather than here: the migration needs the
+        # cache's key function, which can't be imported while this module loads
+        self._schema_checked = False
+
+    @property
+    def state_path(self) -> Path:
+        # Lives in the index directory so it is wiped together with the index
+        return self.index_dir / 'reindex_state.json'
+
+    def _schema_fields(self) -> Dict:
+        """Current scraping index schema, by field name."""
+        return dict(
+            # Unique per capture (normalized URL + timestamp), same as the cache page key
+            doc_key=ID(stored=True, unique=True),
+            url=ID(stored=True),
+            domain=ID(stored=True),
+            # Without stored bodies, hits are resolved to the cached page by doc_key
+            content=TEXT(stored=config.INDEX_STORE_BODIES, analyzer=self.analyzer),
+            raw_text=TEXT(stored=config.INDEX_STORE_BODIES, analyzer=self.analyzer),
+            timestamp=ID(stored=True),
+            title=TEXT(stored=True),
+            metadata=STORED,
+            entities_person=TEXT(stored=True),
+            entities_company=TEXT(stored=True),
+            entities_email=TEXT(stored=True),
+            entities_phone=TEXT(stored=True),
+            entities_location=TEXT(stored=True),
+            outlinks=TEXT(stored=True),
+            backlinks=TEXT(stored=True),
+            # Filter/facet fields (see ScrapingIndexer._derived_fields)
+            date=ID(stored=True, sortable=True),
+            year=ID(stored=True),
+            source=ID(stored=True),
+            entity_types=KEYWORD(stored=True, lowercase=True)
+        )
+
+    def _create_index(self):
+        """Create the initial index with schema"""
+        index.create_in(str(self.index_dir), Schema(**self._schema_fields()))
+
+    def exists(self) -> bool:
+        return index.exists_in(str(self.index_dir)) and paragraph_index.exists()
+
+    def clear(self) -> None:
+        for file in self.index_dir.glob('*'):
+            if file.is_file():
+                file.unlink()
+        self._create_index()
+        paragraph_index.clear()
+
+    def prepare(self, derived_fields: Callable[[Dict], Dict]) -> None:
+        """
+        Bring an index created by an older version up to the current schema:
+        add the missing fields and, when bodies are stored (so every field can
+        be rebuilt), rewrite the documents to fill them in, collapsing the
+        duplicates earlier re-scrapes left behind on the way.
+        """
+        if self._schema_checked:
+            return
+        self._schema_checked = True
+        try:
+            from scraping.caching.page_store import capture_key
+
+            ix = index.open_dir(str(self.index_dir))
+            missing = {name: field for name, field in self._schema_fields().items()
+                       if name not in ix.schema.names()}
+            if not missing:
+                return
+            print(f"Migrating scraping index: adding {', '.join(missing)}...")
+            writer = ix.writer(timeout=60)
+            try:
+                for name, field in missing.items():
+                    writer.add_field(name, field)
+                if ix.schema['content'].stored:
+                    docs = {}
+                    for docnum, fields in writer.reader().iter_docs():
+                        writer.delete_document(docnum)
+                        fields.update(derived_fields(fields))
+                        # Later copies win, as they would have with update_document
+                        key = fields.get('doc_key') or capture_key(fields.get('url', ''), str(fields.get('timestamp', '')))
+                        fields['doc_key'] = key
+                        docs[key] = fields
+                    for fields in docs.values():
+                        writer.add_document(**fields)
+                    print(f"Migrated {len(docs)} unique documents")
+                else:
+                    print("Bodies aren't stored in this index; run 'reindex! full' to fill the new fields for existing pages")
+            except Exception:
+                writer.cancel()
+                raise
+            writer.commit()
+        except Exception as e:
+            print(f"Error migrating scraping index: {str(e)}")
+            traceback.print_exc()
+
+    def write(self, docs: Iterable[Dict], removed: Iterable[str] = (), procs: int = 1) -> int:
+        ix = index.open_dir(str(self.index_dir))
+        # Wait for the lock rather than fail if another writer is committing;
+        # procs > 1 spreads a large delta over worker processes
+        writer = ix.writer(procs=procs, limitmb=config.REINDEX_LIMIT_MB, timeout=60)
+        paragraph_writer = paragraph_index.writer()
+        written = 0
+        try:
+            for key in removed:
+                writer.delete_by_term('doc_key', key)
+                paragraph_writer.delete_by_term('doc_key', key)
+            # update_document doesn't see documents added in the same writer,
+            # so callers pass each doc_key at most once
+            for fields in docs:
+                writer.update_document(**fields)
+                paragraph_index.write_page(paragraph_writer, fields)
+                written += 1
+        except Exception:
+            writer.cancel()
+            paragraph_writer.cancel()
+            raise
+        # Single commit; a multiprocessing writer merges its segments here
+        writer.commit()
+        paragraph_writer.commit()
+        return written
+
+    def iter_documents(self) -> Iterator[Dict]:
+        ix = index.open_dir(str(self.index_dir))
+        with ix.searcher() as searcher:
+            for fields in searcher.all_stored_fields():
+                yield fields
+
+    def _highlighter(self):
+        return highlight.Highlighter(
+            fragmenter=highlight.ContextFragmenter(maxchars=1000, surround=250),
+            formatter=ContextFormatter(),
+            order=highlight.SCORE
+        )
+
+    def search_pages(self, query: str, filters: Dict, page: int = 1, pagelen: int = 20,
+                     sort_by_date: bool = False, facets: Tuple[str, ...] = (), top: int = 1) -> Dict:
+        ix = index.open_dir(str(self.index_dir))
+        names = ix.schema.names()
+        terms = []
+        if filters.get('domain'):
+            terms.append(Term('domain', filters['domain']))
+        if (filters.get('date_from') or filters.get('date_to')) and 'date' in names:
+            terms.append(TermRange('date', filters.get('date_from'), filters.get('date_to')))
+        if filters.get('source') and 'source' in names:
+            terms.append(Term('source', filters['source']))
+        for entity_type in filters.get('entity_types') or []:
+            if 'entity_types' in names:
+                terms.append(Term('entity_types', entity_type))
+
+        with ix.searcher() as searcher:
+            # The analyzer lowercases, so the search is case-insensitive
+            q = QueryParser("content", ix.schema).parse(query) if query.strip() else Every()
+            groupedby = {name: sorting.FieldFacet(name, maptype=sorting.Count) for name in facets if name in names}
+            results = searcher.search_page(
+                q, page, pagelen=pagelen, terms=True,
+                filter=And(terms) if terms else None,
+                groupedby=groupedby or None,
+                sortedby=sorting.FieldFacet('date', reverse=True) if sort_by_date and 'date' in names else None
+            )
+            # Highlighting tokenizes only the hits' text
+            highlighter = self._highlighter()
+
+            hits = []
+            for r in results:
+                # Stored body, or the cached page for indexes without stored bodies
+                fragments = highlighter.highlight_hit(r, 'content', text=hit_body(r), top=top) if query.strip() else []
+                hits.append({
+                    'doc_key': r.get('doc_key', ''),
+                    'url': r['url'],
+                    'timestamp': r.get('timestamp', ''),
+                    'domain': r.get('domain', ''),
+                    'source': r.get('source', ''),
+                    'fragments': fragments,
+                    'score': r.score
+                })
+
+            return {
+                'total': results.total,
+                'page': results.pagenum,
+                'pagecount': results.pagecount,
+                'hits': hits,
+                'facets': {name: dict(results.results.groups(name)) for name in groupedby}
+            }
+
+    def page_paragraphs(self, query: str, doc_key: str, top: int = 3, radius: int = 2) -> List[Dict]:
+        if not paragraph_index.exists():
+            return []
+        ix = paragraph_index.open()
+        with ix.searcher() as searcher:
+            q = QueryParser("text", ix.schema).parse(query)
+            hits = searcher.search(And([q, Term('doc_key', doc_key)]), limit=top)
+            return [
+                {'ordinal': h['ordinal'], 'context': paragraph_index.neighbours(searcher, doc_key, h['ordinal'], radius)}
+                for h in hits
+            ]
+
+    def search_paragraphs(self, query: str, domain: Optional[str] = None, limit: int = 20,
+                          radius: int = 2) -> List[Dict]:
+        if not paragraph_index.exists():
+            print("No paragraph index found! Please run indexing first.")
+            return []
+
+        ix = paragraph_index.open()
+        with ix.searcher() as searcher:
+            q = QueryParser("text", ix.schema).parse(query)
+            results = searcher.search(q, limit=limit, filter=Term('domain', domain) if domain else None)
+
+            matches = []
+            for r in results:
+                context = paragraph_index.neighbours(searcher, r['doc_key'], r['ordinal'], radius)
+                matches.append({
+                    'url': r['url'],
+                    'timestamp': r['timestamp'],
+                    'ordinal': r['ordinal'],
+                    'paragraph': next((p['text'] for p in context if p['ordinal'] == r['ordinal']), ''),
+                    'context': context,
+                    'score': r.score
+                })
+            return matches
+
+    def _keyword_queries(self, keyword: str, field: str) -> List:
+        """
+        Term/Prefix/Wildcard queries on `field` that every occurrence of
+        `keyword` satisfies. Runs shorter than the analyzer's minimum token
+        size, or that could lie in a stop word, are never indexed and are left
+        out (so are all of them for a keyword with no usable run).
+        """
+        stoplist = self.analyzer[-1].stops
+        queries = []
+        for run, kind in keyword_runs(keyword):
+            if len(run) < 2:
+                continue
+            if kind == 'exact':
+                if run not in stoplist:
+                    queries.append(Term(field, run))
+                continue
+            fits = {'prefix': lambda w: w.startswith(run), 'suffix': lambda w: w.endswith(run),
+                    'infix': lambda w: run in w}[kind]
+            if any(fits(stop) for stop in stoplist):
+                continue
+            if kind == 'prefix':
+                queries.append(Prefix(field, run))
+            else:
+                queries.append(Wildcard(field, '*' + run + ('*' if kind == 'infix' else '')))
+        return queries
+
+    @contextmanager
+    def prefilter(self, keyword: str):
+        ix = index.open_dir(str(self.index_dir))
+        queries = self._keyword_queries(keyword, 'content')
+        if not queries or 'doc_key' not in ix.schema.names():
+            yield None
+            return
+
+        pix = paragraph_index.open() if paragraph_index.exists() else None
+        with ix.searcher() as searcher:
+            # Postings lookup only; no scoring or stored fields
+            matched = set(searcher.docs_for_query(And(queries)))
+            psearcher = pix.searcher() if pix else None
+            if psearcher:
+                para_q = And(self._keyword_queries(keyword, 'text'))
+                ordinals = psearcher.reader().column_reader('ordinal')
+
+            def check(doc_key: str):
+                docnum = searcher.document_number(doc_key=doc_key)
+                if docnum is None:
+                    return None
+                if docnum not in matched:
+                    return set()
+                # Indexed before the paragraph index existed: scan the whole page
+                if psearcher is None or psearcher.document_number(doc_key=doc_key) is None:
+                    return None
+                return {ordinals[d] for d in psearcher.docs_for_query(And([Term('doc_key', doc_key), para_q]))}
+
+            try:
+                yield check
+            finally:
+                if psearcher:
+                    psearcher.close()
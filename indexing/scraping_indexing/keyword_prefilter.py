@@ -0,0 +1,46 @@
+# =====================================
+# KEYWORD SCAN PREFILTER
+# =====================================
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Set
+import re
+import sys
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from indexing.scraping_indexing.scraping_indexer import indexing_queue, scraping_indexer
+
+
+@contextmanager
+def keyword_prefilter(keyword: str):
+    """
+    Yields check(url, timestamp) for narrowing a keyword scan through the index.
+    For an indexed capture it returns the ordinals of the paragraphs (as split
+    on blank lines) of its 'content' that can contain `keyword`; an empty set
+    means the page cannot match. The answer never drops a page or paragraph
+    the scan would match (see IndexBackend.prefilter). It returns None when the
+    whole page has to be scanned: the capture isn't indexed, or has no
+    paragraphs indexed yet. Yields None instead when the index can't help: no
+    index, a regex keyword, or one with no term the index is sure to hold.
+    """
+    backend = scraping_indexer.backend
+    if re.search(r'[.^$*+?{}\[\]\\|()]', keyword) or not backend.exists():
+        yield None
+        return
+
+    indexing_queue.flush()
+
+    from scraping.caching.page_store import capture_key
+
+    with backend.prefilter(keyword) as check_key:
+        if check_key is None:
+            yield None
+            return
+
+        def check(url: str, timestamp: str = '') -> Optional[Set[int]]:
+            return check_key(capture_key(url, str(timestamp)))
+
+        yield check
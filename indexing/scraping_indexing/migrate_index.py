@@ -0,0 +1,76 @@
+# =====================================
+# INDEX MIGRATION
+# =====================================
+from pathlib import Path
+import shutil
+import sys
+import traceback
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from config import config
+from indexing.scraping_indexing.backends import get_backend
+from indexing.scraping_indexing.scraping_indexer import indexing_queue
+
+BACKENDS = ('whoosh', 'sqlite')
+
+
+def migrate_index(target: str, source: str = None) -> bool:
+    """
+    Copy every document of the `source` index backend into `target`
+    (rebuilt from scratch), together with its reindex state so incremental
+    'reindex!' carries on from there. Source defaults to the other backend.
+    Bodies the source doesn't store are read back from the page cache.
+    Set INDEX_BACKEND=<target> afterwards to search the new index.
+    """
+    try:
+        target = target.lower()
+        source = (source or next(b for b in BACKENDS if b != target)).lower()
+        if target == source or target not in BACKENDS or source not in BACKENDS:
+            print(f"Can't migrate from {source} to {target}")
+            return False
+
+        src = get_backend(source)
+        dst = get_backend(target)
+        if not src.exists():
+            print(f"No {source} index to migrate")
+            return False
+
+        # Queued documents go to the configured backend; let them land first
+        indexing_queue.flush()
+
+        from scraping.caching.scrape_caching import content_cache
+
+        def documents():
+            for fields in src.iter_documents():
+                if fields.get('content') is None or fields.get('raw_text') is None:
+                    page = content_cache.page_store.load_page(fields['doc_key']) or {}
+                    fields['content'] = fields.get('content') or page.get('content', '')
+                    fields['raw_text'] = fields.get('raw_text') or page.get('raw_text', '')
+                yield {name: value for name, value in fields.items() if value is not None}
+
+        print(f"Migrating scraping index from {source} to {target}...")
+        dst.clear()
+        procs = config.REINDEX_PROCS if target == 'whoosh' else 1
+        migrated = dst.write(documents(), procs=procs)
+
+        if src.state_path.exists():
+            shutil.copyfile(src.state_path, dst.state_path)
+        print(f"Migrated {migrated} documents")
+        if config.INDEX_BACKEND != target:
+            print(f"Set INDEX_BACKEND={target} to use the migrated index")
+        return True
+
+    except Exception as e:
+        print(f"Error migrating index: {str(e)}")
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1].lower() not in BACKENDS:
+        print(f"Usage: python {Path(__file__).name} <{'|'.join(BACKENDS)}> [source]")
+        sys.exit(1)
+    sys.exit(0 if migrate_index(*sys.argv[1:3]) else 1)
@@ -0,0 +1,117 @@
+# =====================================
+# PARAGRAPH INDEX
+# =====================================
+from pathlib import Path
+from typing import Dict, List, Optional
+import sys
+
+from whoosh import index
+from whoosh.analysis import StandardAnalyzer
+from whoosh.fields import Schema, TEXT, ID, NUMERIC
+from whoosh.query import And, NumericRange, Term
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from config import config
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """Paragraphs of a page as keyword search sees them (split on blank lines)."""
+    return text.split('\n\n')
+
+
+class ParagraphIndex:
+    """
+    Secondary Whoosh index with one document per non-empty paragraph of every
+    indexed page: the page's doc_key, url, domain, timestamp and the
+    paragraph's ordinal in split_paragraphs(). A match and its neighbouring
+    paragraphs come straight from postings instead of re-splitting page text
+    at query time. Written alongside the main scraping index.
+    """
+
+    def __init__(self, index_dir: Path):
+        self.index_dir = Path(index_dir)
+
+    def _schema(self) -> Schema:
+        return Schema(
+            para_key=ID(unique=True),
+            doc_key=ID(stored=True),
+            url=ID(stored=True),
+            domain=ID(stored=True),
+            timestamp=ID(stored=True),
+            ordinal=NUMERIC(int, stored=True, sortable=True),
+            # Stored unless bodies live only in the page cache (see INDEX_STORE_BODIES)
+            text=TEXT(stored=config.INDEX_STORE_BODIES, analyzer=StandardAnalyzer())
+        )
+
+    def exists(self) -> bool:
+        return index.exists_in(str(self.index_dir))
+
+    def open(self):
+        """Open the index, creating it on first use."""
+        if not self.exists():
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            return index.create_in(str(self.index_dir), self._schema())
+        return index.open_dir(str(self.index_dir))
+
+    def clear(self) -> None:
+        """Drop every paragraph (used by a full reindex)."""
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        index.create_in(str(self.index_dir), self._schema())
+
+    def writer(self):
+        # Wait for the lock rather than fail if another writer is committing
+        return self.open().writer(timeout=60)
+
+    def write_page(self, writer, fields: Dict) -> int:
+        """Replace the paragraphs of one page (main-index fields) in `writer`."""
+        writer.delete_by_term('doc_key', fields['doc_key'])
+        added = 0
+        for ordinal, paragraph in enumerate(split_paragraphs(fields.get('content') or '')):
+            if not paragraph.strip():
+                continue
+            writer.add_document(
+                para_key=f"{fields['doc_key']}#{ordinal}",
+                doc_key=fields['doc_key'],
+                url=fields.get('url', ''),
+                domain=fields.get('domain', ''),
+                timestamp=str(fields.get('timestamp', '')),
+                ordinal=ordinal,
+                text=paragraph
+            )
+            added += 1
+        return added
+
+    def update(self, docs: List[Dict], removed: Optional[List[str]] = None) -> None:
+        """Index the paragraphs of `docs` and drop those of the `removed` doc_keys, in one commit."""
+        writer = self.writer()
+        try:
+            for key in removed or []:
+                writer.delete_by_term('doc_key', key)
+            for fields in docs:
+                self.write_page(writer, fields)
+        except Exception:
+            writer.cancel()
+            raise
+        writer.commit()
+
+    def neighbours(self, searcher, doc_key: str, ordinal: int, radius: int = 2) -> List[Dict]:
+        """Paragraphs ordinal-radius..ordinal+radius of a page, in order."""
+        q = And([Term('doc_key', doc_key), NumericRange('ordinal', ordinal - radius, ordinal + radius)])
+        hits = searcher.search(q, limit=None, sortedby='ordinal')
+        paragraphs = [{'ordinal': hit['ordinal'], 'text': hit.get('text')} for hit in hits]
+
+        # Index built without stored bodies: take the text from the cached page
+        if any(p['text'] is None for p in paragraphs):
+            from scraping.caching.scrape_caching import content_cache
+            page = content_cache.page_store.load_page(doc_key) or {}
+            parts = split_paragraphs(page.get('content') or '')
+            for p in paragraphs:
+                p['text'] = parts[p['ordinal']] if p['ordinal'] < len(parts) else ''
+        return paragraphs
+
+
+# Global instance
+paragraph_index = ParagraphIndex(Path(__file__).parent / 'paragraph_index')
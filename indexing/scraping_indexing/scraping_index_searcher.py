@@ -1,9 +1,7 @@
 from pathlib import Path
 import json
 from datetime import datetime
-from typing import Dict, List
-from whoosh import index
-from whoosh.qparser import QueryParser
+from typing import Dict, List, Optional, Tuple
 import sys
 
 # Add project root to path
@@ -11,6 +9,7 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
 from AI.gemini_flash import generate_with_retry
+from indexing.scraping_indexing.scraping_indexer import indexing_queue, scraping_indexer
 
 # Memory files
 MEMORY_DIR = Path(__file__).parent / 'memory'
@@ -23,64 +22,93 @@ MEMORY_DIR.mkdir(parents=True, exist_ok=True)
 if not OPERATIONAL_MEMORY_FILE.exists():
     OPERATIONAL_MEMORY_FILE.write_text('[]')
 
-def search_index(query: str) -> List[Dict]:
-    """Search the scraping index"""
-    index_dir = Path(__file__).parent / 'index'
-    print(f"Looking for index in: {index_dir}")
-    
-    if not index.exists_in(str(index_dir)):
+def search_index(query: str, limit: int = 10, top: int = 3) -> List[Dict]:
+    """
+    Search the scraping index. Each match carries its `top` best highlighted
+    fragments ('fragments') plus the best one as 'context', and in
+    'paragraphs' its `top` best matching paragraphs, each with the
+    paragraphs around it.
+    """
+    backend = scraping_indexer.backend
+    print(f"Searching the {backend.name} index")
+
+    if not backend.exists():
         print("No index found! Please run indexing first.")
         return []
-    
-    ix = index.open_dir(str(index_dir))
-    with ix.searcher() as searcher:
-        # Make search case-insensitive
-        query_parser = QueryParser("content", ix.schema)
-        q = query_parser.parse(query.lower())
-        results = searcher.search(q, limit=10)
-        
-        # Use set to track unique URL+timestamp combinations
-        seen = set()
-        matches = []
-        
-        for r in results:
-            # Get content and do case-insensitive split
-            content = r.get('content', '').lower()
-            query_lower = query.lower()
-            parts = content.split(query_lower)
-            
-            # Get original content for display
-            original_content = r.get('content', '')
-            url = r['url']
-            timestamp = r['timestamp']
-            
-            # Only process this URL+timestamp combination if we haven't seen it
-            key = f"{url}_{timestamp}"
-            if key not in seen:
-                seen.add(key)
-                
-                # Find the first good match in the content
-                for i in range(len(parts)-1):
-                    start_pos = len(parts[i])
-                    end_pos = start_pos + len(query)
-                    original_match = original_content[start_pos:end_pos]
-                    
-                    context = {
-                        'before': original_content[max(0, start_pos-500):start_pos],
-                        'match': original_match,
-                        'after': original_content[end_pos:end_pos+500]
-                    }
-                    
-                    matches.append({
-                        'url': url,
-                        'timestamp': timestamp,
-                        'context': context,
-                        'score': r.score
-                    })
-                    # Only take the first match from this document
-                    break
-            
-        return matches
+
+    # Make just-scraped pages searchable before querying
+    indexing_queue.flush()
+
+    results = backend.search_pages(query, {}, page=1, pagelen=limit, top=top)
+
+    # Use set to track unique URL+timestamp combinations
+    seen = set()
+    matches = []
+    for r in results['hits']:
+        key = f"{r['url']}_{r['timestamp']}"
+        if key in seen or not r['fragments']:
+            continue
+        seen.add(key)
+        matches.append({
+            'url': r['url'],
+            'timestamp': r['timestamp'],
+            'context': r['fragments'][0],
+            'fragments': r['fragments'],
+            'paragraphs': backend.page_paragraphs(query, r['doc_key'], top=top) if r['doc_key'] else [],
+            'score': r['score']
+        })
+    return matches
+
+def search_paragraphs(query: str, domain: Optional[str] = None, limit: int = 20,
+                      radius: int = 2) -> List[Dict]:
+    """
+    Search the paragraph index. Each match is one paragraph ('ordinal' within
+    its page) with up to `radius` paragraphs either side in 'context', read
+    from the index rather than by re-splitting the page.
+    """
+    indexing_queue.flush()
+
+    if domain:
+        from scraping.caching.page_store import extract_domain
+        domain = extract_domain(domain)
+    return scraping_indexer.backend.search_paragraphs(query, domain=domain, limit=limit, radius=radius)
+
+def search_pages(query: str = '', domain: Optional[str] = None, date_from: Optional[str] = None,
+                 date_to: Optional[str] = None, source: Optional[str] = None,
+                 entity_types: Optional[List[str]] = None, page: int = 1, pagelen: int = 20,
+                 sort_by_date: bool = False, facets: Tuple[str, ...] = ('domain', 'source', 'year'),
+                 top: int = 1) -> Dict:
+    """
+    Filtered, faceted and paginated search over the scraping index.
+
+    - query:        query on page content ('' matches every page)
+    - domain:       bare domain, e.g. 'example.com'
+    - date_from/to: inclusive YYYYMMDD bounds on the capture date
+    - source:       'firecrawl', 'commoncrawl' or 'wayback'
+    - entity_types: only pages with entities of all these types ('person', 'company', ...)
+
+    Filters are index queries, applied before scoring rather than to the
+    results. Returns {'total', 'page', 'pagecount', 'hits', 'facets'} where
+    facets maps each facet field to {value: count} over all matching pages.
+    """
+    backend = scraping_indexer.backend
+    if not backend.exists():
+        print("No index found! Please run indexing first.")
+        return {'total': 0, 'page': page, 'pagecount': 0, 'hits': [], 'facets': {}}
+
+    indexing_queue.flush()
+
+    filters = {
+        'date_from': date_from,
+        'date_to': date_to,
+        'source': source.lower() if source else None,
+        'entity_types': [t.lower() for t in entity_types or []]
+    }
+    if domain:
+        from scraping.caching.page_store import extract_domain
+        filters['domain'] = extract_domain(domain)
+    return backend.search_pages(query, filters, page=page, pagelen=pagelen,
+                                sort_by_date=sort_by_date, facets=facets, top=top)
 
 def format_raw_results(matches: List[Dict]) -> str:
     """Format raw search results with extended context"""
@@ -100,13 +128,16 @@ def format_raw_results(matches: List[Dict]) -> str:
         # Format URL and date with spacing
         output.append(f"\n{match['url']} [{date_str}]\n")  # Added newline after date
         
-        # Clean up the context by removing excessive whitespace and line breaks
-        before = ' '.join(match['context']['before'].split())
-        after = ' '.join(match['context']['after'].split())
-        
-        output.append(f"...{before}")
-        output.append(f"**{match['context']['match']}**")
-        output.append(f"{after}...")
+        # Clean up each fragment by removing excessive whitespace and line breaks
+        for fragment in match.get('fragments') or [match['context']]:
+            if 'highlighted' in fragment:
+                output.append(f"...{' '.join(fragment['highlighted'].split())}...")
+            else:
+                before = ' '.join(fragment['before'].split())
+                after = ' '.join(fragment['after'].split())
+                output.append(f"...{before}")
+                output.append(f"**{fragment['match']}**")
+                output.append(f"{after}...")
         output.append("-" * 80)  # Separator line
     return "\n".join(output)
 
@@ -1,53 +1,174 @@
 from typing import Dict, Optional
 from datetime import datetime
 from pathlib import Path
+import atexit
 import json
+import queue
+import threading
+import time
 import traceback
 import sys
 
-from whoosh import index
-from whoosh.fields import Schema, TEXT, ID, STORED
-from whoosh.writing import AsyncWriter
-from whoosh.analysis import StandardAnalyzer
-from urllib.parse import urlparse
-
 # Add project root to path
 project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
+from config import config
+from indexing.scraping_indexing.backends import IndexBackend, get_backend
+
+# Entity types with an entities_<type> field
+ENTITY_TYPES = ['person', 'company', 'email', 'phone', 'location']
+
+
+class IndexingQueue:
+    """
+    Single background writer for the scraping index (whichever backend).
+
+    Documents from every scraper are queued and committed together once
+    `batch_size` are waiting or `flush_seconds` after the oldest was queued,
+    so a burst of scraping costs one commit (and one segment) per batch
+    rather than one per call. The backend indexes each batch's paragraphs
+    in the same pass. Pending documents are flushed at exit.
+    """
+
+    def __init__(self, backend: IndexBackend, batch_size: int, flush_seconds: float):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.pending = 0
+        self.committed = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def put(self, fields: Dict) -> None:
+        """Queue one document's fields for the next batch."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='indexing-queue', daemon=True)
+                self._thread.start()
+            self.pending += 1
+        self._queue.put(fields)
+
+    def flush(self, timeout: Optional[float] = 60) -> None:
+        """Commit everything queued so far and wait for it."""
+        if not self.pending or self._thread is None or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def _run(self) -> None:
+        batch = []
+        deadline = None
+        while True:
+            try:
+                wait = max(0.0, deadline - time.monotonic()) if batch else None
+                item = self._queue.get(timeout=wait)
+            except queue.Empty:
+                item = None  # Time threshold reached
+
+            if isinstance(item, threading.Event):
+                self._commit(batch)
+                batch = []
+                item.set()
+                continue
+            if item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_seconds
+                batch.append(item)
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._commit(batch)
+                batch = []
+
+    def _commit(self, batch) -> None:
+        if not batch:
+            return
+        try:
+            # Upserts don't see documents added earlier in the same commit,
+            # so collapse repeats within the batch first (latest wins)
+            latest = {}
+            for fields in batch:
+                latest[fields.get('doc_key')] = fields
+            self.backend.write(list(latest.values()))
+            self.committed += len(batch)
+            print(f"Successfully indexed {len(batch)} pages")
+        except Exception as e:
+            print(f"Error indexing content: {str(e)}")
+            traceback.print_exc()
+        finally:
+            with self._lock:
+                self.pending -= len(batch)
+
+
 class ScrapingIndexer:
-    def __init__(self, index_dir: Optional[str] = None):
-        # Always use the current directory for index storage
-        self.index_dir = Path(__file__).parent / 'index'
-        self.index_dir.mkdir(exist_ok=True)
-        self.analyzer = StandardAnalyzer()
-        
-        # Initialize or get existing index
-        if not index.exists_in(str(self.index_dir)):
-            self._create_index()
-            
-    def _create_index(self):
-        """Create the initial index with schema"""
-        schema = Schema(
-            url=ID(stored=True),
-            domain=ID(stored=True),
-            content=TEXT(stored=True, analyzer=self.analyzer),
-            raw_text=TEXT(stored=True, analyzer=self.analyzer),
-            timestamp=ID(stored=True),
-            title=TEXT(stored=True),
-            metadata=STORED,
-            entities_person=TEXT(stored=True),
-            entities_company=TEXT(stored=True),
-            entities_email=TEXT(stored=True),
-            entities_phone=TEXT(stored=True),
-            entities_location=TEXT(stored=True),
-            outlinks=TEXT(stored=True),
-            backlinks=TEXT(stored=True)
+    def __init__(self, backend: Optional[IndexBackend] = None):
+        # Whoosh or SQLite FTS5, per config.INDEX_BACKEND
+        self.backend = backend or get_backend()
+
+    @staticmethod
+    def _index_date(timestamp: str) -> str:
+        """YYYYMMDD from a capture timestamp (YYYYMMDDhhmmss, YYYY-MM-DD or ISO), else ''."""
+        digits = timestamp[:10].replace('-', '')
+        return digits[:8] if len(digits) >= 8 and digits[:8].isdigit() else ''
+
+    def _derived_fields(self, fields: Dict) -> Dict:
+        """Filter/facet fields computed from a document's stored fields."""
+        from scraping.caching.page_store import extract_domain
+
+        date = self._index_date(str(fields.get('timestamp', '')))
+        try:
+            source = json.loads(fields.get('metadata') or '{}').get('source', '')
+        except (TypeError, ValueError):
+            source = ''
+        return dict(
+            domain=extract_domain(fields.get('url', '')),
+            date=date,
+            year=date[:4],
+            source=source,
+            entity_types=' '.join(t for t in ENTITY_TYPES if fields.get(f'entities_{t}'))
         )
-        index.create_in(str(self.index_dir), schema)
         
+    def _document(self, item: Dict, content: Dict) -> Dict:
+        """Index fields for one page of `content`."""
+        from scraping.caching.page_store import capture_key
+
+        ts = item.get('timestamp', datetime.now().isoformat())
+        if isinstance(ts, datetime):
+            ts = ts.isoformat()
+        # Entities
+        e = item.get('entities', content.get('entities', {}))
+        # Links
+        links = item.get('links', content.get('links', {}))
+        # Source: firecrawl / commoncrawl / wayback where the caller says so
+        source = (content.get('source') or content.get('metadata', {}).get('source')
+                  or item.get('source') or 'website')
+
+        fields = dict(
+            doc_key=capture_key(item['url'], str(item.get('timestamp', ''))),
+            url=item['url'],
+            content=item.get('content', ''),
+            raw_text=item.get('raw_text', ''),
+            timestamp=ts,
+            title=item.get('title', ''),
+            metadata=json.dumps({
+                'timestamp': ts,
+                'source': source
+            }),
+            entities_person=','.join(e.get('person', [])),
+            entities_company=','.join(e.get('company', [])),
+            entities_email=','.join(e.get('email', [])),
+            entities_phone=','.join(e.get('phone', [])),
+            entities_location=','.join(e.get('location', [])),
+            outlinks=','.join(links.get('outlinks', [])),
+            backlinks=','.join(links.get('backlinks', []))
+        )
+        fields.update(self._derived_fields(fields))
+        return fields
+
     def index_content(self, content: Dict) -> bool:
-        """Index content in Whoosh for search"""
+        """Queue content for indexing (see IndexingQueue)"""
         try:
             if not content:
                 return False
@@ -57,52 +178,50 @@ class ScrapingIndexer:
             if not items_to_index:
                 return False
 
-            ix = index.open_dir(str(self.index_dir))
-            writer = AsyncWriter(ix)
-
+            self.backend.prepare(self._derived_fields)
+            # Committed in batches by the background queue
             for item in items_to_index:
-                ts = item.get('timestamp', datetime.now().isoformat())
-                if isinstance(ts, datetime):
-                    ts = ts.isoformat()
-                # Domain
-                domain = urlparse(item['url']).netloc if 'url' in item else ''
-                # Entities
-                e = item.get('entities', content.get('entities', {}))
-                # Links
-                links = item.get('links', content.get('links', {}))
-
-                writer.add_document(
-                    url=item['url'],
-                    domain=domain,
-                    content=item.get('content', ''),
-                    raw_text=item.get('raw_text', ''),
-                    timestamp=ts,
-                    title=item.get('title', ''),
-                    metadata=json.dumps({
-                        'timestamp': ts,
-                        'source': content.get('source', 'website')
-                    }),
-                    entities_person=','.join(e.get('person', [])),
-                    entities_company=','.join(e.get('company', [])),
-                    entities_email=','.join(e.get('email', [])),
-                    entities_phone=','.join(e.get('phone', [])),
-                    entities_location=','.join(e.get('location', [])),
-                    outlinks=','.join(links.get('outlinks', [])),
-                    backlinks=','.join(links.get('backlinks', []))
-                )
-
-            writer.commit()
-            print(f"Successfully indexed {len(items_to_index)} pages")
+                indexing_queue.put(self._document(item, content))
             return True
 
         except Exception as e:
             print(f"Error indexing content: {str(e)}")
             traceback.print_exc()
             return False
-            
-    def reindex_all_cached(self):
-        """Reindex all content from the cache directory"""
+
+    def _state_path(self) -> Path:
+        # Per backend, next to its index
+        return self.backend.state_path
+
+    def _load_state(self) -> Dict[str, str]:
+        """Page key -> body digest for every cached page already in the index."""
+        try:
+            return json.loads(self._state_path().read_text(encoding='utf-8'))
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save_state(self, state: Dict[str, str]) -> None:
+        from scraping.caching.locks import atomic_write_text
+        atomic_write_text(self._state_path(), json.dumps(state))
+
+    def reindex_all_cached(self, full: bool = False):
+        """
+        Bring the index up to date with the cache.
+
+        Incremental by default: pages are tracked by cache key and body digest
+        in reindex_state.json, and only new or changed pages (one per distinct
+        body) are upserted by doc_key, so the existing index stays searchable
+        throughout. Documents for pages that have left the cache are deleted.
+        The delta is written in one commit (by a multiprocessing writer on
+        Whoosh). With full=True the index is dropped and rebuilt, as it is the
+        first time if the backend's index (with paragraphs) doesn't exist yet.
+        """
         try:
+            from scraping.caching.page_store import PageStore
+
+            # Let queued documents land first so the reindex writer has the lock to itself
+            indexing_queue.flush()
+
             # Get cache directory relative to project root
             project_root = Path(__file__).parent.parent.parent
             cache_dir = project_root / "cache"  # lowercase
@@ -112,22 +231,77 @@ class ScrapingIndexer:
                 print("Cache directory not found")
                 return False
                 
-            # Clear existing index
-            if index.exists_in(str(self.index_dir)):
-                for file in self.index_dir.glob('*'):
-                    if file.name != 'scraping_indexer.py':  # Don't delete self
-                        file.unlink()
-                self._create_index()
-                
-            # Reindex all cached files
-            for cache_file in cache_dir.glob('*.json'):
-                try:
-                    content = json.loads(cache_file.read_text())
-                    self.index_content(content)
-                except Exception as e:
-                    print(f"Error indexing {cache_file.name}: {str(e)}")
+            # Pages (or paragraphs) already indexed would be missing otherwise
+            if not self.backend.exists():
+                full = True
+
+            # Clear existing index for a full rebuild
+            if full:
+                self.backend.clear()
+            self.backend.prepare(self._derived_fields)
+            state = {} if full else self._load_state()
+
+            page_store = PageStore(cache_dir)
+            # Pick up legacy cache files dropped in since the cache index was built
+            for legacy_file in cache_dir.glob('*.json'):
+                if not page_store.index.has_location(legacy_file.name):
+                    page_store.register_legacy_file(legacy_file)
+
+            # Work out the delta from the cache index alone, before reading any bodies.
+            # A capture stored in several places is indexed from its latest copy
+            live = {}
+            for domain in page_store.index.domains():
+                for entry in page_store.find_entries(domain):
+                    current = live.get(entry['key'])
+                    if current is None or (entry.get('cached_at') or 0) > (current.get('cached_at') or 0):
+                        live[entry['key']] = entry
+
+            # Pages that have left the cache (evicted or cleared) leave the index too
+            gone = [key for key in state if key not in live]
+            state = {key: digest for key, digest in state.items() if key in live}
+
+            # The state only records captures actually in the index, so a duplicate
+            # skipped here is picked up by a later run once its original is gone
+            indexed_digests = set(state.values())
+            delta = []
+            for key, entry in live.items():
+                digest = entry.get('digest') or ''
+                if key in state and state[key] == digest:
+                    continue
+                if digest and digest in indexed_digests:
+                    # Same body already indexed under another capture; drop an outdated copy
+                    if key in state:
+                        del state[key]
+                        gone.append(key)
                     continue
-                    
+                state[key] = digest
+                if digest:
+                    indexed_digests.add(digest)
+                delta.append(entry)
+
+            if not delta and not gone:
+                self._save_state(state)
+                print("Index already up to date")
+                return True
+
+            print(f"Indexing {len(delta)} new or changed pages, removing {len(gone)}...")
+            # Only worth spinning up worker processes for a sizeable delta
+            procs = config.REINDEX_PROCS if len(delta) >= 1000 else 1
+            sources = {'f': 'firecrawl', 'c': 'commoncrawl', 'w': 'wayback'}
+            by_source = {}
+            for entry in delta:
+                by_source.setdefault(entry.get('source'), []).append(entry)
+
+            def documents():
+                # Streamed into the writer; bodies are read one page at a time
+                for sid, entries in by_source.items():
+                    content = {'source': sources.get(sid, 'website')}
+                    for page in page_store.iter_pages(entries):
+                        yield self._document(page, content)
+
+            indexed = self.backend.write(documents(), removed=gone, procs=procs)
+            self._save_state(state)
+            print(f"Indexed {indexed} pages")
             return True
             
         except Exception as e:
@@ -135,5 +309,10 @@ class ScrapingIndexer:
             traceback.print_exc()
             return False
 
-# Global instance
+# Global instances
+indexing_queue = IndexingQueue(
+    get_backend(),
+    batch_size=config.INDEX_BATCH_SIZE,
+    flush_seconds=config.INDEX_FLUSH_SECONDS
+)
 scraping_indexer = ScrapingIndexer()
\ No newline at end of file
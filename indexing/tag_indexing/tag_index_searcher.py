@@ -3,13 +3,16 @@ import json
 from datetime import datetime
 from typing import Dict, List, Optional
 from whoosh import index
-from whoosh.qparser import QueryParser, MultifieldParser
+from whoosh.qparser import QueryParser, MultifieldParser, OrGroup
+from whoosh.query import And, FuzzyTerm, Or, Term
 import sys
 
 # Add project root to path
 project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
+from indexing.tag_indexing.tag_indexer import parse_edge
+
 # Memory files
 MEMORY_DIR = Path(__file__).parent / 'memory'
 TAG_MEMORY_FILE = MEMORY_DIR / 'tag_memory.json'
@@ -21,11 +24,93 @@ MEMORY_DIR.mkdir(parents=True, exist_ok=True)
 if not TAG_MEMORY_FILE.exists():
     TAG_MEMORY_FILE.write_text('[]')
 
-def search_tags(query: str, fields: List[str] = None) -> List[Dict]:
-    """Search the tag index across specified fields"""
-    index_dir = Path(__file__).parent / 'index'
-    print(f"Looking for tag index in: {index_dir}")
-    
-    if not index.exists_in(str(index_dir)):
+INDEX_DIR = Path(__file__).parent / 'index'
+
+# Default search fields and their boosts: exact words outrank n-gram matches
+SEARCH_FIELDS = {'name': 4.0, 'variations': 3.0, 'name_ngram': 1.0, 'variations_ngram': 0.5, 'notes': 0.5}
+
+def _open_index():
+    if not index.exists_in(str(INDEX_DIR)):
         print("No tag index found! Please run indexing first.")
-        return [] 
\ No newline at end of file
+        return None
+    return index.open_dir(str(INDEX_DIR))
+
+def _hit_to_tag(hit) -> Dict:
+    """The indexed tag as saved in tags.json"""
+    return json.loads(hit['raw_data'])
+
+def search_tags(query: str, fields: List[str] = None, class_: Optional[str] = None,
+                type_: Optional[str] = None, limit: int = 20) -> List[Dict]:
+    """
+    Search the tag index across specified fields (names, variations and
+    their trigrams by default, so partial names still match), plus names
+    and variations within one edit of each query word, for typos.
+    Optionally restricted to one tag class/type. Returns the tags, best
+    match first, each with its 'score'.
+    """
+    ix = _open_index()
+    if ix is None:
+        return []
+
+    names = ix.schema.names()
+    fields = [f for f in (fields or SEARCH_FIELDS) if f in names]
+    boosts = {f: SEARCH_FIELDS.get(f, 1.0) for f in fields}
+    # Any field may match; n-gram fields need OR between their grams
+    parser = MultifieldParser(fields, ix.schema, fieldboosts=boosts, group=OrGroup)
+
+    filters = []
+    if class_:
+        filters.append(Term('class_', class_))
+    if type_:
+        filters.append(Term('type_', type_))
+
+    q = parser.parse(query)
+    words = [t.text for t in ix.schema['name'].analyzer(query, mode='query')]
+    fuzzy = [FuzzyTerm(f, w, maxdist=1, prefixlength=1) for f in ('name', 'variations') if f in fields
+             for w in words if len(w) >= 4]
+    if fuzzy:
+        q = Or([q] + fuzzy)
+
+    with ix.searcher() as searcher:
+        results = searcher.search(q, limit=limit,
+                                  filter=And(filters) if filters else None)
+        tags = []
+        for hit in results:
+            tag = _hit_to_tag(hit)
+            tag['score'] = hit.score
+            tags.append(tag)
+        return tags
+
+def get_tag(tag_id: str) -> Optional[Dict]:
+    """One tag by its id_"""
+    ix = _open_index()
+    if ix is None:
+        return None
+    with ix.searcher() as searcher:
+        hit = searcher.document(id_=tag_id)
+        return json.loads(hit['raw_data']) if hit else None
+
+def tag_neighbours(tag_id: str, edge_type: Optional[str] = None) -> List[Dict]:
+    """
+    Tags connected to tag_id by an edge (optionally of one edge type),
+    each as {'edge_type', 'tag'}. Found through the neighbours field, so
+    edges recorded on either end are picked up.
+    """
+    ix = _open_index()
+    if ix is None:
+        return []
+
+    q = Term('neighbours', tag_id)
+    if edge_type:
+        q = And([q, Term('edge_types', edge_type)])
+
+    with ix.searcher() as searcher:
+        neighbours = []
+        for hit in searcher.search(q, limit=None):
+            tag = _hit_to_tag(hit)
+            for edge_id in tag.get('edges') or []:
+                edge = parse_edge(edge_id, tag['id_'])
+                if edge and edge['neighbour'] == tag_id and (not edge_type or edge['edge_type'] == edge_type):
+                    neighbours.append({'edge_type': edge['edge_type'], 'tag': tag})
+                    break
+        return neighbours
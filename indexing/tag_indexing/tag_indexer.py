@@ -5,44 +5,167 @@ import json
 import traceback
 import sys
 from whoosh import index
-from whoosh.fields import Schema, TEXT, ID, STORED, DATETIME
-from whoosh.writing import AsyncWriter
+from whoosh.fields import Schema, TEXT, ID, STORED, KEYWORD, NGRAMWORDS
 from whoosh.analysis import StandardAnalyzer
 
 # Add project root to path
 project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
+def tag_name(tag: Dict) -> str:
+    """Display name of a tag (entity/query tags nest it under name.value)"""
+    name = tag.get('name')
+    if isinstance(name, dict):
+        return str(name.get('value') or '')
+    return str(name or '')
+
+def tag_variations(tag: Dict) -> List[str]:
+    """Name variations, from name.variations and/or the top-level list"""
+    variations = []
+    name = tag.get('name')
+    if isinstance(name, dict):
+        variations.extend(name.get('variations') or [])
+    variations.extend(tag.get('variations') or [])
+    return list(dict.fromkeys(str(v) for v in variations if v))
+
+def parse_edge(edge_id: str, tag_id: str) -> Optional[Dict]:
+    """{'edge_type', 'neighbour'} for an edge ID '<source>-<type>-<target>' seen from tag_id"""
+    parts = str(edge_id).split('-')
+    if len(parts) != 3:
+        return None
+    source, edge_type, target = parts
+    return {'edge_type': edge_type, 'neighbour': target if source == tag_id else source}
+
 class TagIndexer:
+    """
+    Whoosh index over tags.json, one document per tag keyed by its unique id_.
+
+    Names and variations are indexed both as words and as 3-character
+    n-grams, so misspelt or partial names still match. Edges are indexed by
+    edge ID, edge type and the ID of the tag at the other end, so a tag's
+    neighbours are one term lookup. The full tag is kept in raw_data.
+    """
+
+    # Fields a tag document needs; an index without them is rebuilt
+    REQUIRED_FIELDS = ('name_ngram', 'variations_ngram', 'neighbours', 'edge_types')
+
     def __init__(self, index_dir: Optional[str] = None):
         if index_dir:
             self.index_dir = Path(index_dir)
         else:
             # Default to the indexing/tag_indexing/index directory in project root
             self.index_dir = project_root / 'indexing' / 'tag_indexing' / 'index'
-            
+
         # Create index directory if it doesn't exist
         self.index_dir.mkdir(parents=True, exist_ok=True)
         self.analyzer = StandardAnalyzer()
-        
+
         # Initialize or get existing index
         if not index.exists_in(str(self.index_dir)):
             self._create_index()
-            
+        else:
+            # Indexes from before tags were actually written lack the
+            # n-gram and edge fields; nothing was ever added to them
+            schema = index.open_dir(str(self.index_dir)).schema
+            if any(field not in schema.names() for field in self.REQUIRED_FIELDS):
+                self._create_index()
+
         print(f"Tag indexer initialized at: {self.index_dir}")
-        
+
     def _create_index(self):
         """Create the initial index with schema"""
         schema = Schema(
             id_=ID(stored=True, unique=True),
-            name=TEXT(stored=True),
-            class_=TEXT(stored=True),
-            type_=TEXT(stored=True),
-            variations=TEXT(stored=True),
+            name=TEXT(stored=True, analyzer=self.analyzer),
+            name_ngram=NGRAMWORDS(minsize=3, maxsize=3, queryor=True),
+            class_=ID(stored=True),
+            type_=ID(stored=True),
+            variations=TEXT(stored=True, analyzer=self.analyzer),
+            variations_ngram=NGRAMWORDS(minsize=3, maxsize=3, queryor=True),
             notes=TEXT(stored=True),
             track=ID(stored=True),
-            edges=STORED,
+            edges=KEYWORD(stored=True, commas=True),
+            edge_types=KEYWORD(commas=True),
+            neighbours=KEYWORD(stored=True, commas=True),
             metadata=STORED,
             raw_data=STORED
         )
-        index.create_in(str(self.index_dir), schema) 
\ No newline at end of file
+        index.create_in(str(self.index_dir), schema)
+
+    def _document(self, tag: Dict) -> Dict:
+        """Whoosh fields for one tag"""
+        name = tag_name(tag)
+        variations = tag_variations(tag)
+        edges = [str(e) for e in tag.get('edges') or []]
+        parsed = [p for p in (parse_edge(e, tag['id_']) for e in edges) if p]
+        notes = tag.get('notes') or []
+        if isinstance(notes, str):
+            notes = [notes]
+        return dict(
+            id_=tag['id_'],
+            name=name,
+            name_ngram=name,
+            class_=str(tag.get('class_') or ''),
+            type_=str(tag.get('type_') or ''),
+            variations=', '.join(variations),
+            variations_ngram=' '.join(variations),
+            notes='\n'.join(str(n) for n in notes),
+            track=str(tag.get('track') or datetime.now().isoformat()),
+            edges=','.join(edges),
+            edge_types=','.join(sorted({p['edge_type'] for p in parsed})),
+            neighbours=','.join(sorted({p['neighbour'] for p in parsed})),
+            metadata=tag.get('metadata'),
+            raw_data=json.dumps(tag)
+        )
+
+    def index_tags(self, tags: List[Dict]) -> int:
+        """
+        Upsert tags by id_ in a single commit. Callers batch a whole scenario's
+        tags into one call rather than committing per tag.
+        """
+        # Latest version of each tag wins within the batch
+        latest = {}
+        for tag in tags or []:
+            if tag and tag.get('id_'):
+                latest[tag['id_']] = tag
+        if not latest:
+            return 0
+
+        try:
+            ix = index.open_dir(str(self.index_dir))
+            # Wait for the lock rather than fail if another scenario is committing
+            writer = ix.writer(timeout=60)
+            try:
+                for tag in latest.values():
+                    writer.update_document(**self._document(tag))
+            except Exception:
+                writer.cancel()
+                raise
+            writer.commit()
+            return len(latest)
+        except Exception as e:
+            print(f"Error indexing tags: {str(e)}")
+            traceback.print_exc()
+            return 0
+
+    def reindex_from_file(self, tags_file: Optional[Path] = None) -> int:
+        """Rebuild the index from tags.json (e.g. for tags saved before indexing worked)"""
+        tags_file = Path(tags_file) if tags_file else project_root / 'tags' / 'tags.json'
+        try:
+            tags = json.loads(tags_file.read_text()) if tags_file.exists() else []
+        except json.JSONDecodeError as e:
+            print(f"Error reading tags file: {str(e)}")
+            return 0
+        self._create_index()
+        count = self.index_tags(tags if isinstance(tags, list) else [])
+        print(f"Indexed {count} tags from {tags_file}")
+        return count
+
+_tag_indexer = None
+
+def get_tag_indexer() -> TagIndexer:
+    """Shared TagIndexer over the default index directory, created on first use"""
+    global _tag_indexer
+    if _tag_indexer is None:
+        _tag_indexer = TagIndexer()
+    return _tag_indexer
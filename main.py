@@ -77,7 +77,10 @@ Available platform aliases:
 - Web: :web
 
 === System Commands ===
-reindex! all          (Reindex all cached files)
+reindex! all          (Index new and changed cached pages)
+reindex! full         (Rebuild the whole index from the cache)
+cache-stats           (Show cache hit rate, size per domain and evictions)
+migrate-index sqlite  (Copy the scraping index to another backend: whoosh or sqlite)
 forget!               (Clean all cache and index files)
 help                  (Show this help message)
 quit                  (Exit the program)
@@ -91,8 +94,18 @@ async def dispatch_command(command: str, wsm: WebsiteModules, wss: WebsiteSearch
 
     # 1. Handle system commands first
     if cmd_lower.startswith("reindex!"):
-        success = scraping_indexer.reindex_all_cached()
+        # 'reindex! full' rebuilds from scratch; anything else only indexes new/changed pages
+        success = scraping_indexer.reindex_all_cached(full=cmd_lower.split()[-1] == "full")
         return "Reindex completed" if success else "Reindex failed"
+    elif cmd_lower.startswith("migrate-index"):
+        from indexing.scraping_indexing.migrate_index import migrate_index
+        parts = cmd_lower.split()
+        if len(parts) < 2:
+            return "Usage: migrate-index <whoosh|sqlite>"
+        return "Index migrated" if migrate_index(parts[1]) else "Index migration failed"
+    elif cmd_lower == "cache-stats":
+        from scraping.caching.scrape_caching import content_cache
+        return content_cache.cache_stats()
     elif cmd_lower == "forget!":
         cleanup()
         return "Cache and index files cleaned successfully"
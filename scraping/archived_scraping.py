@@ -47,14 +47,35 @@ class ArchivedContent:
             if is_domain_wide:
                 print("Performing domain-wide search...")
                 
-                # Get Common Crawl content first
-                cc_content = await get_historic_content(url, year, is_domain_wide=True)
-                if cc_content and 'pages' in cc_content:
-                    print(f"Found {len(cc_content['pages'])} CommonCrawl pages...")
-                    scraping_indexer.index_content(cc_content)
+                # Get Common Crawl content first (unless it recently had nothing).
+                # Fetch failures raise, so they are recorded with the shorter error TTL
+                cc_content = None
+                try:
+                    if cache_checker.is_known_miss('commoncrawl', url, year, is_domain_wide=True):
+                        print("Skipping CommonCrawl (no captures on a recent attempt)")
+                    else:
+                        cc_content = await get_historic_content(url, year, is_domain_wide=True, raise_errors=True)
+                        if cc_content and cc_content.get('pages'):
+                            print(f"Found {len(cc_content['pages'])} CommonCrawl pages...")
+                            scraping_indexer.index_content(cc_content)
+                        else:
+                            cache_checker.record_miss('commoncrawl', url, year, is_domain_wide=True)
+                except Exception as e:
+                    print(f"CommonCrawl error: {str(e)}")
+                    cache_checker.record_miss('commoncrawl', url, year, is_domain_wide=True, reason='error')
                 
                 # Get Wayback content
-                wb_snapshots = await self.wayback.get_domain_snapshots(url, year)
+                wb_snapshots = None
+                try:
+                    if cache_checker.is_known_miss('wayback', url, year, is_domain_wide=True):
+                        print("Skipping Wayback (no snapshots on a recent attempt)")
+                    else:
+                        wb_snapshots = await self.wayback.get_domain_snapshots(url, year, raise_errors=True)
+                        if not wb_snapshots:
+                            cache_checker.record_miss('wayback', url, year, is_domain_wide=True)
+                except Exception as e:
+                    print(f"Wayback error: {str(e)}")
+                    cache_checker.record_miss('wayback', url, year, is_domain_wide=True, reason='error')
                 if wb_snapshots:
                     print(f"Found {len(wb_snapshots)} Wayback snapshots...")
                     for date_content in wb_snapshots:
@@ -83,20 +104,32 @@ class ArchivedContent:
                 
                 # Get Common Crawl content
                 try:
-                    cc_content = await get_historic_content(url, year, is_domain_wide=False)
-                    if cc_content and 'pages' in cc_content:
-                        print(f"Found {len(cc_content['pages'])} CommonCrawl pages...")
-                        scraping_indexer.index_content(cc_content)
-                        for page in cc_content['pages']:
-                            page['source'] = 'commoncrawl'
-                            all_urls.append(page)
+                    if cache_checker.is_known_miss('commoncrawl', url, year):
+                        print("Skipping CommonCrawl (no captures on a recent attempt)")
+                    else:
+                        cc_content = await get_historic_content(url, year, is_domain_wide=False, raise_errors=True)
+                        if cc_content and cc_content.get('pages'):
+                            print(f"Found {len(cc_content['pages'])} CommonCrawl pages...")
+                            scraping_indexer.index_content(cc_content)
+                            for page in cc_content['pages']:
+                                page['source'] = 'commoncrawl'
+                                all_urls.append(page)
+                        else:
+                            cache_checker.record_miss('commoncrawl', url, year)
                 except Exception as e:
                     print(f"CommonCrawl error: {str(e)}")
+                    cache_checker.record_miss('commoncrawl', url, year, reason='error')
                 
                 # Get Wayback content
                 try:
-                    print(f"\nSearching Wayback Machine for year: {year}")
-                    wb_content = await self.wayback.get_url_snapshots(url, year)
+                    wb_content = None
+                    if cache_checker.is_known_miss('wayback', url, year):
+                        print("Skipping Wayback (no snapshots on a recent attempt)")
+                    else:
+                        print(f"\nSearching Wayback Machine for year: {year}")
+                        wb_content = await self.wayback.get_url_snapshots(url, year, raise_errors=True)
+                        if not wb_content:
+                            cache_checker.record_miss('wayback', url, year)
                     if wb_content:
                         print(f"Found {len(wb_content)} Wayback snapshots...")
                         for snapshot in wb_content:
@@ -107,6 +140,7 @@ class ArchivedContent:
                                 all_urls.append(url_data)
                 except Exception as e:
                     print(f"Wayback error: {str(e)}")
+                    cache_checker.record_miss('wayback', url, year, reason='error')
 
                 if all_urls:
                     for page in all_urls:
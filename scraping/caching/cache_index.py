@@ -0,0 +1,356 @@
+# =====================================
+# CACHE INDEX
+# =====================================
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key           TEXT NOT NULL,
+    domain        TEXT NOT NULL,
+    year          TEXT,
+    date          TEXT,
+    source        TEXT,
+    url           TEXT,
+    norm_url      TEXT,
+    timestamp     TEXT,
+    location      TEXT NOT NULL,
+    list_key      TEXT,
+    page_offset   INTEGER,
+    member_offset INTEGER,
+    cached_at     REAL,
+    size          INTEGER,
+    access_count  INTEGER DEFAULT 0,
+    last_access   REAL,
+    digest        TEXT
+);
+CREATE TABLE IF NOT EXISTS stats (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS negatives (
+    key         TEXT PRIMARY KEY,
+    domain      TEXT NOT NULL,
+    source      TEXT,
+    reason      TEXT,
+    recorded_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_negatives_domain ON negatives (domain);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_pages_slot ON pages (
+    key, location, COALESCE(list_key, ''), COALESCE(page_offset, -1), COALESCE(member_offset, -1)
+);
+CREATE INDEX IF NOT EXISTS idx_pages_key ON pages (key);
+CREATE INDEX IF NOT EXISTS idx_pages_domain_year ON pages (domain, year, source);
+CREATE INDEX IF NOT EXISTS idx_pages_domain_date ON pages (domain, date, source);
+CREATE INDEX IF NOT EXISTS idx_pages_norm_url ON pages (norm_url);
+CREATE INDEX IF NOT EXISTS idx_pages_location ON pages (location);
+CREATE INDEX IF NOT EXISTS idx_pages_digest ON pages (domain, digest);
+"""
+
+COLUMNS = ['key', 'domain', 'year', 'date', 'source', 'url', 'norm_url',
+           'timestamp', 'location', 'list_key', 'page_offset', 'member_offset', 'cached_at', 'size', 'digest']
+
+# Columns added after the first release, migrated in place on open
+ADDED_COLUMNS = {
+    'member_offset': 'INTEGER',
+    'size': 'INTEGER',
+    'access_count': 'INTEGER DEFAULT 0',
+    'last_access': 'REAL',
+    'digest': 'TEXT'
+}
+
+# Eviction order per policy: least recently used, or least frequently used
+# (ties broken by recency). Pages never read count from when they were cached.
+EVICTION_ORDER = {
+    'lru': 'COALESCE(last_access, cached_at, 0)',
+    'lfu': 'COALESCE(access_count, 0), COALESCE(last_access, cached_at, 0)'
+}
+
+
+class CacheIndex:
+    """
+    SQLite index over everything in cache/: domain -> year -> source -> location.
+
+    `location` is relative to the cache directory. Page store rows point at the
+    page file itself; rows for legacy domain_date_source.json files also carry
+    the list key ('pages'/'urls') and the page's offset inside that list, and
+    rows for compressed packs carry the gzip member offset plus line number.
+    A row is identified by its capture key plus that slot, so the same capture
+    held in several places (legacy files, the page store) keeps a row for each.
+    The index is derived data and can always be rebuilt from the cache.
+
+    Each row also records the page's on-disk size and its access statistics
+    (access_count, last_access), and the `stats` table keeps cache-wide
+    counters (hits, misses, evictions) for the cache budget. `digest` is the
+    hash of the page body; captures with an already stored body point at the
+    first copy's location instead of storing it again. The `negatives` table
+    remembers fetches that came back empty or failed, so they aren't retried
+    until their TTL runs out.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.is_new = not self.db_path.exists()
+        with self._connect() as conn:
+            columns = {row['name']: row for row in conn.execute("PRAGMA table_info(pages)")}
+            if columns and columns['key']['pk']:
+                # Rows used to be keyed by capture alone, so copies of a capture in
+                # different places overwrote each other. Set the old table aside
+                # (its access statistics are carried over by finish_migration())
+                # and have the page store rebuild the index from the cache.
+                for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'pages' "
+                                        "AND name NOT LIKE 'sqlite_autoindex%'").fetchall():
+                    conn.execute(f"DROP INDEX {row['name']}")
+                conn.execute("DROP TABLE IF EXISTS pages_v1")
+                conn.execute("ALTER TABLE pages RENAME TO pages_v1")
+                self.is_new = True
+            else:
+                for column, column_type in ADDED_COLUMNS.items():
+                    if columns and column not in columns:
+                        conn.execute(f"ALTER TABLE pages ADD COLUMN {column} {column_type}")
+            # Tables and indexes added since (all IF NOT EXISTS)
+            conn.executescript(SCHEMA)
+
+    def finish_migration(self) -> None:
+        """After a rebuild, carry access statistics over from a pre-migration table."""
+        with self._connect() as conn:
+            if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'pages_v1'").fetchone():
+                return
+            old_columns = {row['name'] for row in conn.execute("PRAGMA table_info(pages_v1)")}
+            if {'access_count', 'last_access'} <= old_columns:
+                conn.execute(
+                    "UPDATE pages SET "
+                    "access_count = (SELECT MAX(o.access_count) FROM pages_v1 AS o WHERE o.key = pages.key), "
+                    "last_access = (SELECT MAX(o.last_access) FROM pages_v1 AS o WHERE o.key = pages.key) "
+                    "WHERE key IN (SELECT key FROM pages_v1)"
+                )
+            conn.execute("DROP TABLE pages_v1")
+
+    @contextmanager
+    def _connect(self):
+        # Recreate the schema if the database was deleted underneath us (e.g. by forget!)
+        exists = self.db_path.exists()
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        conn.row_factory = sqlite3.Row
+        if not exists:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def add(self, rows: List[Dict]) -> None:
+        """Insert or replace index rows (one per stored copy of a page)."""
+        if not rows:
+            return
+        placeholders = ', '.join('?' for _ in COLUMNS)
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO pages ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                [tuple(row.get(col) for col in COLUMNS) for row in rows]
+            )
+
+    def find(self, domain: str, date: Optional[str] = None, sources: Optional[str] = None,
+             year: Optional[str] = None, norm_url: Optional[str] = None) -> List[Dict]:
+        """Index probe; every filter maps onto an indexed column."""
+        clauses = ['domain = ?']
+        params: List = [domain]
+        if year:
+            clauses.append('year = ?')
+            params.append(year)
+        if date:
+            clauses.append('date = ?')
+            params.append(date)
+        if sources:
+            clauses.append(f"source IN ({', '.join('?' for _ in sources)})")
+            params.extend(sources)
+        if norm_url:
+            clauses.append('norm_url = ?')
+            params.append(norm_url)
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM pages WHERE {' AND '.join(clauses)} ORDER BY rowid",
+                params
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def find_digests(self, domain: str, digests: List[str]) -> Dict[str, Dict]:
+        """First stored row per body digest for `domain`, for the digests already cached."""
+        found = {}
+        with self._connect() as conn:
+            for i in range(0, len(digests), 500):
+                chunk = digests[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT * FROM pages WHERE domain = ? AND digest IN ({', '.join('?' for _ in chunk)}) ORDER BY rowid",
+                    [domain] + chunk
+                ).fetchall()
+                for row in rows:
+                    found.setdefault(row['digest'], dict(row))
+        return found
+
+    def get(self, key: str) -> Optional[Dict]:
+        """The index row for one page key (the most recently cached copy)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM pages WHERE key = ? ORDER BY COALESCE(cached_at, 0) DESC, rowid DESC LIMIT 1",
+                (key,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def existing_keys(self, keys: List[str]) -> set:
+        """Subset of `keys` that are already indexed."""
+        found = set()
+        with self._connect() as conn:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT DISTINCT key FROM pages WHERE key IN ({', '.join('?' for _ in chunk)})",
+                    chunk
+                ).fetchall()
+                found.update(row['key'] for row in rows)
+        return found
+
+    def rows_for_keys(self, keys: List[str]) -> Dict[str, List[Dict]]:
+        """Every row per key in `keys`, most recently cached first."""
+        found = {}
+        with self._connect() as conn:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT * FROM pages WHERE key IN ({', '.join('?' for _ in chunk)}) "
+                    "ORDER BY COALESCE(cached_at, 0) DESC, rowid DESC",
+                    chunk
+                ).fetchall()
+                for row in rows:
+                    found.setdefault(row['key'], []).append(dict(row))
+        return found
+
+    def set_cached_at(self, keys: List[str], cached_at: float) -> None:
+        """Mark every copy of the pages in `keys` as (re)cached at `cached_at`."""
+        with self._connect() as conn:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                conn.execute(
+                    f"UPDATE pages SET cached_at = ? WHERE key IN ({', '.join('?' for _ in chunk)})",
+                    [cached_at] + chunk
+                )
+
+    def remove_rows(self, rows: List[Dict]) -> None:
+        """Delete specific rows, matched by key and storage slot."""
+        with self._connect() as conn:
+            conn.executemany(
+                "DELETE FROM pages WHERE key = ? AND location = ? AND COALESCE(list_key, '') = COALESCE(?, '') "
+                "AND COALESCE(page_offset, -1) = COALESCE(?, -1) AND COALESCE(member_offset, -1) = COALESCE(?, -1)",
+                [(row['key'], row['location'], row.get('list_key'), row.get('page_offset'), row.get('member_offset'))
+                 for row in rows]
+            )
+
+    def record_access(self, keys: List[str]) -> None:
+        """Count a read of each page in `keys` and stamp its last access time."""
+        now = time.time()
+        with self._connect() as conn:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                conn.execute(
+                    f"UPDATE pages SET access_count = COALESCE(access_count, 0) + 1, last_access = ? "
+                    f"WHERE key IN ({', '.join('?' for _ in chunk)})",
+                    [now] + chunk
+                )
+
+    def bump(self, name: str, amount: int = 1) -> None:
+        """Add `amount` to the cache-wide counter `name`."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO stats (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, amount)
+            )
+
+    def counters(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            return {row['name']: row['value'] for row in conn.execute("SELECT name, value FROM stats")}
+
+    def totals(self) -> Tuple[int, int]:
+        """(page count, bytes) across the whole cache."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT COUNT(*) AS pages, COALESCE(SUM(size), 0) AS bytes FROM pages").fetchone()
+        return row['pages'], row['bytes']
+
+    def usage_by_domain(self) -> List[Dict]:
+        """Pages, bytes and reads per domain, largest first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT domain, COUNT(*) AS pages, COALESCE(SUM(size), 0) AS bytes, "
+                "COALESCE(SUM(access_count), 0) AS reads FROM pages GROUP BY domain ORDER BY bytes DESC"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def eviction_candidates(self, policy: str = 'lru') -> List[Dict]:
+        """All rows, coldest first under `policy` ('lru' or 'lfu')."""
+        order = EVICTION_ORDER.get(policy, EVICTION_ORDER['lru'])
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT key, domain, location, member_offset, page_offset, size FROM pages ORDER BY {order}"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def domains(self) -> List[str]:
+        with self._connect() as conn:
+            return [row['domain'] for row in conn.execute("SELECT DISTINCT domain FROM pages ORDER BY domain")]
+
+    def has_location(self, location: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM pages WHERE location = ? LIMIT 1", (location,)).fetchone() is not None
+
+    def remove_locations(self, locations: List[str]) -> None:
+        with self._connect() as conn:
+            for i in range(0, len(locations), 500):
+                chunk = locations[i:i + 500]
+                conn.execute(f"DELETE FROM pages WHERE location IN ({', '.join('?' for _ in chunk)})", chunk)
+
+    def add_negative(self, key: str, domain: str, source: str, reason: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO negatives (key, domain, source, reason, recorded_at) VALUES (?, ?, ?, ?, ?)",
+                (key, domain, source, reason, time.time())
+            )
+
+    def get_negative(self, key: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM negatives WHERE key = ?", (key,)).fetchone()
+        return dict(row) if row else None
+
+    def remove_negatives(self, domain: Optional[str] = None, key: Optional[str] = None,
+                         source: Optional[str] = None) -> None:
+        """Forget negative results by key, for a domain (optionally one source), or all of them."""
+        with self._connect() as conn:
+            if key:
+                conn.execute("DELETE FROM negatives WHERE key = ?", (key,))
+            elif domain and source:
+                conn.execute("DELETE FROM negatives WHERE domain = ? AND source = ?", (domain, source))
+            elif domain:
+                conn.execute("DELETE FROM negatives WHERE domain = ?", (domain,))
+            else:
+                conn.execute("DELETE FROM negatives")
+
+    def count_negatives(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM negatives").fetchone()[0]
+
+    def remove_location(self, location: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM pages WHERE location = ?", (location,))
+
+    def remove_domain(self, domain: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM pages WHERE domain = ?", (domain,))
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM pages")
@@ -0,0 +1,123 @@
+# =====================================
+# PARSED FILE CACHE
+# =====================================
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+import sys
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from config import config
+
+
+def _copy(value: Any) -> Any:
+    """
+    Copy the container layers callers tend to mutate (top-level dict, its
+    lists and the page dicts inside them) so cached objects stay pristine.
+    Strings and other leaves are shared.
+    """
+    if isinstance(value, dict):
+        return {k: _copy(v) if isinstance(v, (dict, list)) else v for k, v in value.items()}
+    if isinstance(value, list):
+        return [dict(v) if isinstance(v, dict) else v for v in value]
+    return value
+
+
+class ParsedFileCache:
+    """
+    Size-bounded LRU of parsed JSON / JSON Lines cache files.
+
+    Entries are keyed by path and validated against the file's mtime and size
+    on every lookup, so a rewritten or appended file is re-parsed while an
+    unchanged one is served from memory. The bound is the total on-disk size
+    of the cached files.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[int, int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load_json(self, path: Path) -> Optional[Any]:
+        """Parsed contents of a JSON file, or None if missing or invalid."""
+        return self._load(Path(path), self._parse_json)
+
+    def load_jsonl(self, path: Path) -> List[Any]:
+        """Parsed lines of a JSON Lines file (torn or invalid lines skipped)."""
+        return self._load(Path(path), self._parse_jsonl) or []
+
+    def invalidate(self, path: Optional[Path] = None) -> None:
+        """Drop one file from memory, or everything."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self.current_bytes = 0
+                return
+            entry = self._entries.pop(str(path), None)
+            if entry:
+                self.current_bytes -= entry[1]
+
+    def _load(self, path: Path, parse) -> Optional[Any]:
+        try:
+            stat = path.stat()
+        except OSError:
+            self.invalidate(path)
+            return None
+
+        key = str(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _copy(entry[2])
+
+        self.misses += 1
+        try:
+            value = parse(path)
+        except (OSError, json.JSONDecodeError, UnicodeDecodeError):
+            self.invalidate(path)
+            return None
+
+        if stat.st_size <= self.max_bytes:
+            with self._lock:
+                old = self._entries.pop(key, None)
+                if old:
+                    self.current_bytes -= old[1]
+                self._entries[key] = (stat.st_mtime_ns, stat.st_size, value)
+                self.current_bytes += stat.st_size
+                while self.current_bytes > self.max_bytes and self._entries:
+                    _, (_, size, _) = self._entries.popitem(last=False)
+                    self.current_bytes -= size
+        return _copy(value)
+
+    @staticmethod
+    def _parse_json(path: Path) -> Any:
+        return json.loads(path.read_text(encoding='utf-8'))
+
+    @staticmethod
+    def _parse_jsonl(path: Path) -> List[Any]:
+        rows = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn final line from an interrupted append
+                    continue
+        return rows
+
+
+# Shared by ContentCache and CacheChecker
+parsed_file_cache = ParsedFileCache(max_bytes=config.CACHE_MEMORY_MAX_BYTES)
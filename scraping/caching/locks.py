@@ -0,0 +1,89 @@
+# =====================================
+# CACHE FILE LOCKS
+# =====================================
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+def _thread_lock(path: Path) -> threading.Lock:
+    with _thread_locks_guard:
+        lock = _thread_locks.get(str(path))
+        if lock is None:
+            lock = _thread_locks[str(path)] = threading.Lock()
+        return lock
+
+
+@contextmanager
+def file_lock(path: Path):
+    """
+    Exclusive lock on `path` for the duration of the block.
+    Serializes threads in this process and, where fcntl is available, other
+    processes via flock on a sibling '<name>.lock' file.
+    """
+    path = Path(path)
+    with _thread_lock(path):
+        if fcntl is None:
+            yield
+            return
+        lock_path = path.with_name(path.name + '.lock')
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Write `text` to a temp file next to `path`, fsync, then rename over `path`."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def append_bytes(path: Path, data: bytes, lines: bool = False) -> int:
+    """
+    Append `data` to `path` and fsync; returns the offset it starts at. A write
+    that fails is truncated away. With lines=True, a torn final line left by an
+    interrupted append is terminated first so `data` starts on a line of its own.
+    Callers hold file_lock(path).
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a+b') as f:
+        start = offset = f.seek(0, os.SEEK_END)
+        if lines and start:
+            f.seek(start - 1)
+            if f.read(1) != b'\n':
+                data = b'\n' + data
+                offset += 1
+        try:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        except BaseException:
+            f.truncate(start)
+            raise
+    return offset
@@ -0,0 +1,638 @@
+# =====================================
+# PAGE STORE
+# =====================================
+import gzip
+import hashlib
+import json
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .cache_index import CacheIndex
+from .locks import append_bytes, atomic_write_text, file_lock
+
+
+def normalize_url(url: str) -> str:
+    """Lowercase a URL and strip protocol, leading www., trailing '?' and '/'."""
+    url = url.strip().lower()
+    if '://' in url:
+        url = url.split('://', 1)[1]
+    if url.startswith('www.'):
+        url = url[4:]
+    return url.rstrip('?').rstrip('/')
+
+
+def extract_domain(url: str) -> str:
+    """Extract the bare domain (no www., no port) from a URL or domain string."""
+    domain = normalize_url(url).split('/', 1)[0]
+    if ':' in domain:
+        domain = domain.split(':', 1)[0]
+    return domain
+
+
+def source_id(source: str) -> str:
+    """Map a source name to the short ID used in cache file names."""
+    return {
+        'firecrawl': 'f',
+        'commoncrawl': 'c',
+        'wayback': 'w',
+        'archived': 'c'
+    }.get((source or '').lower(), 'x')
+
+
+def capture_key(url: str, timestamp: str = '') -> str:
+    """Key for a single capture: sha1 of normalized URL + capture timestamp."""
+    return hashlib.sha1(f"{normalize_url(url)}|{timestamp}".encode('utf-8')).hexdigest()
+
+
+def content_digest(page: Dict) -> str:
+    """sha1 of a page's body: everything except the capture's url and timestamp."""
+    body = {k: v for k, v in page.items() if k not in ('url', 'timestamp')}
+    return hashlib.sha1(json.dumps(body, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+
+
+def capture_year(timestamp: str, date: str = '') -> Optional[str]:
+    """Year of a capture from its timestamp (YYYYMMDD... / YYYY-MM-DD), else from a DDMMYY date."""
+    if len(timestamp) >= 4 and timestamp[:4].isdigit():
+        return timestamp[:4]
+    if len(date) == 6 and date.isdigit():
+        return f"20{date[4:6]}"
+    return None
+
+
+class PageStore:
+    """
+    Content-addressed store for cached pages.
+
+    Every page is written once to cache/pages/<ab>/<key>.json, where key is a
+    hash of the normalized URL plus the capture timestamp. Each domain has an
+    append-only manifest (cache/manifests/<domain>.jsonl) with one line per
+    stored page, so adding pages never rewrites what is already cached and a
+    single page can be read without loading the rest of the domain.
+
+    Lookups go through a SQLite CacheIndex (cache/cache_index.sqlite) that
+    also covers legacy domain_date_source.json files, so finding the pages
+    for a domain/year/source is an index probe rather than a directory scan.
+
+    With `compress=True` new pages are instead appended to gzip-framed JSON
+    Lines packs (cache/packs/<domain>_<date>_<source>.jsonl.gz): each
+    add_pages() call writes one gzip member with one page per line, and the
+    index records the member's byte offset so single pages stay addressable.
+
+    Bodies are deduplicated per domain by content_digest(): a capture whose
+    body is already cached (same page on another date or from another source)
+    is stored as a manifest/index entry pointing at the existing copy.
+
+    With a budget (`max_bytes` and/or `max_pages`, 0 = unlimited) the coldest
+    pages under `eviction_policy` ('lru' or 'lfu', from the access statistics
+    recorded by touch()) are evicted after each write that goes over it.
+    """
+
+    def __init__(self, cache_dir: Path, file_cache: Optional[Any] = None, compress: bool = False,
+                 max_bytes: int = 0, max_pages: int = 0, eviction_policy: str = 'lru'):
+        self.cache_dir = Path(cache_dir)
+        # Optional ParsedFileCache so repeat reads of pages/manifests skip JSON decoding
+        self.file_cache = file_cache
+        self.compress = compress
+        self.max_bytes = max_bytes
+        self.max_pages = max_pages
+        self.eviction_policy = eviction_policy
+        self.pages_dir = self.cache_dir / 'pages'
+        self.manifest_dir = self.cache_dir / 'manifests'
+        self.packs_dir = self.cache_dir / 'packs'
+        self.pages_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_dir.mkdir(parents=True, exist_ok=True)
+        self.packs_dir.mkdir(parents=True, exist_ok=True)
+        self.index = CacheIndex(self.cache_dir / 'cache_index.sqlite')
+        if self.index.is_new:
+            self.rebuild_index()
+
+    def page_key(self, url: str, timestamp: str = '') -> str:
+        """Key for a single capture: sha1 of normalized URL + capture timestamp."""
+        return capture_key(url, timestamp)
+
+    def _page_path(self, key: str, version: Optional[str] = None) -> Path:
+        # Replacement bodies get their own file (see add_pages), named by digest
+        name = f"{key}.{version[:16]}.json" if version else f"{key}.json"
+        return self.pages_dir / key[:2] / name
+
+    def _manifest_path(self, domain: str) -> Path:
+        return self.manifest_dir / f"{extract_domain(domain)}.jsonl"
+
+    def _pack_path(self, domain: str, date: str, sid: str) -> Path:
+        return self.packs_dir / f"{extract_domain(domain)}_{date}_{sid}.jsonl.gz"
+
+    def _entry_location(self, entry: Dict) -> str:
+        """Where a manifest entry's body lives, relative to the cache directory."""
+        return entry.get('location') or self._page_path(entry['key']).relative_to(self.cache_dir).as_posix()
+
+    def _index_row(self, entry: Dict, domain: str, location: Optional[str] = None,
+                   list_key: Optional[str] = None, page_offset: Optional[int] = None) -> Dict:
+        timestamp = entry.get('timestamp', '')
+        if location is None:
+            location = self._entry_location(entry)
+        if page_offset is None:
+            page_offset = entry.get('line')
+        if list_key is None:
+            list_key = entry.get('list_key')
+        return {
+            'key': entry['key'],
+            'domain': extract_domain(domain),
+            'year': capture_year(timestamp, entry.get('date', '')),
+            'date': entry.get('date', ''),
+            'source': entry.get('source', 'x'),
+            'url': entry.get('url', ''),
+            'norm_url': normalize_url(entry.get('url', '')),
+            'timestamp': timestamp,
+            'location': location,
+            'list_key': list_key,
+            'page_offset': page_offset,
+            'member_offset': entry.get('member_offset'),
+            'cached_at': entry.get('cached_at'),
+            'size': entry.get('size'),
+            'digest': entry.get('digest')
+        }
+
+    def add_pages(self, domain: str, pages: List[Dict], source: str, date: str,
+                  replace: bool = False) -> int:
+        """
+        Store `pages` for `domain` and append them to the domain manifest.
+        Captures that are already stored (same URL + timestamp) are skipped,
+        unless `replace` is set (live content, which goes stale): then their
+        cached_at moves forward and, if the body changed, the new body replaces
+        the stored one. Returns the number of newly stored or refreshed pages.
+        """
+        sid = source if len(source) == 1 else source_id(source)
+
+        new_pages = {}
+        for page in pages:
+            url = page.get('url', '')
+            if not url:
+                continue
+            key = self.page_key(url, str(page.get('timestamp', '')))
+            if key not in new_pages:
+                new_pages[key] = page
+
+        # One lock per domain covers the dedup check, page/pack writes, manifest
+        # append and index update, so concurrent scrapers never double-store a
+        # capture or interleave pack members.
+        entries = []
+        with file_lock(self._manifest_path(domain)):
+            digests = {key: content_digest(page) for key, page in new_pages.items()}
+            existing = self.index.existing_keys(list(new_pages))
+            refreshed, replaced_rows = [], []
+            if replace and existing:
+                for key, rows in self.index.rows_for_keys(list(existing)).items():
+                    if rows[0].get('digest') == digests[key]:
+                        # Same body: only the cache time moves forward
+                        refreshed.append(self._refreshed_entry(rows[0]))
+                        del new_pages[key]
+                    else:
+                        # Changed body: stored anew below, old rows dropped once it is indexed
+                        replaced_rows.extend(rows)
+            else:
+                for key in existing:
+                    del new_pages[key]
+            replaced = {row['key'] for row in replaced_rows}
+
+            # Captures whose body is already stored (or appears earlier in this
+            # batch) become references to that copy instead of a second body
+            stored = self.index.find_digests(extract_domain(domain), list(set(digests.values())))
+            references, seen = {}, set(stored)
+            for key in list(new_pages):
+                if digests[key] in seen:
+                    references[key] = digests[key]
+                seen.add(digests[key])
+            ref_pages = {key: new_pages.pop(key) for key in references}
+
+            if self.compress and new_pages:
+                # One gzip member per call, one page per line
+                pack = self._pack_path(domain, date, sid)
+                lines = [json.dumps(page, ensure_ascii=False) for page in new_pages.values()]
+                member = gzip.compress(('\n'.join(lines) + '\n').encode('utf-8'))
+                member_offset = append_bytes(pack, member)
+                location = pack.relative_to(self.cache_dir).as_posix()
+                # Pages share the member's compressed bytes
+                page_size = max(1, len(member) // len(lines))
+                for line, (key, page) in enumerate(new_pages.items()):
+                    entries.append({
+                        'key': key,
+                        'url': page['url'],
+                        'timestamp': str(page.get('timestamp', '')),
+                        'date': date,
+                        'source': sid,
+                        'cached_at': time.time(),
+                        'location': location,
+                        'member_offset': member_offset,
+                        'line': line,
+                        'size': page_size,
+                        'digest': digests[key]
+                    })
+            else:
+                for key, page in new_pages.items():
+                    # A replacement body gets a file of its own: the old one may be
+                    # shared with deduplicated captures
+                    path = self._page_path(key, digests[key] if key in replaced else None)
+                    if path.exists() and key not in replaced:
+                        continue
+                    text = json.dumps(page, ensure_ascii=False)
+                    atomic_write_text(path, text)
+                    entries.append({
+                        'key': key,
+                        'url': page['url'],
+                        'timestamp': str(page.get('timestamp', '')),
+                        'date': date,
+                        'source': sid,
+                        'cached_at': time.time(),
+                        'size': len(text.encode('utf-8')),
+                        'location': path.relative_to(self.cache_dir).as_posix(),
+                        'digest': digests[key]
+                    })
+
+            # References share the original's bytes, so they add no size
+            originals = {entry['digest']: entry for entry in entries}
+            for key, page in ref_pages.items():
+                original = stored.get(references[key]) or originals.get(references[key])
+                if original is None:
+                    continue
+                entries.append({
+                    'key': key,
+                    'url': page['url'],
+                    'timestamp': str(page.get('timestamp', '')),
+                    'date': date,
+                    'source': sid,
+                    'cached_at': time.time(),
+                    'location': original['location'],
+                    'list_key': original.get('list_key'),
+                    'line': original['page_offset'] if 'page_offset' in original else original.get('line'),
+                    'member_offset': original.get('member_offset'),
+                    'size': 0,
+                    'digest': references[key]
+                })
+            if ref_pages:
+                self.index.bump('deduplicated', len(ref_pages))
+
+            if entries or refreshed:
+                # Later manifest entries for a key supersede earlier ones (see rebuild_index)
+                text = ''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries + refreshed)
+                append_bytes(self._manifest_path(domain), text.encode('utf-8'), lines=True)
+                self.index.add([self._index_row(entry, domain) for entry in entries])
+            if refreshed:
+                self.index.set_cached_at([entry['key'] for entry in refreshed], time.time())
+            if replaced_rows:
+                self.index.remove_rows(replaced_rows)
+                # Old page files nothing points at any more (pack members stay in their pack)
+                for location in {row['location'] for row in replaced_rows}:
+                    if location.startswith('pages/') and not self.index.has_location(location):
+                        path = self.cache_dir / location
+                        if path.exists():
+                            path.unlink()
+                        if self.file_cache is not None:
+                            self.file_cache.invalidate(path)
+
+        if entries:
+            self.enforce_budget()
+        return len(entries) + len(refreshed)
+
+    def _refreshed_entry(self, row: Dict) -> Dict:
+        """Manifest entry re-stamping an index row's page as cached now."""
+        return {
+            'key': row['key'],
+            'url': row['url'],
+            'timestamp': row.get('timestamp', ''),
+            'date': row.get('date', ''),
+            'source': row.get('source'),
+            'cached_at': time.time(),
+            'location': row['location'],
+            'list_key': row.get('list_key'),
+            'line': row.get('page_offset'),
+            'member_offset': row.get('member_offset'),
+            'size': row.get('size'),
+            'digest': row.get('digest')
+        }
+
+    def register_legacy_file(self, path: Path) -> int:
+        """
+        (Re)index the pages of a legacy {domain}_{date}_{source}.json file.
+        Returns the number of pages indexed.
+        """
+        path = Path(path)
+        location = path.name
+        self.index.remove_location(location)
+
+        parts = path.stem.split('_')
+        if len(parts) >= 3 and len(parts[-1]) == 1:
+            domain, date, sid = '_'.join(parts[:-2]), parts[-2], parts[-1]
+        elif len(parts) >= 2:
+            domain, date, sid = '_'.join(parts[:-1]), parts[-1], 'x'
+        else:
+            return 0
+
+        try:
+            content = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, json.JSONDecodeError, UnicodeDecodeError):
+            return 0
+        if not isinstance(content, dict):
+            return 0
+
+        rows = []
+        for list_key in ('pages', 'urls'):
+            for offset, page in enumerate(content.get(list_key) or []):
+                if not isinstance(page, dict) or not page.get('url'):
+                    continue
+                timestamp = str(page.get('timestamp', ''))
+                entry = {
+                    'key': self.page_key(page['url'], timestamp),
+                    'url': page['url'],
+                    'timestamp': timestamp,
+                    'date': date,
+                    'source': sid,
+                    'cached_at': path.stat().st_mtime,
+                    'digest': content_digest(page)
+                }
+                rows.append(self._index_row(entry, domain, location, list_key, offset))
+        # Pages share the file's bytes
+        for row in rows:
+            row['size'] = max(1, path.stat().st_size // len(rows))
+        self.index.add(rows)
+        return len(rows)
+
+    def rebuild_index(self) -> None:
+        """Rebuild the SQLite index from manifests and legacy cache files."""
+        self.index.clear()
+        for manifest in self.manifest_dir.glob('*.jsonl'):
+            # The last entry for a key wins: refreshes append a newer one
+            latest = {}
+            for entry in self.iter_manifest(manifest.stem):
+                latest[entry['key']] = entry
+            self.index.add([self._index_row(entry, manifest.stem) for entry in latest.values()])
+        for legacy_file in self.cache_dir.glob('*.json'):
+            self.register_legacy_file(legacy_file)
+        self.index.finish_migration()
+
+    def get_page(self, key: str) -> Optional[Dict]:
+        """Read a single stored page by key."""
+        path = self._page_path(key)
+        if self.file_cache is not None:
+            return self.file_cache.load_json(path)
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text(encoding='utf-8'))
+        except json.JSONDecodeError:
+            return None
+
+    def iter_manifest(self, domain: str) -> Iterator[Dict]:
+        """Yield manifest entries for `domain` in insertion order."""
+        path = self._manifest_path(domain)
+        if self.file_cache is not None:
+            yield from self.file_cache.load_jsonl(path)
+            return
+        if not path.exists():
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from an interrupted append
+                    continue
+
+    def find_entries(self, domain: str, date: Optional[str] = None, sources: Optional[str] = None,
+                     year: Optional[str] = None, url: Optional[str] = None) -> List[Dict]:
+        """
+        Index entries for `domain`.
+        - date:    exact DDMMYY cache date
+        - sources: string of accepted source IDs, e.g. 'cw'
+        - year:    capture year, e.g. '2019'
+        - url:     only captures of this URL (normalized comparison)
+        """
+        return self.index.find(
+            extract_domain(domain),
+            date=date,
+            sources=sources,
+            year=year,
+            norm_url=normalize_url(url) if url else None
+        )
+
+    def _read_member(self, location: str, member_offset: int) -> List[str]:
+        """Decompress the single gzip member at `member_offset` of a pack into its lines."""
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        chunks = []
+        with open(self.cache_dir / location, 'rb') as f:
+            f.seek(member_offset)
+            while not decompressor.eof:
+                data = f.read(64 * 1024)
+                if not data:
+                    break
+                chunks.append(decompressor.decompress(data))
+        return b''.join(chunks).decode('utf-8').splitlines()
+
+    def _read_entry(self, entry: Dict) -> Optional[Dict]:
+        """Read the page an index row points at (page file, pack line or legacy file slot)."""
+        if entry.get('member_offset') is not None:
+            try:
+                lines = self._read_member(entry['location'], entry['member_offset'])
+                return json.loads(lines[entry['page_offset']])
+            except (OSError, zlib.error, IndexError, json.JSONDecodeError):
+                return None
+
+        if entry.get('page_offset') is None:
+            if not entry.get('location'):
+                return self.get_page(entry['key'])
+            path = self.cache_dir / entry['location']
+            if self.file_cache is not None:
+                return self.file_cache.load_json(path)
+            try:
+                return json.loads(path.read_text(encoding='utf-8'))
+            except (OSError, json.JSONDecodeError):
+                return None
+
+        path = self.cache_dir / entry['location']
+        if self.file_cache is not None:
+            content = self.file_cache.load_json(path)
+        else:
+            try:
+                content = json.loads(path.read_text(encoding='utf-8'))
+            except (OSError, json.JSONDecodeError):
+                content = None
+        try:
+            return content[entry['list_key']][entry['page_offset']]
+        except (TypeError, KeyError, IndexError):
+            return None
+
+    def iter_pages(self, entries: List[Dict]) -> Iterator[Dict]:
+        """
+        Lazily yield the pages for `entries`, decoding one page (or one pack
+        member) at a time so callers can start before the domain is decoded.
+        """
+        member_key, member_lines = None, []
+        for entry in entries:
+            if entry.get('member_offset') is not None:
+                key = (entry['location'], entry['member_offset'])
+                if key != member_key:
+                    try:
+                        member_lines = self._read_member(*key)
+                    except (OSError, zlib.error):
+                        member_lines = []
+                    member_key = key
+                try:
+                    page = json.loads(member_lines[entry['page_offset']])
+                except (IndexError, json.JSONDecodeError):
+                    page = None
+            else:
+                page = self._read_entry(entry)
+            if page is None:
+                continue
+            # Deduplicated captures read the shared body; restore their own identity
+            if page.get('url') != entry.get('url') or str(page.get('timestamp', '')) != entry.get('timestamp', ''):
+                page = dict(page, url=entry['url'], timestamp=entry.get('timestamp', ''))
+            yield page
+
+    def load_page(self, key: str) -> Optional[Dict]:
+        """Read one cached capture by page key, wherever it is stored."""
+        entry = self.index.get(key)
+        if not entry:
+            return None
+        return next(self.iter_pages([entry]), None)
+
+    def unique_entries(self, entries: List[Dict]) -> List[Dict]:
+        """First entry per body digest, so callers process each distinct body once."""
+        seen = set()
+        unique = []
+        for entry in entries:
+            digest = entry.get('digest')
+            if digest:
+                if digest in seen:
+                    continue
+                seen.add(digest)
+            unique.append(entry)
+        return unique
+
+    def load_pages(self, entries: List[Dict], stream: bool = False) -> Optional[Dict]:
+        """
+        Assemble the standard {'pages': [...], 'metadata': {...}} dict for index entries.
+        With stream=True, 'pages' is a generator over iter_pages() instead of a list;
+        metadata 'total_pages' then counts the pages yielded so far (final once the
+        generator is exhausted, as unreadable pages are skipped) and 'total_entries'
+        is the number of captures requested.
+        """
+        if not entries:
+            return None
+        first = entries[0]
+        metadata = {
+            'domain': extract_domain(first.get('url', '')),
+            'date': first.get('date', ''),
+            'source': {'f': 'firecrawl', 'c': 'commoncrawl', 'w': 'wayback'}.get(first.get('source'), ''),
+            'total_pages': 0
+        }
+        if stream:
+            def counted():
+                for page in self.iter_pages(entries):
+                    metadata['total_pages'] += 1
+                    yield page
+            pages = counted()
+            metadata['total_entries'] = len(entries)
+        else:
+            pages = list(self.iter_pages(entries))
+            if not pages:
+                return None
+            metadata['total_pages'] = len(pages)
+
+        return {
+            'pages': pages,
+            'metadata': metadata
+        }
+
+    def touch(self, entries: List[Dict]) -> None:
+        """Record a cache hit on `entries` for the eviction policy and cache stats."""
+        if not entries:
+            return
+        self.index.record_access([entry['key'] for entry in entries])
+        self.index.bump('hits')
+
+    def _over_budget(self, pages: int, size: int, ratio: float = 1.0) -> bool:
+        return bool((self.max_bytes and size > self.max_bytes * ratio) or
+                    (self.max_pages and pages > self.max_pages * ratio))
+
+    def enforce_budget(self) -> int:
+        """
+        If the cache is over budget, evict the coldest pages until it is back
+        under 90% of it (so every write doesn't trigger another eviction).
+        Pages inside a pack or legacy file are evicted with the whole file.
+        Returns the number of pages evicted.
+        """
+        if not self.max_bytes and not self.max_pages:
+            return 0
+        if not self._over_budget(*self.index.totals()):
+            return 0
+
+        with file_lock(self.cache_dir / 'eviction'):
+            pages, size = self.index.totals()
+            candidates = self.index.eviction_candidates(self.eviction_policy)
+            rows_by_location = {}
+            for row in candidates:
+                rows_by_location.setdefault(row['location'], []).append(row)
+
+            # location -> rows, coldest first, until under the low-water mark
+            victims = {}
+            for row in candidates:
+                if not self._over_budget(pages, size, 0.9):
+                    break
+                if row['location'] in victims:
+                    continue
+                victims[row['location']] = rows_by_location[row['location']]
+                pages -= len(victims[row['location']])
+                size -= sum(r['size'] or 0 for r in victims[row['location']])
+
+            by_domain = {}
+            for location, rows in victims.items():
+                by_domain.setdefault(rows[0]['domain'], {})[location] = rows
+
+            evicted, freed = 0, 0
+            for domain, locations in by_domain.items():
+                # Same lock as add_pages, so a capture can't be re-added mid-eviction
+                with file_lock(self._manifest_path(domain)):
+                    for location, rows in locations.items():
+                        path = self.cache_dir / location
+                        if path.exists():
+                            path.unlink()
+                        if self.file_cache is not None:
+                            self.file_cache.invalidate(path)
+                        freed += sum(row['size'] or 0 for row in rows)
+                        evicted += len(rows)
+                    # By location: copies of the same captures stored elsewhere stay indexed
+                    self.index.remove_locations(list(locations))
+
+                    manifest = self._manifest_path(domain)
+                    if manifest.exists():
+                        kept = [e for e in self.iter_manifest(domain) if self._entry_location(e) not in locations]
+                        atomic_write_text(manifest, ''.join(json.dumps(e, ensure_ascii=False) + '\n' for e in kept))
+
+            if evicted:
+                self.index.bump('evictions', evicted)
+                self.index.bump('evicted_bytes', freed)
+            return evicted
+
+    def clear(self, domain: Optional[str] = None) -> None:
+        """Remove stored pages for `domain`, or the whole store."""
+        if domain:
+            for entry in self.iter_manifest(domain):
+                path = self.cache_dir / entry['location'] if entry.get('location') else self._page_path(entry['key'])
+                if path.exists():
+                    path.unlink()
+            manifest = self._manifest_path(domain)
+            if manifest.exists():
+                manifest.unlink()
+            self.index.remove_domain(extract_domain(domain))
+            return
+
+        for directory in (self.pages_dir, self.manifest_dir, self.packs_dir):
+            for path in directory.rglob('*'):
+                if path.is_file():
+                    path.unlink()
+        self.index.clear()
@@ -5,15 +5,11 @@ import json
 import os
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
-import hashlib
+from typing import Dict, Iterator, List, Optional
 import traceback
 import sys
+import time
 
-from whoosh import index
-from whoosh.fields import Schema, TEXT, ID, STORED
-from whoosh.writing import AsyncWriter
-from whoosh.analysis import StandardAnalyzer
 from urllib.parse import urlparse
 
 # Add project root to path
@@ -22,23 +18,36 @@ sys.path.append(str(project_root))
 
 # Use absolute imports from project root
 from config import config
-from indexing.scraping_indexing.scraping_indexer import ScrapingIndexer
+from indexing.scraping_indexing.scraping_indexer import scraping_indexer
+from utils.logging_config import debug_logger, progress_logger
+from .page_store import PageStore, extract_domain, normalize_url, source_id
+from .file_cache import parsed_file_cache
 
 class ContentCache:
+    """
+    The single cache engine for scraped content.
+
+    Every write path (save_content, cache_content, cache_and_index) goes
+    through _store(), which canonicalizes the URL with page_store.normalize_url
+    and files pages in the PageStore under one key scheme (URL + capture
+    timestamp). Lookups go through check_existing_content() / get_cached_content().
+    CacheChecker is a thin facade over this class.
+    """
+
     def __init__(self):
         # IMPORTANT: Always use project root for cache directory
         self.cache_dir = project_root / "cache"
         self.SITE_INDEX_DIR = project_root / "indexing" / "scraping_indexing"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.SITE_INDEX_DIR.mkdir(parents=True, exist_ok=True)
-        self.analyzer = StandardAnalyzer()
-
-    def _get_cache_key(self, domain: str, year: Optional[str] = None) -> str:
-        """Generate a unique cache key for the domain + optional year."""
-        key = domain.replace('/', '_').replace(':', '_')
-        if year:
-            key = f"{year}_{key}"
-        return hashlib.md5(key.encode()).hexdigest()
+        self.page_store = PageStore(
+            self.cache_dir,
+            file_cache=parsed_file_cache,
+            compress=config.CACHE_COMPRESS,
+            max_bytes=config.CACHE_MAX_BYTES,
+            max_pages=config.CACHE_MAX_PAGES,
+            eviction_policy=config.CACHE_EVICTION_POLICY
+        )
 
     async def get_content(self, target: str, is_historic: bool = False, is_domain_level: bool = False) -> Optional[Dict]:
         """
@@ -53,7 +62,7 @@ class ContentCache:
                 year, clean_target = target.split(':', 1)
 
             # Check cache first
-            cached_content = self.get_from_cache(clean_target, year)
+            cached_content = self.check_existing_content(clean_target, year=year, is_historic=is_historic)
             if cached_content:
                 return cached_content
 
@@ -69,16 +78,7 @@ class ContentCache:
 
             # If we got any content, store it + index
             if content:
-                # Here, `date` can be the final 6 digits of the year if we want,
-                # but we can also just pass the current date if that suits.
-                # We'll pass year if we have it; otherwise today's date.
-                date_str = datetime.now().strftime('%d%m%y')
-                if year and len(year) >= 6:  
-                    date_str = year[-6:]
-
-                self.save_content(clean_target, content, date_str)
-                indexer = ScrapingIndexer(str(self.SITE_INDEX_DIR))
-                indexer.index_content(content, clean_target)
+                self.cache_and_index(clean_target, content)
                 return content
 
             return None
@@ -88,181 +88,181 @@ class ContentCache:
             traceback.print_exc()
             return None
 
-    def save_content(self, url: str, content: Dict, date: str) -> None:
+    def _capture_date(self, page: Dict, sid: str, fallback: str) -> str:
+        """DDMMYY cache date for a page: archive captures use their own timestamp."""
+        ts = str(page.get('timestamp', ''))
+        if sid in 'cw' and len(ts) >= 8 and ts[:8].isdigit():
+            # typical CommonCrawl/Wayback format: YYYYMMDDHHMMSS => DDMMYY
+            return f"{ts[6:8]}{ts[4:6]}{ts[2:4]}"
+        return fallback
+
+    def _store(self, url: str, content: Dict, source: Optional[str] = None, date: Optional[str] = None) -> int:
         """
-        Saves content to a single domain_date_source file 
-        (unless source is 'commoncrawl' or 'archived', in which case 
-         individual timestamp-based files might be created via cache_content()).
+        The one write/merge path. Files the pages of `content` in the page store
+        under the canonical domain of `url`, grouped by cache date:
+        archive captures by their own timestamp, everything else by `date`,
+        the content's metadata date, or today. Returns the number of new (or,
+        for content that goes stale, refreshed) pages.
         """
+        domain = extract_domain(url.strip('?'))
+        metadata = content.get('metadata', {})
+        sid = source_id(source or metadata.get('source', ''))
+        fallback = date or metadata.get('date') or datetime.now().strftime('%d%m%y')
+
+        source_name = {'f': 'firecrawl', 'c': 'commoncrawl', 'w': 'wayback'}.get(sid)
+        # Content that can go stale replaces its earlier copy, restarting its freshness window
+        replace = config.CACHE_MAX_AGE.get(source_name) is not None
+
+        pages_by_date = {}
+        for page in content.get('pages', []) or content.get('urls', []):
+            pages_by_date.setdefault(self._capture_date(page, sid, fallback), []).append(page)
+
+        added = 0
+        for page_date, pages in pages_by_date.items():
+            count = self.page_store.add_pages(domain, pages, sid, page_date, replace=replace)
+            debug_logger.debug(f"Cached {count} new pages for {domain} [{page_date}] ({sid})")
+            added += count
+        if added:
+            # The source has content for this domain now; stop answering "nothing there"
+            self.page_store.index.remove_negatives(domain=domain, source=source_name)
+        return added
+
+    def _negative_key(self, source: str, url: str, year: Optional[str], is_domain_wide: bool) -> str:
+        scope = 'domain' if is_domain_wide else 'page'
+        return f"{source}|{scope}|{normalize_url(url)}|{year or ''}"
+
+    def record_miss(self, source: str, url: str, year: Optional[str] = None,
+                    is_domain_wide: bool = False, reason: str = 'empty') -> None:
+        """Remember that `source` returned nothing ('empty') or failed ('error') for url/year."""
         try:
-            domain = self._extract_domain(url)
-            source = content.get('metadata', {}).get('source', '').lower()
-            # Map recognized sources to a short ID
-            source_id = {
-                'wayback': 'w',
-                'commoncrawl': 'c',
-                'firecrawl': 'f'
-            }.get(source, 'x')  # fallback 'x'
-
-            # We do a quick merge with existing if file is found
-            cache_file = self.cache_dir / f"{domain}_{date}_{source_id}.json"
-
-            if cache_file.exists():
-                try:
-                    existing_content = json.loads(cache_file.read_text())
-                    if 'pages' in content and 'pages' in existing_content:
-                        existing_urls = {p.get('url', '') for p in existing_content['pages']}
-                        for p in content['pages']:
-                            if p.get('url', '') not in existing_urls:
-                                existing_content['pages'].append(p)
-                                existing_urls.add(p['url'])
-                        content = existing_content
-                except json.JSONDecodeError:
-                    print(f"Warning: could not read existing file {cache_file}, overwriting...")
-
-            # Reorder so metadata is always last
-            ordered_content = {}
-            for key in content:
-                if key != 'metadata':
-                    ordered_content[key] = content[key]
-            if 'metadata' in content:
-                ordered_content['metadata'] = content['metadata']
-
-            # Save
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(ordered_content, f, ensure_ascii=False, indent=4)
-
-            print(f"Cached content for {domain} [{date}] ({source_id})")
+            self.page_store.index.add_negative(
+                self._negative_key(source, url, year, is_domain_wide),
+                extract_domain(url), source, reason
+            )
+            debug_logger.debug(f"Recorded negative result ({reason}) for {source}: {url} {year or ''}")
+        except Exception as e:
+            debug_logger.error(f"Error recording negative result: {str(e)}")
 
+    def is_known_miss(self, source: str, url: str, year: Optional[str] = None,
+                      is_domain_wide: bool = False) -> bool:
+        """True if `source` recently had nothing for url/year (within the negative TTL)."""
+        try:
+            key = self._negative_key(source, url, year, is_domain_wide)
+            negative = self.page_store.index.get_negative(key)
+            if not negative:
+                return False
+            ttl = config.CACHE_NEGATIVE_ERROR_TTL if negative['reason'] == 'error' else config.CACHE_NEGATIVE_TTL.get(source, 0)
+            if time.time() - (negative['recorded_at'] or 0) > ttl:
+                self.page_store.index.remove_negatives(key=key)
+                return False
+            self.page_store.index.bump('negative_hits')
+            return True
+        except Exception as e:
+            debug_logger.error(f"Error checking negative cache: {str(e)}")
+            return False
+
+    def save_content(self, url: str, content: Dict, date: str) -> None:
+        """Save content's pages under `date` (archive captures under their own date)."""
+        try:
+            self._store(url, content, date=date)
         except Exception as e:
             print(f"Error saving to cache: {str(e)}")
             traceback.print_exc()
 
     def cache_content(self, domain: str, content: Dict, source: str, year: Optional[str] = None, filename: Optional[str] = None) -> None:
         """
-        Main entry point for explicitly caching content. 
-        - If `source` is 'commoncrawl' or 'archived', we group pages by each record's timestamp date.
-        - Otherwise, we put them in a single file.
+        Cache content from `source`. `year` and `filename` are accepted for
+        backwards compatibility; the page store decides where pages live.
         """
         try:
-            # Ensure we're using the correct cache directory
-            if not self.cache_dir.exists():
-                self.cache_dir.mkdir(parents=True, exist_ok=True)
-                print(f"Created cache directory at: {self.cache_dir}")
-
-            domain = domain.strip('?').strip().lower()
-
-            if source.lower() in ['commoncrawl', 'archived'] and 'pages' in content:
-                # Group by each page's 'timestamp' => domain_DDMMYY_c.json
-                pages_by_date = {}
-                for page in content['pages']:
-                    ts = page.get('timestamp', '')
-                    if len(ts) >= 8:  
-                        # typical CommonCrawl format: YYYYMMDDHHMMSS
-                        # we only need DDMMYY
-                        dd = ts[6:8]
-                        mm = ts[4:6]
-                        yy = ts[2:4]
-                        archive_date = f"{dd}{mm}{yy}"
-                    else:
-                        # fallback to today's date if none
-                        archive_date = datetime.now().strftime('%d%m%y')
-
-                    if archive_date not in pages_by_date:
-                        pages_by_date[archive_date] = []
-                    pages_by_date[archive_date].append(page)
-
-                # Write each date's pages to a separate file
-                for arch_date, pages_list in pages_by_date.items():
-                    cfile = self.cache_dir / f"{domain}_{arch_date}_c.json"
-                    merged_content = {'pages': pages_list}
-
-                    if cfile.exists():
-                        try:
-                            existing_data = json.loads(cfile.read_text())
-                            if 'pages' in existing_data:
-                                existing_urls = {pg.get('url', '') for pg in existing_data['pages']}
-                                for pg in pages_list:
-                                    if pg.get('url', '') not in existing_urls:
-                                        existing_data['pages'].append(pg)
-                                        existing_urls.add(pg['url'])
-                            merged_content = existing_data
-                        except json.JSONDecodeError:
-                            print(f"Warning: could not parse {cfile}, overwriting...")
-
-                    # Add/update metadata
-                    if 'metadata' not in merged_content:
-                        merged_content['metadata'] = {}
-                    merged_content['metadata']['domain'] = domain
-                    merged_content['metadata']['date'] = arch_date
-                    merged_content['metadata']['source'] = source
-                    merged_content['metadata']['total_pages'] = len(merged_content.get('pages', []))
-
-                    # Save
-                    with open(cfile, 'w') as out_f:
-                        json.dump(merged_content, out_f, indent=2)
-                    
-                    print(f"Cached {len(pages_list)} pages for {domain} [{arch_date}] (c)")
+            self._store(domain, content, source=source)
+        except Exception as e:
+            print(f"Error caching content: {str(e)}")
+            traceback.print_exc()
 
+    def cache_and_index(self, url: str, content: Dict) -> None:
+        """Cache content and add it to the scraping index."""
+        try:
+            added = self._store(url, content)
+            scraping_indexer.index_content(content)
+            progress_logger.info(f"Cached and indexed {added} new pages for {extract_domain(url)}")
+        except Exception as e:
+            debug_logger.error(f"Error caching content: {str(e)}", exc_info=True)
+
+    def _latest_captures(self, entries: List[Dict]) -> List[Dict]:
+        """Keep only the most recently cached entry per URL (insertion order preserved)."""
+        latest = {}
+        for entry in entries:
+            norm = entry.get('norm_url') or normalize_url(entry.get('url', ''))
+            if norm not in latest or (entry.get('cached_at') or 0) >= (latest[norm].get('cached_at') or 0):
+                latest[norm] = entry
+        return [e for e in entries if latest.get(e.get('norm_url') or normalize_url(e.get('url', ''))) is e]
+
+    def _freshness(self, entries: List[Dict], source: str) -> Optional[str]:
+        """
+        'fresh', 'stale' (still servable while a refresh runs) or None (expired)
+        for a set of cached entries, judged by their most recent cache time.
+        """
+        max_age = config.CACHE_MAX_AGE.get(source)
+        if max_age is None:
+            return 'fresh'
+        age = time.time() - max((e.get('cached_at') or 0) for e in entries)
+        if age <= max_age:
+            return 'fresh'
+        if age <= max_age + config.CACHE_STALE_WHILE_REVALIDATE:
+            return 'stale'
+        return None
+
+    def check_existing_content(self, url: str, year: Optional[str] = None, 
+                               is_historic: bool = False, is_single_page: bool = False,
+                               stream: bool = False) -> Optional[Dict]:
+        """
+        Check if content exists in cache. For current content, year should be None.
+        Current content carries metadata['freshness'] ('fresh' or 'stale') per
+        config.CACHE_MAX_AGE; expired content is reported as a miss.
+        With stream=True the returned 'pages' is a generator that decodes pages lazily.
+        """
+        try:
+            clean_url = normalize_url(url)
+            domain = extract_domain(clean_url)
+
+            if is_historic and year:
+                debug_logger.debug(f"Checking historic cache for {domain} year {year}")
+                # Single index probe covering page store and legacy domain_*_[cw].json files
+                entries = self.page_store.find_entries(
+                    domain, sources='cw', year=year,
+                    url=clean_url if is_single_page else None
+                )
+                if entries:
+                    debug_logger.debug(f"Found {len(entries)} matching pages in cache")
+                    self.page_store.touch(entries)
+                    return self.page_store.load_pages(entries, stream=stream)
             else:
-                # Single-file approach for firecrawl, wayback, or unknown
-                if not filename:
-                    date = datetime.now().strftime('%d%m%y')
-                    source_id = {
-                        'firecrawl': 'f',
-                        'wayback': 'w',
-                        'commoncrawl': 'c'
-                    }.get(source.lower(), 'x')
-                    filename = f"{domain}_{date}_{source_id}.json"
-
-                cfile = self.cache_dir / filename
-
-                # Attempt to merge with existing
-                if cfile.exists():
-                    try:
-                        existing_data = json.loads(cfile.read_text())
-                        # Merge URLs if present
-                        if 'urls' in content and 'urls' in existing_data:
-                            existing_urls = {u.get('url', '') for u in existing_data['urls']}
-                            for u in content['urls']:
-                                if u.get('url', '') not in existing_urls:
-                                    existing_data['urls'].append(u)
-                                    existing_urls.add(u['url'])
-                        # Merge pages if present
-                        if 'pages' in content and 'pages' in existing_data:
-                            existing_pages = {p.get('url', '') for p in existing_data['pages']}
-                            for p in content['pages']:
-                                if p.get('url', '') not in existing_pages:
-                                    existing_data['pages'].append(p)
-                                    existing_pages.add(p['url'])
-                        # Combine everything except metadata
-                        for key in content:
-                            if key not in ['metadata', 'urls', 'pages']:
-                                existing_data[key] = content[key]
-                        content = existing_data
-
-                    except json.JSONDecodeError:
-                        print(f"Warning: reading existing file {filename} failed, overwriting...")
-
-                # Ensure metadata
-                if 'metadata' not in content:
-                    content['metadata'] = {
-                        'domain': domain,
-                        'date': datetime.now().strftime('%d%m%y'),
-                        'source': source,
-                        'is_historic': source in ['commoncrawl', 'wayback'],
-                        'is_domain_wide': False
-                    }
-                    if year:
-                        content['metadata']['year'] = year
-
-                with open(cfile, 'w') as out_f:
-                    json.dump(content, out_f, indent=2)
-                print(f"Cached content to {filename}")
+                # Current (non-historic) content: latest capture of each URL, any date,
+                # subject to the freshness policy
+                entries = self._latest_captures(self.page_store.find_entries(domain, sources='f'))
+                if is_single_page and not any(normalize_url(e.get('url', '')) == clean_url for e in entries):
+                    entries = []
+                if entries:
+                    freshness = self._freshness(entries, 'firecrawl')
+                    if freshness is None:
+                        debug_logger.debug("Cached content is past its freshness window")
+                        self.page_store.index.bump('misses')
+                        return None
+                    debug_logger.debug(f"Using {freshness} cached content")
+                    self.page_store.touch(entries)
+                    content = self.page_store.load_pages(entries, stream=stream)
+                    if content:
+                        content['metadata']['freshness'] = freshness
+                    return content
+
+            debug_logger.debug("No matching content found in cache")
+            self.page_store.index.bump('misses')
+            return None
 
         except Exception as e:
-            print(f"Error caching content: {str(e)}")
-            traceback.print_exc()
+            debug_logger.error(f"Error checking cache: {str(e)}", exc_info=True)
+            return None
 
     def get_cached_content(self, domain: str, year: Optional[str] = None) -> Optional[Dict]:
         """Get content from cache if it exists."""
@@ -270,67 +270,70 @@ class ContentCache:
             print(f"\nDEBUG: Looking for cached content:")
             print(f"- Domain: {domain}")
             print(f"- Year: {year}")
-            print(f"- Cache directory: {self.cache_dir}")
-            print(f"- Cache directory exists: {self.cache_dir.exists()}")
-            
-            if self.cache_dir.exists():
-                print("\nFiles in cache directory:")
-                for f in self.cache_dir.glob('*.json'):
-                    print(f"  - {f.name}")
-            
-            # Try to find exact file first
-            if year:
-                pattern = f"{domain}_{year}_*.json"
-            else:
-                pattern = f"{domain}_*.json"
-            
-            print(f"\nSearching for pattern: {pattern}")
-            matches = list(self.cache_dir.glob(pattern))
-            print(f"Found {len(matches)} matching files:")
-            for m in matches:
-                print(f"  - {m.name}")
-            
-            if matches:
-                # Try each matching file
-                for match in matches:
-                    try:
-                        with open(match, 'r') as f:
-                            content = json.load(f)
-                        # Normalize any 'pages' if needed
-                        if 'pages' in content:
-                            for page in content['pages']:
-                                if 'url' in page:
-                                    page['url'] = self._normalize_url(page['url'])
-                        return content
-                    except json.JSONDecodeError:
-                        continue
-            else:
-                # No matches found with pattern, try fallback with today's date
-                date_str = datetime.now().strftime('%d%m%y')
-                fallback_file = self.cache_dir / f"{domain}_{date_str}.json"
-                print(f"\nTrying fallback file: {fallback_file}")
-                
-                if fallback_file.exists():
-                    try:
-                        with open(fallback_file, 'r') as f:
-                            content = json.load(f)
-                        # Normalize any 'pages' if needed
-                        if 'pages' in content:
-                            for page in content['pages']:
-                                if 'url' in page:
-                                    page['url'] = self._normalize_url(page['url'])
-                        return content
-                    except json.JSONDecodeError:
-                        print("Error reading fallback file")
-
-            print("No valid cache files found")
-            return None
+
+            # Index probe covers the page store and legacy domain_date_source.json files
+            entries = self.page_store.find_entries(domain, date=year)
+            print(f"Found {len(entries)} cached pages")
+            content = self.page_store.load_pages(entries) if entries else None
+            if not content:
+                print("No valid cache files found")
+                return None
+
+            # Normalize page URLs for callers
+            for page in content['pages']:
+                if 'url' in page:
+                    page['url'] = normalize_url(page['url'])
+            return content
             
         except Exception as e:
             print(f"Error getting cache: {str(e)}")
             traceback.print_exc()
             return None
 
+    def cache_stats(self) -> str:
+        """Formatted cache report: hit rate, budget usage, bytes per domain and evictions."""
+        counters = self.page_store.index.counters()
+        hits, misses = counters.get('hits', 0), counters.get('misses', 0)
+        pages, size = self.page_store.index.totals()
+        hit_rate = f"{hits / (hits + misses):.1%}" if hits + misses else "n/a"
+
+        def fmt_bytes(n: int) -> str:
+            for unit in ('B', 'KB', 'MB', 'GB'):
+                if n < 1024 or unit == 'GB':
+                    return f"{n:.1f} {unit}" if unit != 'B' else f"{n} B"
+                n /= 1024
+
+        budget = []
+        if self.page_store.max_bytes:
+            budget.append(fmt_bytes(self.page_store.max_bytes))
+        if self.page_store.max_pages:
+            budget.append(f"{self.page_store.max_pages} pages")
+
+        lines = [
+            "=== Cache Stats ===",
+            f"Hit rate:      {hit_rate} ({hits} hits, {misses} misses)",
+            f"Stored:        {pages} pages, {fmt_bytes(size)}",
+            f"Budget:        {' / '.join(budget) if budget else 'unlimited'} ({self.page_store.eviction_policy})",
+            f"Evictions:     {counters.get('evictions', 0)} pages, {fmt_bytes(counters.get('evicted_bytes', 0))}",
+            f"Deduplicated:  {counters.get('deduplicated', 0)} captures stored as references",
+            f"Negative:      {self.page_store.index.count_negatives()} entries, "
+            f"{counters.get('negative_hits', 0)} fetches skipped",
+            f"Memory cache:  {parsed_file_cache.hits} hits, {parsed_file_cache.misses} misses, "
+            f"{fmt_bytes(parsed_file_cache.current_bytes)}",
+            "",
+            "Per domain:"
+        ]
+        usage = self.page_store.index.usage_by_domain()
+        for row in usage:
+            lines.append(f"  {row['domain']:<40} {row['pages']:>6} pages  {fmt_bytes(row['bytes']):>10}  {row['reads']:>6} reads")
+        if not usage:
+            lines.append("  (empty)")
+        return "\n".join(lines)
+
+    def iter_cached_pages(self, domain: str, year: Optional[str] = None) -> Iterator[Dict]:
+        """Stream cached pages for `domain` (optionally one DDMMYY date) without loading them all."""
+        yield from self.page_store.iter_pages(self.page_store.find_entries(domain, date=year))
+
     def clear_cache(self, url: Optional[str] = None) -> None:
         """
         Clears all .json cache files, or just the single file for `url` if specified.
@@ -338,13 +341,15 @@ class ContentCache:
         try:
             if url:
                 # Attempt domain-based match
-                domain = self._extract_domain(url)
+                domain = extract_domain(url)
                 for cf in self.cache_dir.glob(f"{domain}_*.json"):
                     cf.unlink()
+                self.page_store.clear(domain)
                 print(f"Cleared cache for domain: {domain}")
             else:
                 for cache_file in self.cache_dir.glob("*.json"):
                     cache_file.unlink()
+                self.page_store.clear()
                 print("Cleared all cache")
         except Exception as e:
             print(f"Error clearing cache: {str(e)}")
@@ -376,9 +381,13 @@ class ContentCache:
 
         for hit in results:
             # Add URL
+            raw_text = hit.get('raw_text')
+            if raw_text is None and hit.get('doc_key'):
+                # Index built without stored bodies: read it from the cache
+                raw_text = (self.page_store.load_page(hit['doc_key']) or {}).get('raw_text', '')
             content_out['urls'].append({
                 'url': hit['url'],
-                'raw_text': hit.get('raw_text', ''),
+                'raw_text': raw_text or '',
                 'timestamp': hit.get('timestamp', '')
             })
             # Merge any known entity fields
@@ -400,96 +409,10 @@ class ContentCache:
         return content_out
 
     def index_cached_content(self, content: Dict) -> bool:
-        """Index cached content in Whoosh for search."""
-        try:
-            if not content or not content.get('urls'):
-                return False
-
-            # Build the schema if it doesn't exist
-            if not index.exists_in(str(self.SITE_INDEX_DIR)):
-                schema = Schema(
-                    url=ID(stored=True),
-                    domain=ID(stored=True),
-                    content=TEXT(stored=True, analyzer=self.analyzer),
-                    raw_text=TEXT(stored=True, analyzer=self.analyzer),
-                    timestamp=ID(stored=True),
-                    title=TEXT(stored=True),
-                    metadata=STORED,
-                    entities_person=TEXT(stored=True),
-                    entities_company=TEXT(stored=True),
-                    entities_email=TEXT(stored=True),
-                    entities_phone=TEXT(stored=True),
-                    entities_location=TEXT(stored=True),
-                    outlinks=TEXT(stored=True),
-                    backlinks=TEXT(stored=True)
-                )
-                index.create_in(str(self.SITE_INDEX_DIR), schema)
-
-            ix = index.open_dir(str(self.SITE_INDEX_DIR))
-            writer = AsyncWriter(ix)
-
-            for u in content['urls']:
-                ts = u.get('timestamp', datetime.now().isoformat())
-                if isinstance(ts, datetime):
-                    ts = ts.isoformat()
-                # Domain
-                domain = urlparse(u['url']).netloc if 'url' in u else ''
-                # Entities
-                e = u.get('entities', content.get('entities', {}))
-                # Links
-                links = u.get('links', content.get('links', {}))
-
-                writer.add_document(
-                    url=u['url'],
-                    domain=domain,
-                    content=u.get('content', ''),
-                    raw_text=u.get('raw_text', ''),
-                    timestamp=ts,
-                    title=u.get('title', ''),
-                    metadata=json.dumps({
-                        'timestamp': ts,
-                        'source': content.get('source', 'website')
-                    }),
-                    entities_person=','.join(e.get('person', [])),
-                    entities_company=','.join(e.get('company', [])),
-                    entities_email=','.join(e.get('email', [])),
-                    entities_phone=','.join(e.get('phone', [])),
-                    entities_location=','.join(e.get('location', [])),
-                    outlinks=','.join(links.get('outlinks', [])),
-                    backlinks=','.join(links.get('backlinks', []))
-                )
-
-            writer.commit()
-            print(f"Successfully indexed {len(content['urls'])} pages")
-            return True
-
-        except Exception as e:
-            print(f"Error indexing cached content: {str(e)}")
-            traceback.print_exc()
+        """Index cached content for search (via the shared indexing queue, on the configured backend)."""
+        if not content or not content.get('urls'):
             return False
-
-    def _normalize_url(self, url: str) -> str:
-        """Remove http://, https://, and www. from URLs and lowercase them."""
-        url = url.lower()
-        url = url.replace('https://', '').replace('http://', '').replace('www.', '')
-        return url
-
-    def _extract_domain(self, url: str) -> str:
-        """Extract base domain from a URL or domain string."""
-        if '://' in url:
-            url = url.split('://', 1)[1]
-        domain = url.split('/', 1)[0]
-        # Remove www. and any port numbers
-        domain = domain.replace('www.', '')
-        if ':' in domain:
-            domain = domain.split(':', 1)[0]
-        return domain
-
-    def _get_cache_path(self, url: str) -> Path:
-        """Utility if you want a direct path for a domain_date.json file (not always used)."""
-        domain = self._extract_domain(url)
-        date_str = datetime.now().strftime('%d%m%y')
-        return self.cache_dir / f"{domain}_{date_str}.json"
+        return scraping_indexer.index_content(content)
 
     def _list_cached_sites(self):
         """List all .json files in the cache directory (debug/inspection)."""
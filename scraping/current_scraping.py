@@ -7,6 +7,7 @@ import asyncio
 import json
 import os
 import sys
+import threading
 
 # Add project root and current directory to path
 project_root = Path(__file__).parent.parent
@@ -23,8 +24,42 @@ from utils.logging_config import debug_logger, progress_logger
 CACHE_DIR = project_root / "cache"
 
 class ContentController:
-    async def get_content(self, url: str) -> Optional[Dict]:
-        """Get CURRENT content for URL, using cache if available and fetching new content"""
+    def __init__(self):
+        # URLs with a background refresh in flight
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+
+    def _refresh_in_background(self, url: str, is_domain_wide: bool) -> None:
+        """
+        Re-scrape a stale cache entry without blocking the caller. Runs in a
+        daemon thread with its own event loop, since the CLI blocks the main
+        loop on input() between commands.
+        """
+        key = (url, is_domain_wide)
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                content = asyncio.run(get_content(url, is_domain_wide=is_domain_wide))
+                if content:
+                    cache_checker.cache_content(url=url, content=content, is_historic=False)
+                    debug_logger.debug(f"Background refresh finished for {url}")
+            except Exception as e:
+                debug_logger.error(f"Background refresh failed for {url}: {str(e)}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    async def get_content(self, url: str, stream: bool = False) -> Optional[Dict]:
+        """
+        Get CURRENT content for URL, using cache if available and fetching new content.
+        With stream=True, cached pages come back as a generator (see CacheChecker).
+        """
         try:
             # Process URL format - ONLY current content
             is_domain_wide = url.endswith('?')
@@ -45,16 +80,30 @@ class ContentController:
                 url=clean_url,
                 year=None,  # Added year parameter as None for current content
                 is_historic=False,
-                is_single_page=is_single_page
+                is_single_page=is_single_page,
+                stream=stream
             )
             
             if cached_content:
                 debug_logger.debug("DEBUG: Using cached content")
+                # Serve stale content immediately and refresh it behind the scenes
+                if cached_content.get('metadata', {}).get('freshness') == 'stale':
+                    progress_logger.info("Cached content is stale, refreshing in the background...")
+                    self._refresh_in_background(clean_url, is_domain_wide)
                 return cached_content
                 
+            # Don't go back to FireCrawl if it recently had nothing for this URL
+            if cache_checker.is_known_miss('firecrawl', clean_url, is_domain_wide=is_domain_wide):
+                progress_logger.info("No content found on a recent attempt, skipping fetch")
+                return None
+
             # If not in cache, get from FireCrawl
             progress_logger.info("Fetching fresh content...")
-            content = await get_content(clean_url, is_domain_wide=is_domain_wide)
+            try:
+                content = await get_content(clean_url, is_domain_wide=is_domain_wide)
+            except Exception:
+                cache_checker.record_miss('firecrawl', clean_url, is_domain_wide=is_domain_wide, reason='error')
+                raise
             
             if content:
                 progress_logger.info("Content retrieved successfully")
@@ -66,6 +115,7 @@ class ContentController:
                 )
                 return content
                 
+            cache_checker.record_miss('firecrawl', clean_url, is_domain_wide=is_domain_wide)
             return None
             
         except Exception as e:
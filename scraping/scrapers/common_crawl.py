@@ -5,11 +5,7 @@
 from datetime import datetime
 import requests
 import json
-from typing import Dict, Optional, List
-from bs4 import BeautifulSoup
-import gzip
-from io import BytesIO
-from warcio.archiveiterator import ArchiveIterator
+from typing import AsyncIterator, Dict, Optional, List, Tuple
 from urllib.parse import urlparse, urlunparse
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -23,6 +19,8 @@ import io
 import socket
 import dns.resolver
 import asyncio
+import random
+import time
 
 # Add project root to path
 project_root = Path(__file__).parent.parent.parent
@@ -31,6 +29,9 @@ sys.path.append(str(project_root))
 # Import directly since we added project root to path
 from caching.scrape_caching import content_cache
 from caching.cache_checker import cache_checker
+from config import config
+from scrapers.warc_fetcher import RETRY_STATUSES, WarcFetcher, create_session as create_fetch_session
+from scrapers.parse_pool import warc_texts
 
 # Configure explicit DNS servers
 resolver = dns.resolver.Resolver()
@@ -39,66 +40,115 @@ resolver.nameservers = ['8.8.8.8', '8.8.4.4']  # Google's DNS servers
 # Add project root to path for cache
 CACHE_DIR = project_root / "cache"
 
-async def fetch_and_parse_content(result: Dict, session: aiohttp.ClientSession, year: str) -> Optional[Dict]:
-    """Fetch and parse content from Common Crawl archive"""
-    try:
-        # Get offset and length
-        offset = int(result.get('offset', '0'))
-        length = int(result.get('length', '0'))
-        
-        # Construct the URL
-        warc_url = f"https://data.commoncrawl.org/{result['filename']}"
-        
-        # Request only the needed bytes
-        headers = {'Range': f'bytes={offset}-{offset+length-1}'}
-        
-        async with session.get(warc_url, headers=headers) as response:
-            if response.status == 206:  # Should be 206 Partial Content
-                content = await response.read()
-                html = extract_html_from_warc(content)
-                
-                if html:
-                    # Parse with BeautifulSoup
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    # Get domain for caching
-                    domain = urlparse(result.get('url')).netloc
-                    timestamp = result.get('timestamp', '')
-                    
-                    # Create content in EXACT FireCrawl format
-                    parsed_content = {
-                        'urls': [{
-                            'url': result.get('url'),
-                            'text': soup.get_text(separator=' ', strip=True),
-                            'timestamp': result.get('timestamp', '')
-                        }],
-                        'metadata': {
-                            'domain': urlparse(result.get('url')).netloc,
-                            'date': result.get('timestamp')[6:8] + result.get('timestamp')[4:6] + result.get('timestamp')[2:4],  # DDMMYY
-                            'source': 'commoncrawl',
-                            'is_domain_wide': False
-                        }
-                    }
-                    
-                    # Use the correct date from the content for caching
-                    cache_checker.cache_content(
-                        url=result.get('url'),
-                        content=parsed_content,
-                        is_historic=True,
-                        year=year
-                    )
-                    
-                    return parsed_content
-            else:
-                print(f"Error fetching WARC file: {response.status}")
-                
+CDX_BASE_URL = "https://index.commoncrawl.org/"
+COLLINFO_URL = f"{CDX_BASE_URL}collinfo.json"
+# Local copy of the crawl list, refreshed after CC_COLLINFO_TTL
+COLLINFO_FILE = CACHE_DIR / "commoncrawl_collinfo.json"
+
+def record_content(result: Dict, text: Optional[str]) -> Optional[Dict]:
+    """FireCrawl-format content for one CDX record from its parsed page text"""
+    if text is None:
         return None
-        
+
+    timestamp = result.get('timestamp', '')
+
+    # Create content in EXACT FireCrawl format
+    return {
+        'urls': [{
+            'url': result.get('url'),
+            'text': text,
+            'timestamp': timestamp
+        }],
+        'metadata': {
+            'domain': urlparse(result.get('url')).netloc,
+            'date': timestamp[6:8] + timestamp[4:6] + timestamp[2:4],  # DDMMYY
+            'source': 'commoncrawl',
+            'is_domain_wide': False
+        }
+    }
+
+async def fetch_and_parse_content(result: Dict, session: aiohttp.ClientSession, year: str,
+                                  cache: bool = True) -> Optional[Dict]:
+    """
+    Fetch and parse content from Common Crawl archive.
+    Pass cache=False when the caller caches the whole batch itself, so pages
+    are merged into the cache once per date instead of once per record.
+    """
+    try:
+        # Request only the needed bytes (retried with backoff)
+        content = await WarcFetcher(session).fetch_range(
+            result['filename'], int(result.get('offset', '0')), int(result.get('length', '0'))
+        )
+        if content is None:
+            return None
+
+        # Decompress and parse off the event loop
+        parsed_content = record_content(result, (await warc_texts([content]))[0])
+
+        # Use the correct date from the content for caching
+        if parsed_content and cache:
+            cache_checker.cache_content(
+                url=result.get('url'),
+                content=parsed_content,
+                is_historic=True,
+                year=year
+            )
+
+        return parsed_content
+
     except Exception as e:
         print(f"Error in fetch_and_parse_content: {str(e)}")
         traceback.print_exc()
         return None
 
+async def fetch_and_parse_many(results: List[Dict], session: aiohttp.ClientSession,
+                               fetcher: Optional[WarcFetcher] = None) -> List[Optional[Dict]]:
+    """
+    Fetch and parse many CDX records concurrently (see WarcFetcher), returning
+    parsed content in the same order as `results` (None where a record failed).
+    Nothing is cached here; callers cache the batch per date.
+    """
+    report = fetcher is None
+    fetcher = fetcher or WarcFetcher(session)
+    raw_records = await fetcher.fetch_records(results)
+    if report:
+        print(fetcher.report())
+
+    # Decompression and HTML parsing run in the parse pool, in batches
+    texts = await warc_texts(raw_records)
+    return [record_content(result, text) for result, text in zip(results, texts)]
+
+async def fetch_and_parse_stream(records: AsyncIterator[Dict], session: aiohttp.ClientSession
+                                 ) -> AsyncIterator[Tuple[Dict, Optional[Dict]]]:
+    """
+    Feed CDX records into the WARC fetch stage as they arrive, CC_FETCH_BATCH
+    at a time, yielding (record, parsed content or None) pairs. Index pages
+    keep streaming in while a batch is being fetched, and the next batch is
+    fetched while the previous one is parsed.
+    """
+    async def batches():
+        batch = []
+        async for record in records:
+            batch.append(record)
+            if len(batch) >= config.CC_FETCH_BATCH:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    fetcher = WarcFetcher(session)
+    pending = None  # (records, task) of the batch still being fetched/parsed
+    async for batch in batches():
+        task = asyncio.ensure_future(fetch_and_parse_many(batch, session, fetcher))
+        if pending:
+            for pair in zip(pending[0], await pending[1]):
+                yield pair
+        pending = (batch, task)
+    if pending:
+        for pair in zip(pending[0], await pending[1]):
+            yield pair
+    print(fetcher.report())
+
 def get_index_list(year: str) -> List[str]:
     """Get list of Common Crawl indexes for a given year"""
     try:
@@ -182,55 +232,57 @@ def normalize_url(url: str) -> str:
     url = url.replace('http://', '').replace('https://', '')
     return url.strip()
 
-async def get_historic_content(url: str, year: str, is_domain_wide: bool = False) -> Optional[Dict]:
-    """Get historic content from Common Crawl"""
+async def get_historic_content(url: str, year: str, is_domain_wide: bool = False,
+                               url_pattern: Optional[str] = None, raise_errors: bool = False) -> Optional[Dict]:
+    """
+    Get historic content from Common Crawl.
+    `url_pattern` is an optional regex the capture URLs must match (applied by the index server).
+    With raise_errors, a search that found nothing because the index list, an
+    index query or every WARC fetch failed raises instead of returning None,
+    so callers can tell a failed lookup from a URL with no captures.
+    """
     try:
         print(f"\nSearching Common Crawl archives for: {url}")
         print(f"Year: {year}")
         print(f"Domain-wide search: {'Yes' if is_domain_wide else 'No'}")
         
-        # Get available indexes for the year
-        indexes = get_available_indexes(year)
-        if not indexes:
-            print("No indexes found")
-            return None
-            
         all_pages = []
-        async with aiohttp.ClientSession() as session:
-            for index in indexes:
-                print(f"Searching index: {index}")
-                try:
-                    # For domain-wide search, use domain pattern
-                    search_url = url
-                    if is_domain_wide:
-                        if not search_url.startswith(('http://', 'https://')):
-                            search_url = f"http://{url}/*"
-                        else:
-                            parsed = urlparse(url)
-                            search_url = f"{parsed.scheme}://{parsed.netloc}/*"
-                    
-                    results = await search_cc_index(index, search_url)
-                    if results:
-                        for result in results:
-                            # Pass year parameter to fetch_and_parse_content
-                            content = await fetch_and_parse_content(result, session, year)
-                            if content:
-                                # Extract timestamp from result
-                                timestamp = result.get('timestamp', '')
-                                
-                                # Add page data
-                                all_pages.append({
-                                    'url': result.get('url'),
-                                    'timestamp': timestamp,
-                                    'content': content.get('urls', [{}])[0].get('text', '') if content.get('urls') else '',
-                                    'snapshot_url': f"https://web.archive.org/web/{timestamp}/{result.get('url')}"
-                                })
-                                
-                        print(f"Found {len(results)} pages in index {index}")
-                        
-                except Exception as e:
-                    print(f"Error querying index {index}: {str(e)}")
-                    continue
+        failed_indexes = []
+        captures = 0
+        # One session (and connection pool) for every CDX query and WARC range
+        async with create_fetch_session() as session:
+            # Get available indexes for the year
+            indexes = await get_available_indexes(year, session, raise_errors=raise_errors)
+            if not indexes:
+                print("No indexes found")
+                return None
+
+            # For domain-wide search, use domain pattern
+            search_url = url
+            if is_domain_wide:
+                if not search_url.startswith(('http://', 'https://')):
+                    search_url = f"http://{url}/*"
+                else:
+                    parsed = urlparse(url)
+                    search_url = f"{parsed.scheme}://{parsed.netloc}/*"
+
+            records = stream_cc_indexes(indexes, search_url, session, url_pattern, failed=failed_indexes)
+
+            # Fetch WARC records concurrently as captures stream in from the indexes.
+            # Pages are cached in one batch per date below
+            async for result, content in fetch_and_parse_stream(records, session):
+                captures += 1
+                if content:
+                    # Extract timestamp from result
+                    timestamp = result.get('timestamp', '')
+
+                    # Add page data
+                    all_pages.append({
+                        'url': result.get('url'),
+                        'timestamp': timestamp,
+                        'content': content.get('urls', [{}])[0].get('text', '') if content.get('urls') else '',
+                        'snapshot_url': f"https://web.archive.org/web/{timestamp}/{result.get('url')}"
+                    })
         
         if all_pages:
             # Group pages by date for caching
@@ -269,12 +321,19 @@ async def get_historic_content(url: str, year: str, is_domain_wide: bool = False
                     'query_time': datetime.now().isoformat()
                 }
             }
-            
+
+        if raise_errors and (failed_indexes or captures):
+            # Nothing retrieved, but not because there were no captures
+            if failed_indexes:
+                raise aiohttp.ClientError(f"{len(failed_indexes)} of {len(indexes)} index queries failed")
+            raise aiohttp.ClientError(f"None of {captures} captures could be fetched")
         return None
             
     except Exception as e:
         print(f"Error in Common Crawl search: {str(e)}")
         traceback.print_exc()
+        if raise_errors:
+            raise
         return None
 
 def format_date(timestamp: str) -> str:
@@ -285,13 +344,7 @@ def format_date(timestamp: str) -> str:
 async def get_cc_indexes(year: Optional[str] = None) -> List[str]:
     """Get list of Common Crawl indexes, optionally filtered by year"""
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get('https://index.commoncrawl.org/collinfo.json') as response:
-                if response.status != 200:
-                    print("Error fetching Common Crawl index list")
-                    return []
-                    
-                indexes = await response.json()
+        indexes = await load_collinfo()
         
         # Filter indexes for the requested year
         if year:
@@ -314,30 +367,95 @@ async def get_cc_indexes(year: Optional[str] = None) -> List[str]:
         traceback.print_exc()
         return []
 
-async def query_cc_index(index: str, url: str) -> Optional[List[Dict]]:
-    """Query a specific Common Crawl index for URL content"""
+def cdx_filters(url_pattern: Optional[str] = None) -> List[Tuple[str, str]]:
+    """Server-side CDX filters: successful HTML captures, optionally only URLs matching `url_pattern` (regex)"""
+    filters = [('filter', '=status:200'), ('filter', '=mime:text/html')]
+    if url_pattern:
+        filters.append(('filter', f'url:{url_pattern}'))
+    return filters
+
+async def cdx_get(session: aiohttp.ClientSession, endpoint: str, params: List[Tuple[str, str]],
+                  label: str) -> Optional[bytes]:
+    """
+    Body of one CDX request, or None on 404 (no captures). Throttled or failed
+    requests are retried with backoff as WARC ranges are; once retries run out
+    (or on any other status) the error is raised, so the caller can tell a
+    failed index from an empty one. The session's overall timeout is replaced
+    by connect/read timeouts, as a large page can legitimately take longer.
+    """
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=config.CC_FETCH_TIMEOUT,
+                                    sock_read=config.CC_FETCH_TIMEOUT)
+    for attempt in range(config.CC_FETCH_RETRIES + 1):
+        retry_after = None
+        try:
+            async with session.get(endpoint, params=params, timeout=timeout) as response:
+                if response.status == 404:
+                    return None
+                if response.status == 200:
+                    return await response.read()
+                print(f"Error querying {label}: {response.status}")
+                if response.status not in RETRY_STATUSES or attempt == config.CC_FETCH_RETRIES:
+                    response.raise_for_status()
+                retry_after = response.headers.get('Retry-After')
+        except aiohttp.ClientResponseError:
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if attempt == config.CC_FETCH_RETRIES:
+                raise
+            print(f"Error querying {label}: {str(e) or type(e).__name__}")
+
+        delay = config.CC_FETCH_BACKOFF * (2 ** attempt) * (1 + random.random())
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        await asyncio.sleep(delay)
+
+async def iter_cc_index(index: str, url: str, session: aiohttp.ClientSession,
+                        url_pattern: Optional[str] = None) -> AsyncIterator[Dict]:
+    """
+    Stream every capture of `url` in one Common Crawl index. The CDX server caps
+    the size of a response, so the result is read page by page (showNumPages,
+    then page=0..N-1). Each page is read whole before its lines are yielded, so
+    a slow consumer never holds a response open, and a page that can't be read
+    raises (see cdx_get) rather than cutting the capture list short.
+    """
+    endpoint = f"{CDX_BASE_URL}{index}-index"
+    params = [('url', url), ('output', 'json')] + cdx_filters(url_pattern)
+
+    body = await cdx_get(session, endpoint, params + [('showNumPages', 'true')], index)
+    if body is None:  # No captures
+        return
+    pages = int(json.loads(body).get('pages', 1))
+
+    for page in range(pages):
+        body = await cdx_get(session, endpoint, params + [('page', str(page))],
+                             f"{index} page {page + 1}/{pages}")
+        if body is None:
+            continue
+        for line in body.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line.decode('utf-8'))
+            except json.JSONDecodeError:
+                continue
+
+async def query_cc_index(index: str, url: str,
+                         session: Optional[aiohttp.ClientSession] = None) -> Optional[List[Dict]]:
+    """Query a specific Common Crawl index for URL content (on `session` if given)"""
     try:
-        query_url = f"https://index.commoncrawl.org/{index}-index?url={url}&output=json"
         print(f"Querying index {index} for URL: {url}")
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(query_url) as response:
-                if response.status != 200:
-                    print(f"Error querying {index}: {response.status}")
-                    return None
-                
-                results = []
-                async for line in response.content:
-                    if line:
-                        try:
-                            result = json.loads(line.decode('utf-8'))
-                            results.append(result)
-                        except json.JSONDecodeError:
-                            continue
-                
-                if results:
-                    print(f"Found {len(results)} results in {index}")
-                return results
+        own_session = session is None
+        session = session or aiohttp.ClientSession()
+        try:
+            results = [result async for result in iter_cc_index(index, url, session)]
+            if results:
+                print(f"Found {len(results)} results in {index}")
+            return results
+        finally:
+            if own_session:
+                await session.close()
                 
     except Exception as e:
         print(f"Error querying index: {str(e)}")
@@ -362,23 +480,13 @@ async def handle_common_crawl_search(url: str, year: Optional[str] = None) -> Op
     """Search Common Crawl archives for URL content"""
     try:
         all_results = []
-        indexes = get_available_indexes(year or '')
         
-        async with aiohttp.ClientSession() as session:
-            for index in indexes:
-                try:
-                    results = await search_cc_index(index, url)
-                    if results:
-                        for result in results:
-                            # Parse content
-                            content = await fetch_and_parse_content(result, session, year)
-                            if content:
-                                # FIXED: Add the entire content to all_results, not just the URL data
-                                all_results.append(content)
-
-                except Exception as e:
-                    print(f"Error querying {index}: {str(e)}")
-                    continue
+        async with create_fetch_session() as session:
+            indexes = await get_available_indexes(year or '', session)
+            records = stream_cc_indexes(indexes, url, session)
+
+            # Parse content concurrently as captures stream in (cached in one batch below)
+            all_results = [content async for _, content in fetch_and_parse_stream(records, session) if content]
 
         if not all_results:
             return None
@@ -388,6 +496,9 @@ async def handle_common_crawl_search(url: str, year: Optional[str] = None) -> Op
         for result in all_results:
             combined_urls.extend(result['urls'])
 
+        # One merge per capture date rather than one per record
+        content_cache.cache_content(urlparse(url).netloc or url, {'urls': combined_urls}, 'commoncrawl', year=year)
+
         return {
             'urls': combined_urls,
             'metadata': {
@@ -403,30 +514,54 @@ async def handle_common_crawl_search(url: str, year: Optional[str] = None) -> Op
         traceback.print_exc()
         return None
 
-def extract_html_from_warc(content: bytes) -> Optional[str]:
-    """Extract HTML content from WARC record"""
+async def load_collinfo(session: Optional[aiohttp.ClientSession] = None) -> List[Dict]:
+    """
+    The Common Crawl crawl list (collinfo.json), from the local copy while it is
+    younger than CC_COLLINFO_TTL. A stale copy is still used if refreshing fails.
+    """
+    cached = None
+    if COLLINFO_FILE.exists():
+        try:
+            with open(COLLINFO_FILE, 'r') as f:
+                cached = json.load(f)
+            if time.time() - COLLINFO_FILE.stat().st_mtime < config.CC_COLLINFO_TTL:
+                return cached
+        except Exception as e:
+            print(f"Error reading cached index list: {e}")
+
     try:
-        warc_content = BytesIO(content)
-        with gzip.GzipFile(fileobj=warc_content) as stream:
-            for record in ArchiveIterator(stream):
-                if record.rec_type == 'response':
-                    html_content = record.content_stream().read()
-                    return html_content.decode('utf-8', errors='ignore')
-        return None
+        own_session = session is None
+        session = session or aiohttp.ClientSession()
+        try:
+            async with session.get(COLLINFO_URL) as response:
+                if response.status != 200:
+                    raise aiohttp.ClientError(f"HTTP {response.status}")
+                indexes = await response.json(content_type=None)
+        finally:
+            if own_session:
+                await session.close()
+
+        COLLINFO_FILE.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = COLLINFO_FILE.with_suffix('.tmp')
+        with open(temp_file, 'w') as f:
+            json.dump(indexes, f)
+        os.replace(temp_file, COLLINFO_FILE)
+        return indexes
+
     except Exception as e:
-        print(f"Error extracting HTML from WARC: {str(e)}")
-        return None
+        print(f"Error fetching Common Crawl index list: {e}")
+        if cached is not None:
+            print("Using stale cached index list")
+            return cached
+        return []
 
-def get_available_indexes(year: str) -> List[str]:
+async def get_available_indexes(year: str, session: Optional[aiohttp.ClientSession] = None,
+                                raise_errors: bool = False) -> List[str]:
     """Get list of available Common Crawl indexes for a given year"""
     try:
-        # Get the index list
-        response = requests.get('https://index.commoncrawl.org/collinfo.json')
-        if response.status_code != 200:
-            print("Error fetching Common Crawl index list")
-            return []
-            
-        indexes = response.json()
+        indexes = await load_collinfo(session)
+        if not indexes:
+            raise aiohttp.ClientError("Common Crawl index list unavailable")
         
         # Filter indexes for the requested year
         year_indexes = [
@@ -443,12 +578,70 @@ def get_available_indexes(year: str) -> List[str]:
         
     except Exception as e:
         print(f"Error getting indexes: {e}")
+        if raise_errors:
+            raise
         return []
 
-async def search_cc_index(index: str, search_url: str) -> Optional[List[Dict]]:
+async def stream_cc_indexes(indexes: List[str], search_url: str, session: aiohttp.ClientSession,
+                            url_pattern: Optional[str] = None,
+                            failed: Optional[List[str]] = None) -> AsyncIterator[Dict]:
+    """
+    Stream captures of `search_url` from every index, querying them concurrently
+    (CC_CDX_CONCURRENCY at a time, since the index server throttles). Captures
+    are yielded as they arrive, one per URL + content digest, so a page archived
+    unchanged by several crawls is only fetched once. Indexes whose query fails
+    are appended to `failed` when given.
+    """
+    semaphore = asyncio.Semaphore(config.CC_CDX_CONCURRENCY)
+    # Bounded so index pages aren't read far ahead of the fetch stage
+    queue = asyncio.Queue(maxsize=config.CC_FETCH_BATCH * 4)
+    done = object()
+
+    async def search(index: str):
+        found = 0
+        try:
+            async with semaphore:
+                print(f"Searching index: {index}")
+                async for result in iter_cc_index(index, search_url, session, url_pattern):
+                    found += 1
+                    await queue.put(result)
+        except Exception as e:
+            print(f"Error querying index {index}: {str(e)}")
+            if failed is not None:
+                failed.append(index)
+        finally:
+            if found:
+                print(f"Found {found} pages in index {index}")
+            await queue.put(done)
+
+    tasks = [asyncio.create_task(search(index)) for index in indexes]
+    seen = set()
+    skipped = 0
+    try:
+        remaining = len(tasks)
+        while remaining:
+            result = await queue.get()
+            if result is done:
+                remaining -= 1
+                continue
+            key = (result.get('url'), result.get('digest') or result.get('timestamp'))
+            if key in seen:
+                skipped += 1
+                continue
+            seen.add(key)
+            yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    if skipped:
+        print(f"Skipping {skipped} duplicate captures (same URL and digest)")
+
+async def search_cc_index(index: str, search_url: str,
+                          session: Optional[aiohttp.ClientSession] = None) -> Optional[List[Dict]]:
     """Search a Common Crawl index for URL content"""
     try:
-        results = await query_cc_index(index, search_url)
+        results = await query_cc_index(index, search_url, session=session)
         if not results:
             return None
             
@@ -0,0 +1,146 @@
+# =====================================
+# HTML / WARC PARSING POOL
+# =====================================
+
+import asyncio
+import gzip
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+from typing import Any, List, Optional, Tuple
+import sys
+from pathlib import Path
+from bs4 import BeautifulSoup
+from warcio.archiveiterator import ArchiveIterator
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+# Worker processes import this module too, so it must stay free of config and
+# cache imports (config is read lazily, in the parent only)
+
+_pool: Optional[Executor] = None
+
+
+def extract_html_from_warc(content: bytes) -> Optional[str]:
+    """Extract HTML content from WARC record"""
+    try:
+        warc_content = BytesIO(content)
+        with gzip.GzipFile(fileobj=warc_content) as stream:
+            for record in ArchiveIterator(stream):
+                if record.rec_type == 'response':
+                    html_content = record.content_stream().read()
+                    return html_content.decode('utf-8', errors='ignore')
+        return None
+    except Exception as e:
+        print(f"Error extracting HTML from WARC: {str(e)}")
+        return None
+
+
+def html_to_text(html: str, parser: str = 'html.parser') -> str:
+    """Visible text of an HTML page"""
+    soup = BeautifulSoup(html, parser)
+    return soup.get_text(separator=' ', strip=True)
+
+
+def warc_to_text(content: bytes, parser: str = 'html.parser') -> Optional[str]:
+    """Text of the HTML response in a WARC record (gzip member), None if there is none"""
+    html = extract_html_from_warc(content)
+    if not html:
+        return None
+    return html_to_text(html, parser)
+
+
+def _parse_batch(kind: str, items: List[Any], parser: str) -> List[Optional[str]]:
+    """Worker side: parse one submitted batch, None for items that fail"""
+    parse = warc_to_text if kind == 'warc' else html_to_text
+    texts = []
+    for item in items:
+        try:
+            texts.append(parse(item, parser) if item is not None else None)
+        except Exception as e:
+            print(f"Error parsing {kind} content: {str(e)}")
+            texts.append(None)
+    return texts
+
+
+def get_parse_pool() -> Executor:
+    """
+    Shared executor for CPU-bound parsing: worker processes by default, or
+    threads when PARSE_EXECUTOR=thread (e.g. with the lxml parser, which
+    releases the GIL). Workers are started by a forkserver (spawn where that
+    isn't available) rather than forked, since the indexing queue and cache
+    refresh threads may hold locks at the moment the pool starts.
+    """
+    global _pool
+    if _pool is None:
+        from config import config
+        if config.PARSE_EXECUTOR == 'thread':
+            _pool = ThreadPoolExecutor(max_workers=config.PARSE_WORKERS)
+        else:
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _pool = ProcessPoolExecutor(max_workers=config.PARSE_WORKERS,
+                                        mp_context=multiprocessing.get_context(method))
+    return _pool
+
+
+async def _parse_many(kind: str, items: List[Any]) -> List[Optional[str]]:
+    """Submit `items` to the pool PARSE_BATCH at a time and return their texts in order"""
+    from config import config
+    if not items:
+        return []
+    loop = asyncio.get_running_loop()
+    pool = get_parse_pool()
+    size = max(1, config.PARSE_BATCH)
+    batches = await asyncio.gather(*(
+        loop.run_in_executor(pool, _parse_batch, kind, items[i:i + size], config.PARSE_HTML_PARSER)
+        for i in range(0, len(items), size)
+    ))
+    return [text for batch in batches for text in batch]
+
+
+async def warc_texts(contents: List[Optional[bytes]]) -> List[Optional[str]]:
+    """Page text for each raw WARC record (None where missing or unparseable), parsed off the event loop"""
+    return await _parse_many('warc', contents)
+
+
+async def html_texts(htmls: List[Optional[str]]) -> List[Optional[str]]:
+    """Visible text for each HTML page (None where missing or unparseable), parsed off the event loop"""
+    return await _parse_many('html', htmls)
+
+
+class TextBatcher:
+    """
+    Hands fetched HTML to the parse pool in batches while fetching carries on,
+    so network and CPU work overlap. add() as pages arrive, then await
+    results() for (item, text) pairs in the order they were added.
+    """
+
+    def __init__(self, batch_size: Optional[int] = None):
+        if batch_size is None:
+            from config import config
+            batch_size = config.PARSE_BATCH
+        self.batch_size = max(1, batch_size)
+        self.items = []
+        self.htmls = []
+        self.pending = []
+
+    def add(self, item: Any, html: str):
+        self.items.append(item)
+        self.htmls.append(html)
+        if len(self.htmls) >= self.batch_size:
+            self._submit()
+
+    def _submit(self):
+        if self.htmls:
+            self.pending.append((self.items, asyncio.ensure_future(html_texts(self.htmls))))
+            self.items, self.htmls = [], []
+
+    async def results(self) -> List[Tuple[Any, Optional[str]]]:
+        self._submit()
+        pairs = []
+        for items, future in self.pending:
+            pairs.extend(zip(items, await future))
+        self.pending = []
+        return pairs
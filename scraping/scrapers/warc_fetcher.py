@@ -0,0 +1,171 @@
+# =====================================
+# WARC RANGE FETCHER
+# =====================================
+
+import asyncio
+import random
+import time
+from typing import Dict, List, Optional
+import sys
+from pathlib import Path
+import aiohttp
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from config import config
+
+WARC_BASE_URL = "https://data.commoncrawl.org/"
+
+# Worth retrying: throttling and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def create_session() -> aiohttp.ClientSession:
+    """
+    One aiohttp session for a whole archive pull (CDX queries and WARC ranges),
+    with the connection pool capped overall and per host.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=config.CC_FETCH_CONCURRENCY,
+        limit_per_host=config.CC_FETCH_PER_HOST,
+        ttl_dns_cache=300
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=config.CC_FETCH_TIMEOUT),
+        headers={'User-Agent': 'Mozilla/5.0'}
+    )
+
+
+def plan_ranges(records: List[Dict], max_gap: Optional[int] = None,
+                max_bytes: Optional[int] = None) -> List[Dict]:
+    """
+    Group CDX records by WARC file and merge ranges that are less than
+    `max_gap` bytes apart into one request of at most `max_bytes` (a single
+    larger record still gets its own request). Each span is
+    {'filename', 'start', 'end', 'members': [(record index, offset, length)]},
+    with `end` exclusive.
+    """
+    max_gap = config.CC_RANGE_MAX_GAP if max_gap is None else max_gap
+    max_bytes = config.CC_RANGE_MAX_BYTES if max_bytes is None else max_bytes
+
+    by_file = {}
+    for i, record in enumerate(records):
+        offset, length = int(record.get('offset', 0)), int(record.get('length', 0))
+        by_file.setdefault(record['filename'], []).append((i, offset, length))
+
+    spans = []
+    for filename, members in by_file.items():
+        span = None
+        for i, offset, length in sorted(members, key=lambda m: m[1]):
+            end = offset + length
+            if (span and offset - span['end'] < max_gap
+                    and max(end, span['end']) - span['start'] <= max_bytes):
+                span['end'] = max(end, span['end'])
+                span['members'].append((i, offset, length))
+            else:
+                span = {'filename': filename, 'start': offset, 'end': end,
+                        'members': [(i, offset, length)]}
+                spans.append(span)
+    return spans
+
+
+class WarcFetcher:
+    """
+    Fetches WARC records by byte range concurrently over a shared session.
+
+    At most `concurrency` requests are in flight (the session's connector
+    also caps connections per host). Throttled or failed requests are retried
+    with exponential backoff plus jitter, sleeping outside the semaphore so a
+    backing-off request doesn't hold a slot. Records close together in the
+    same WARC file are coalesced into one request. Results come back in the
+    order the records were given, and the fetcher keeps running totals for
+    report().
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, concurrency: Optional[int] = None,
+                 retries: Optional[int] = None, backoff: Optional[float] = None):
+        self.session = session
+        self.semaphore = asyncio.Semaphore(concurrency or config.CC_FETCH_CONCURRENCY)
+        self.retries = config.CC_FETCH_RETRIES if retries is None else retries
+        self.backoff = config.CC_FETCH_BACKOFF if backoff is None else backoff
+        self.requests = 0
+        self.records = 0
+        self.bytes = 0
+        self.retried = 0
+        self.failed = 0
+        self.elapsed = 0.0
+        self.started = None
+
+    async def fetch_range(self, filename: str, offset: int, length: int) -> Optional[bytes]:
+        """Bytes offset..offset+length-1 of a WARC file, or None once retries are exhausted."""
+        warc_url = f"{WARC_BASE_URL}{filename}"
+        headers = {'Range': f'bytes={offset}-{offset + length - 1}'}
+        reason = ''
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            try:
+                async with self.semaphore:
+                    async with self.session.get(warc_url, headers=headers) as response:
+                        self.requests += 1
+                        if response.status == 206:  # Should be 206 Partial Content
+                            data = await response.read()
+                            self.bytes += len(data)
+                            return data
+                        if response.status not in RETRY_STATUSES:
+                            print(f"Error fetching WARC file: {response.status}")
+                            self.failed += 1
+                            return None
+                        reason = f"HTTP {response.status}"
+                        retry_after = response.headers.get('Retry-After')
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                reason = str(e) or type(e).__name__
+
+            if attempt < self.retries:
+                self.retried += 1
+                delay = self.backoff * (2 ** attempt) * (1 + random.random())
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+                await asyncio.sleep(delay)
+
+        print(f"Giving up on {filename} @ {offset} after {self.retries + 1} attempts ({reason})")
+        self.failed += 1
+        return None
+
+    async def fetch_records(self, records: List[Dict]) -> List[Optional[bytes]]:
+        """
+        Raw gzip member for each CDX record, in input order (None where the
+        fetch failed). Nearby records share a range request (see plan_ranges)
+        and are sliced back out of the response by their offsets.
+        """
+        if self.started is None:
+            self.started = time.monotonic()
+        spans = plan_ranges(records)
+        datas = await asyncio.gather(*(
+            self.fetch_range(span['filename'], span['start'], span['end'] - span['start'])
+            for span in spans
+        ))
+
+        results = [None] * len(records)
+        for span, data in zip(spans, datas):
+            if data is None:
+                continue
+            for i, offset, length in span['members']:
+                member = data[offset - span['start']:offset - span['start'] + length]
+                if len(member) == length:
+                    results[i] = member
+
+        # Wall-clock time since the first batch, so overlapping batches aren't counted twice
+        self.elapsed = time.monotonic() - self.started
+        self.records += sum(1 for r in results if r is not None)
+        return results
+
+    def report(self) -> str:
+        """Throughput so far, e.g. for printing after a pull."""
+        mb = self.bytes / (1024 * 1024)
+        elapsed = self.elapsed or 1e-9
+        return (f"Fetched {self.records} WARC records ({mb:.1f} MB, {self.requests} requests) in "
+                f"{self.elapsed:.1f}s: {self.records / elapsed:.1f} records/s, {mb / elapsed:.2f} MB/s "
+                f"({self.retried} retries, {self.failed} failed)")
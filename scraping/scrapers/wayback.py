@@ -8,7 +8,6 @@ import json
 import os
 from typing import List, Dict, Optional
 import traceback
-from bs4 import BeautifulSoup
 from pathlib import Path
 import sys
 
@@ -19,6 +18,7 @@ sys.path.append(str(project_root))
 # Import from caching directory
 from caching.scrape_caching import content_cache
 from caching.cache_checker import cache_checker
+from scrapers.parse_pool import TextBatcher
 
 class WaybackKeywordScanner:
     def __init__(self):
@@ -26,8 +26,13 @@ class WaybackKeywordScanner:
         self.wayback_base = "https://web.archive.org/web"
         # Remove cache_dir since we're using cache_checker
         
-    async def get_url_snapshots(self, url: str, year: Optional[str] = None) -> List[Dict]:
-        """Get HTML snapshots for a URL, optionally filtered by year"""
+    async def get_url_snapshots(self, url: str, year: Optional[str] = None,
+                                raise_errors: bool = False) -> List[Dict]:
+        """
+        Get HTML snapshots for a URL, optionally filtered by year.
+        With raise_errors, a failed CDX query (or snapshots that were listed
+        but none could be fetched) raises instead of returning [].
+        """
         try:
             # Ensure URL is properly formatted
             if not url.startswith('http://') and not url.startswith('https://'):
@@ -56,49 +61,58 @@ class WaybackKeywordScanner:
             
             async with aiohttp.ClientSession() as session:
                 async with session.get(self.base_url, params=params) as response:
+                    if response.status != 200 and raise_errors:
+                        raise aiohttp.ClientError(f"CDX API returned status {response.status}")
                     if response.status == 200:
                         data = await response.json()
                         if len(data) > 1:  # Skip header row
                             snapshots_by_date = {}
                             print(f"Found {len(data) - 1} snapshots")
                             
+                            # Pages are parsed in the parse pool while later snapshots download
+                            batcher = TextBatcher()
+                            failed = 0
                             for row in data[1:]:
                                 timestamp, original_url, mimetype, status, digest = row
-                                date = f"{timestamp[6:8]}{timestamp[4:6]}{timestamp[2:4]}"  # DDMMYY
                                 snapshot_url = f"{self.wayback_base}/{timestamp}/{original_url}"
                                 
                                 try:
                                     async with session.get(snapshot_url) as snapshot_response:
                                         if snapshot_response.status == 200:
-                                            html = await snapshot_response.text()
-                                            soup = BeautifulSoup(html, 'html.parser')
-                                            text = soup.get_text(separator=' ', strip=True)
-                                            
-                                            if not text:
-                                                continue
-                                            
-                                            url_entry = {
-                                                'url': original_url,
-                                                'text': text,
-                                                'timestamp': timestamp
-                                            }
-                                            
-                                            if date not in snapshots_by_date:
-                                                snapshots_by_date[date] = {
-                                                    'urls': [],
-                                                    'metadata': {
-                                                        'domain': urlparse(url).netloc,
-                                                        'date': date,
-                                                        'source': 'wayback',
-                                                        'is_domain_wide': False
-                                                    }
-                                                }
-                                            snapshots_by_date[date]['urls'].append(url_entry)
+                                            batcher.add((timestamp, original_url), await snapshot_response.text())
+                                        else:
+                                            failed += 1
                                 except Exception as e:
                                     print(f"Error fetching {snapshot_url}: {str(e)}")
+                                    failed += 1
                                     continue
                             
+                            for (timestamp, original_url), text in await batcher.results():
+                                if not text:
+                                    continue
+                                date = f"{timestamp[6:8]}{timestamp[4:6]}{timestamp[2:4]}"  # DDMMYY
+                                
+                                url_entry = {
+                                    'url': original_url,
+                                    'text': text,
+                                    'timestamp': timestamp
+                                }
+                                
+                                if date not in snapshots_by_date:
+                                    snapshots_by_date[date] = {
+                                        'urls': [],
+                                        'metadata': {
+                                            'domain': urlparse(url).netloc,
+                                            'date': date,
+                                            'source': 'wayback',
+                                            'is_domain_wide': False
+                                        }
+                                    }
+                                snapshots_by_date[date]['urls'].append(url_entry)
+                            
                             snapshots = list(snapshots_by_date.values())
+                            if not snapshots and failed and raise_errors:
+                                raise aiohttp.ClientError(f"None of {len(data) - 1} snapshots could be fetched")
                             return snapshots
         
             return []
@@ -106,10 +120,15 @@ class WaybackKeywordScanner:
         except Exception as e:
             print(f"Error getting snapshots: {str(e)}")
             traceback.print_exc()
+            if raise_errors:
+                raise
             return []
 
-    async def get_domain_snapshots(self, domain: str, year: str) -> List[Dict]:
-        """Get all HTML snapshots for a domain from a specific year"""
+    async def get_domain_snapshots(self, domain: str, year: str, raise_errors: bool = False) -> List[Dict]:
+        """
+        Get all HTML snapshots for a domain from a specific year.
+        With raise_errors, failures raise as in get_url_snapshots.
+        """
         try:
             async with aiohttp.ClientSession() as session:
                 cdx_url = 'https://web.archive.org/cdx/search/cdx'
@@ -129,6 +148,8 @@ class WaybackKeywordScanner:
                 async with session.get(cdx_url, params=params) as response:
                     if response.status != 200:
                         print(f"Error: CDX API returned status {response.status}")
+                        if raise_errors:
+                            raise aiohttp.ClientError(f"CDX API returned status {response.status}")
                         return []
                     
                     data = await response.json()
@@ -138,53 +159,65 @@ class WaybackKeywordScanner:
                     
                     print(f"Found {len(data) - 1} snapshots")
                     
-                    # Skip header row and group by date
-                    snapshots_by_date = {}
+                    # Skip header row; pages are parsed in the parse pool while later snapshots download
+                    batcher = TextBatcher()
+                    failed = 0
                     for row in data[1:]:
                         timestamp, original_url, mimetype, status, digest = row
-                        date = f"{timestamp[6:8]}{timestamp[4:6]}{timestamp[2:4]}"  # DDMMYY
                         
                         # Get actual content for this snapshot
                         snapshot_url = f"{self.wayback_base}/{timestamp}/{original_url}"
                         try:
                             async with session.get(snapshot_url) as snapshot_response:
                                 if snapshot_response.status == 200:
-                                    html = await snapshot_response.text()
-                                    soup = BeautifulSoup(html, 'html.parser')
-                                    text = soup.get_text(separator=' ', strip=True)
-                                    
-                                    # Create URL entry in FireCrawl format
-                                    url_entry = {
-                                        'url': original_url,
-                                        'text': text,
-                                        'timestamp': timestamp
-                                    }
-                                    
-                                    # Add to date group
-                                    if date not in snapshots_by_date:
-                                        snapshots_by_date[date] = {
-                                            'urls': [],
-                                            'metadata': {
-                                                'domain': domain,
-                                                'date': date,
-                                                'source': 'wayback',
-                                                'is_domain_wide': True
-                                            }
-                                        }
-                                    snapshots_by_date[date]['urls'].append(url_entry)
+                                    batcher.add((timestamp, original_url), await snapshot_response.text())
                                     print(f"Retrieved content for {original_url}")
+                                else:
+                                    failed += 1
                         except Exception as e:
                             print(f"Error fetching {snapshot_url}: {str(e)}")
+                            failed += 1
                             continue
                     
+                    # Group by date
+                    snapshots_by_date = {}
+                    for (timestamp, original_url), text in await batcher.results():
+                        if text is None:
+                            continue
+                        date = f"{timestamp[6:8]}{timestamp[4:6]}{timestamp[2:4]}"  # DDMMYY
+                        
+                        # Create URL entry in FireCrawl format
+                        url_entry = {
+                            'url': original_url,
+                            'text': text,
+                            'timestamp': timestamp
+                        }
+                        
+                        # Add to date group
+                        if date not in snapshots_by_date:
+                            snapshots_by_date[date] = {
+                                'urls': [],
+                                'metadata': {
+                                    'domain': domain,
+                                    'date': date,
+                                    'source': 'wayback',
+                                    'is_domain_wide': True
+                                }
+                            }
+                        snapshots_by_date[date]['urls'].append(url_entry)
+                    
                     # Convert to list of snapshots
                     snapshots = list(snapshots_by_date.values())
+                    if not snapshots and failed and raise_errors:
+                        raise aiohttp.ClientError(f"None of {len(data) - 1} snapshots could be fetched")
                     print(f"Successfully retrieved content for {len(snapshots)} dates")
                     return snapshots
             
         except Exception as e:
             print(f"Error getting domain snapshots: {str(e)}")
             traceback.print_exc()
+            if raise_errors:
+                raise
             return []
 
 async def handle_wayback_command(command: str) -> str:
@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Dict, List, Optional, Union
 from pathlib import Path
 import json
-from Tags.tag_indexer import TagIndexer
+from indexing.tag_indexing.tag_indexer import get_tag_indexer
 from .edge_rules import EDGE_TYPES
 import traceback
 import logging
@@ -251,18 +251,9 @@ class BaseTag:
         return f"{source_id}-{edge_type}-{target_id}"
 
     def _index_tag(self, tag: Dict) -> None:
-        """Index a single tag in Whoosh"""
+        """Index a single tag in Whoosh (scenarios batch theirs through index_tags)"""
         try:
-            self.tag_indexer.add_document(
-                id=tag['id_'],
-                name=tag['name'],
-                type=tag['type_'],
-                class_=tag['class_'],
-                variations=','.join(tag.get('variations', [])),
-                notes=json.dumps(tag.get('notes', [])),
-                created=datetime.now(),
-                raw_data=json.dumps(tag)
-            )
+            get_tag_indexer().index_tags([tag])
         except Exception as e:
             print(f"Error indexing tag: {str(e)}") 
 
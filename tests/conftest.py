@@ -0,0 +1,14 @@
+import os
+import sys
+from pathlib import Path
+
+# config.Config refuses to load without these; the tests never call the APIs
+os.environ.setdefault("ANTHROPIC_API_KEY", "test")
+os.environ.setdefault("CH_API_KEY", "test")
+os.environ.setdefault("OPENCORPORATES_API_KEY", "test")
+
+# Project root for `config`, `indexing`, `scraping.caching`; scraping/ for the
+# scrapers' own `caching.` / `scrapers.` imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(1, str(project_root / "scraping"))
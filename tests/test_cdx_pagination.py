@@ -0,0 +1,185 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from config import config
+import scrapers.common_crawl as common_crawl
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(config, 'CC_FETCH_RETRIES', 2)
+    monkeypatch.setattr(config, 'CC_FETCH_BACKOFF', 0)
+
+
+def lines(page, count=2):
+    return ''.join(json.dumps({'url': f'http://x.com/{page}-{i}', 'digest': f'D{page}{i}'}) + '\n'
+                   for i in range(count))
+
+
+@asynccontextmanager
+async def cdx_server(handler):
+    """Local CDX endpoint for any index; `handler(request, hits)` returns the response."""
+    hits = {}
+
+    async def cdx(request):
+        key = 'count' if 'showNumPages' in request.query else request.query.get('page')
+        hits[key] = hits.get(key, 0) + 1
+        return handler(request, hits)
+
+    app = web.Application()
+    app.router.add_get('/{index}-index', cdx)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        yield f'http://127.0.0.1:{port}/', hits
+    finally:
+        await runner.cleanup()
+
+
+def run(handler, consume):
+    async def main():
+        async with cdx_server(handler) as (base_url, hits):
+            original = common_crawl.CDX_BASE_URL
+            common_crawl.CDX_BASE_URL = base_url
+            try:
+                async with aiohttp.ClientSession() as session:
+                    return await consume(session), hits
+            finally:
+                common_crawl.CDX_BASE_URL = original
+    return asyncio.run(main())
+
+
+async def captures(session, index='CC-TEST'):
+    return [r['url'] async for r in common_crawl.iter_cc_index(index, 'x.com', session)]
+
+
+def test_reads_every_page_in_order():
+    def handler(request, hits):
+        query = request.query
+        if 'showNumPages' in query:
+            return web.json_response({'pages': 3})
+        return web.Response(text=lines(query['page']))
+
+    urls, hits = run(handler, captures)
+    assert urls == [f'http://x.com/{p}-{i}' for p in range(3) for i in range(2)]
+    assert hits == {'count': 1, '0': 1, '1': 1, '2': 1}
+
+
+def test_filters_are_sent_with_every_request():
+    seen = []
+
+    def handler(request, hits):
+        query = request.query
+        seen.append(query.getall('filter'))
+        if 'showNumPages' in query:
+            return web.json_response({'pages': 2})
+        return web.Response(text=lines(query['page']))
+
+    run(handler, captures)
+    assert len(seen) == 3
+    assert all(filters == ['=status:200', '=mime:text/html'] for filters in seen)
+
+
+def test_no_captures_is_empty():
+    urls, hits = run(lambda request, hits: web.Response(status=404), captures)
+    assert urls == []
+    assert hits == {'count': 1}
+
+
+def test_missing_page_is_skipped():
+    def handler(request, hits):
+        query = request.query
+        if 'showNumPages' in query:
+            return web.json_response({'pages': 3})
+        if query['page'] == '1':
+            return web.Response(status=404)
+        return web.Response(text=lines(query['page']))
+
+    urls, _ = run(handler, captures)
+    assert urls == ['http://x.com/0-0', 'http://x.com/0-1', 'http://x.com/2-0', 'http://x.com/2-1']
+
+
+def test_throttled_requests_are_retried():
+    def handler(request, hits):
+        query = request.query
+        key = 'count' if 'showNumPages' in query else query['page']
+        if hits[key] == 1:
+            return web.Response(status=503 if key == 'count' else 429)
+        if 'showNumPages' in query:
+            return web.json_response({'pages': 2})
+        return web.Response(text=lines(query['page']))
+
+    urls, hits = run(handler, captures)
+    assert len(urls) == 4
+    assert hits == {'count': 2, '0': 2, '1': 2}
+
+
+@pytest.mark.parametrize('status', [403, 503])
+def test_page_that_keeps_failing_raises_instead_of_truncating(status):
+    def handler(request, hits):
+        query = request.query
+        if 'showNumPages' in query:
+            return web.json_response({'pages': 3})
+        if query['page'] == '1':
+            return web.Response(status=status)
+        return web.Response(text=lines(query['page']))
+
+    urls = []
+
+    async def consume(session):
+        async for record in common_crawl.iter_cc_index('CC-TEST', 'x.com', session):
+            urls.append(record['url'])
+
+    with pytest.raises(aiohttp.ClientResponseError) as error:
+        run(handler, consume)
+    assert error.value.status == status
+    assert urls == ['http://x.com/0-0', 'http://x.com/0-1']
+
+
+def test_throttled_page_count_raises():
+    with pytest.raises(aiohttp.ClientResponseError):
+        run(lambda request, hits: web.Response(status=429), captures)
+
+
+def test_stream_dedups_across_indexes_and_reports_failures():
+    def handler(request, hits):
+        if request.match_info['index'] == 'CC-BROKEN':
+            return web.Response(status=503)
+        if 'showNumPages' in request.query:
+            return web.json_response({'pages': 1})
+        return web.Response(text=lines(0))
+
+    async def consume(session):
+        failed = []
+        urls = [r['url'] async for r in common_crawl.stream_cc_indexes(
+            ['CC-TEST', 'CC-OTHER', 'CC-BROKEN'], 'x.com', session, failed=failed)]
+        return urls, failed
+
+    (urls, failed), _ = run(handler, consume)
+    assert sorted(urls) == ['http://x.com/0-0', 'http://x.com/0-1']
+    assert failed == ['CC-BROKEN']
+
+
+@pytest.mark.parametrize('status, raises', [(404, False), (503, True)])
+def test_historic_search_tells_failed_indexes_from_empty_ones(monkeypatch, status, raises):
+    async def collinfo(session=None):
+        return [{'id': 'CC-MAIN-2020-05'}]
+    monkeypatch.setattr(common_crawl, 'load_collinfo', collinfo)
+
+    async def consume(session):
+        return await common_crawl.get_historic_content('x.com', '2020', raise_errors=True)
+
+    if raises:
+        with pytest.raises(aiohttp.ClientError):
+            run(lambda request, hits: web.Response(status=status), consume)
+    else:
+        result, _ = run(lambda request, hits: web.Response(status=status), consume)
+        assert result is None
@@ -0,0 +1,84 @@
+import threading
+import time
+
+from indexing.scraping_indexing.scraping_indexer import IndexingQueue
+
+
+class RecordingBackend:
+    """Collects the batches the queue writes."""
+
+    def __init__(self):
+        self.batches = []
+        self.written = threading.Event()
+
+    def write(self, documents, removed=None, procs=1):
+        self.batches.append(list(documents))
+        self.written.set()
+        return len(self.batches[-1])
+
+
+def doc(key, content=''):
+    return {'doc_key': key, 'content': content}
+
+
+def test_flush_commits_everything_queued():
+    backend = RecordingBackend()
+    queue = IndexingQueue(backend, batch_size=100, flush_seconds=60)
+    for key in 'abc':
+        queue.put(doc(key))
+
+    queue.flush(timeout=5)
+    assert [sorted(d['doc_key'] for d in batch) for batch in backend.batches] == [['a', 'b', 'c']]
+    assert queue.committed == 3
+    assert queue.pending == 0
+
+
+def test_flush_with_nothing_queued_returns_at_once():
+    backend = RecordingBackend()
+    queue = IndexingQueue(backend, batch_size=100, flush_seconds=60)
+    started = time.monotonic()
+    queue.flush(timeout=5)
+    assert time.monotonic() - started < 1
+    assert backend.batches == []
+
+
+def test_repeats_within_a_batch_collapse_to_the_latest():
+    backend = RecordingBackend()
+    queue = IndexingQueue(backend, batch_size=100, flush_seconds=60)
+    queue.put(doc('a', 'first'))
+    queue.put(doc('a', 'second'))
+    queue.flush(timeout=5)
+
+    assert backend.batches == [[doc('a', 'second')]]
+    assert queue.committed == 2
+
+
+def test_full_batch_commits_without_a_flush():
+    backend = RecordingBackend()
+    queue = IndexingQueue(backend, batch_size=2, flush_seconds=60)
+    queue.put(doc('a'))
+    queue.put(doc('b'))
+
+    assert backend.written.wait(5)
+    assert len(backend.batches[0]) == 2
+
+
+def test_partial_batch_commits_after_flush_seconds():
+    backend = RecordingBackend()
+    queue = IndexingQueue(backend, batch_size=100, flush_seconds=0.05)
+    queue.put(doc('a'))
+
+    assert backend.written.wait(5)
+    assert backend.batches == [[doc('a')]]
+
+
+def test_failed_write_does_not_leave_documents_pending():
+    class FailingBackend(RecordingBackend):
+        def write(self, documents, removed=None, procs=1):
+            raise OSError('index locked')
+
+    queue = IndexingQueue(FailingBackend(), batch_size=100, flush_seconds=60)
+    queue.put(doc('a'))
+    queue.flush(timeout=5)
+    assert queue.pending == 0
+    assert queue.committed == 0
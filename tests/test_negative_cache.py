@@ -0,0 +1,60 @@
+import pytest
+
+from config import config
+from scraping.caching.page_store import PageStore
+from scraping.caching.scrape_caching import ContentCache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'CACHE_NEGATIVE_TTL', {'firecrawl': 3600, 'commoncrawl': 7 * 86400, 'wayback': 7 * 86400})
+    monkeypatch.setattr(config, 'CACHE_NEGATIVE_ERROR_TTL', 300)
+    engine = ContentCache()
+    engine.page_store = PageStore(tmp_path)
+    return engine
+
+
+def age_misses(cache, seconds):
+    """Pretend every recorded miss happened `seconds` earlier."""
+    with cache.page_store.index._connect() as conn:
+        conn.execute("UPDATE negatives SET recorded_at = recorded_at - ?", (seconds,))
+
+
+def test_empty_miss_lasts_the_source_ttl(cache):
+    cache.record_miss('commoncrawl', 'http://x.com/a', year='2020')
+    assert cache.is_known_miss('commoncrawl', 'http://x.com/a', year='2020')
+
+    age_misses(cache, 86400)
+    assert cache.is_known_miss('commoncrawl', 'http://x.com/a', year='2020')
+    age_misses(cache, 7 * 86400)
+    assert not cache.is_known_miss('commoncrawl', 'http://x.com/a', year='2020')
+
+
+def test_error_miss_expires_after_the_error_ttl(cache):
+    cache.record_miss('commoncrawl', 'http://x.com/a', year='2020', reason='error')
+    assert cache.is_known_miss('commoncrawl', 'http://x.com/a', year='2020')
+
+    age_misses(cache, 301)
+    assert not cache.is_known_miss('commoncrawl', 'http://x.com/a', year='2020')
+    # Expired misses are dropped, not just ignored
+    assert cache.page_store.index.count_negatives() == 0
+
+
+def test_misses_are_scoped_by_source_year_and_scope(cache):
+    cache.record_miss('wayback', 'http://x.com/a', year='2020', is_domain_wide=True)
+    assert cache.is_known_miss('wayback', 'http://x.com/a', year='2020', is_domain_wide=True)
+    assert not cache.is_known_miss('wayback', 'http://x.com/a', year='2020')
+    assert not cache.is_known_miss('wayback', 'http://x.com/a', year='2021', is_domain_wide=True)
+    assert not cache.is_known_miss('commoncrawl', 'http://x.com/a', year='2020', is_domain_wide=True)
+
+
+def test_storing_content_clears_the_sources_misses(cache):
+    cache.record_miss('firecrawl', 'http://x.com/a')
+    cache.record_miss('wayback', 'http://x.com/a', year='2020')
+    cache.save_content('http://x.com/a', {
+        'pages': [{'url': 'http://x.com/a', 'content': 'A'}],
+        'metadata': {'source': 'firecrawl'}
+    }, date='010124')
+
+    assert not cache.is_known_miss('firecrawl', 'http://x.com/a')
+    assert cache.is_known_miss('wayback', 'http://x.com/a', year='2020')
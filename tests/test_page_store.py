@@ -0,0 +1,163 @@
+import time
+
+import pytest
+
+from scraping.caching.page_store import PageStore
+
+
+def page(url, content):
+    return {'url': url, 'content': content}
+
+
+@pytest.fixture(params=[False, True], ids=['pages', 'packs'])
+def store(request, tmp_path):
+    return PageStore(tmp_path, compress=request.param)
+
+
+def contents(store, domain='x.com'):
+    return sorted(p['content'] for p in store.iter_pages(store.find_entries(domain)))
+
+
+def stored_files(store):
+    return sorted(p for d in (store.pages_dir, store.packs_dir) for p in d.rglob('*') if p.is_file())
+
+
+# =====================================
+# Dedup
+# =====================================
+
+def test_existing_capture_is_not_stored_twice(store):
+    assert store.add_pages('x.com', [page('http://x.com/a', 'A')], 'firecrawl', '010124') == 1
+    assert store.add_pages('x.com', [page('http://x.com/a', 'A')], 'firecrawl', '010124') == 0
+    assert len(store.find_entries('x.com')) == 1
+
+
+def test_same_body_becomes_a_reference(store):
+    store.add_pages('x.com', [page('http://x.com/a', 'same')], 'firecrawl', '010124')
+    files = stored_files(store)
+    store.add_pages('x.com', [page('http://x.com/b', 'same')], 'firecrawl', '010124')
+
+    entries = {e['url']: e for e in store.find_entries('x.com')}
+    assert entries['http://x.com/b']['location'] == entries['http://x.com/a']['location']
+    assert entries['http://x.com/b']['size'] == 0
+    assert stored_files(store) == files
+    # Each capture keeps its own identity when read back
+    assert sorted(p['url'] for p in store.iter_pages(list(entries.values()))) == ['http://x.com/a', 'http://x.com/b']
+    assert len(store.unique_entries(list(entries.values()))) == 1
+
+
+def test_same_body_within_one_batch_is_stored_once(store):
+    store.add_pages('x.com', [page('http://x.com/a', 'same'), page('http://x.com/b', 'same')], 'firecrawl', '010124')
+    entries = store.find_entries('x.com')
+    assert len(entries) == 2
+    assert len({e['location'] for e in entries}) == 1
+    assert contents(store) == ['same', 'same']
+
+
+# =====================================
+# Replace (refresh of content that goes stale)
+# =====================================
+
+def test_refresh_with_same_body_moves_cached_at(store):
+    store.add_pages('x.com', [page('http://x.com/a', 'A')], 'firecrawl', '010124')
+    before = store.find_entries('x.com')[0]['cached_at']
+    time.sleep(0.01)
+
+    assert store.add_pages('x.com', [page('http://x.com/a', 'A')], 'firecrawl', '010124', replace=True) == 1
+    entries = store.find_entries('x.com')
+    assert len(entries) == 1
+    assert entries[0]['cached_at'] > before
+
+
+def test_refresh_with_changed_body_replaces_it(store):
+    store.add_pages('x.com', [page('http://x.com/a', 'old')], 'firecrawl', '010124')
+    assert store.add_pages('x.com', [page('http://x.com/a', 'new')], 'firecrawl', '010124', replace=True) == 1
+
+    assert contents(store) == ['new']
+    assert store.load_page(store.find_entries('x.com')[0]['key'])['content'] == 'new'
+    # Survives a rebuild from the manifests
+    store.rebuild_index()
+    assert contents(store) == ['new']
+
+
+def test_replaced_body_shared_by_a_reference_is_kept(tmp_path):
+    store = PageStore(tmp_path)
+    store.add_pages('x.com', [page('http://x.com/a', 'shared')], 'firecrawl', '010124')
+    store.add_pages('x.com', [page('http://x.com/b', 'shared')], 'firecrawl', '010124')
+    store.add_pages('x.com', [page('http://x.com/a', 'changed')], 'firecrawl', '010124', replace=True)
+
+    assert contents(store) == ['changed', 'shared']
+    assert len(stored_files(store)) == 2
+
+
+# =====================================
+# Packs and streaming reads
+# =====================================
+
+def test_packs_hold_pages_as_gzip_members(tmp_path):
+    store = PageStore(tmp_path, compress=True)
+    store.add_pages('x.com', [page('http://x.com/a', 'A'), page('http://x.com/b', 'B')], 'firecrawl', '010124')
+    store.add_pages('x.com', [page('http://x.com/c', 'C')], 'firecrawl', '010124')
+
+    entries = store.find_entries('x.com')
+    assert {e['location'] for e in entries} == {'packs/x.com_010124_f.jsonl.gz'}
+    assert len({e['member_offset'] for e in entries}) == 2
+    assert store.load_page(entries[-1]['key'])['content'] in {'A', 'B', 'C'}
+    assert contents(store) == ['A', 'B', 'C']
+
+
+def test_torn_manifest_line_does_not_swallow_the_next_entry(store):
+    store.add_pages('x.com', [page('http://x.com/a', 'A')], 'firecrawl', '010124')
+    with open(store._manifest_path('x.com'), 'a', encoding='utf-8') as f:
+        f.write('{"key": "torn')
+    store.add_pages('x.com', [page('http://x.com/b', 'B')], 'firecrawl', '010124')
+
+    assert len(list(store.iter_manifest('x.com'))) == 2
+    store.rebuild_index()
+    assert contents(store) == ['A', 'B']
+
+
+def test_streamed_total_counts_pages_yielded(tmp_path):
+    store = PageStore(tmp_path)
+    store.add_pages('x.com', [page(f'http://x.com/{i}', str(i)) for i in range(3)], 'firecrawl', '010124')
+    entries = store.find_entries('x.com')
+    (tmp_path / entries[0]['location']).unlink()
+
+    content = store.load_pages(entries, stream=True)
+    assert content['metadata']['total_entries'] == 3
+    assert content['metadata']['total_pages'] == 0
+    assert len(list(content['pages'])) == 2
+    assert content['metadata']['total_pages'] == 2
+
+
+# =====================================
+# Eviction
+# =====================================
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    store = PageStore(tmp_path, max_pages=3, eviction_policy='lru')
+    for name in 'abc':
+        store.add_pages('x.com', [page(f'http://x.com/{name}', name)], 'firecrawl', '010124')
+    store.touch(store.find_entries('x.com', url='http://x.com/a'))
+    store.add_pages('x.com', [page('http://x.com/d', 'd')], 'firecrawl', '010124')
+
+    assert contents(store) == ['a', 'd']
+    assert len(stored_files(store)) == 2
+    assert store.index.counters().get('evictions') == 2
+    # Evicted entries are gone from the manifest too
+    store.rebuild_index()
+    assert contents(store) == ['a', 'd']
+
+
+def test_legacy_and_page_store_copies_keep_separate_rows(tmp_path):
+    store = PageStore(tmp_path)
+    store.add_pages('x.com', [page('http://x.com/a', 'stored')], 'firecrawl', '010124')
+    legacy = tmp_path / 'x.com_010124_f.json'
+    legacy.write_text('{"pages": [{"url": "http://x.com/a", "content": "legacy"}]}', encoding='utf-8')
+    store.register_legacy_file(legacy)
+
+    key = store.find_entries('x.com')[0]['key']
+    assert len(store.index.rows_for_keys([key])[key]) == 2
+    # Dropping one copy leaves the other indexed
+    store.index.remove_locations([legacy.name])
+    assert store.load_page(key)['content'] == 'stored'
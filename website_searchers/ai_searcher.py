@@ -5,6 +5,7 @@
 # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
 
 from typing import Dict, Optional, List, Any
+import heapq
 import traceback
 import sys
 import time
@@ -186,27 +187,32 @@ async def handle_ai_search(prompt: str, content: Dict) -> str:
     try:
         debug_logger.debug("\nStarting handle_ai_search")
         
-        # Get pages from content
+        # Get pages from content (a list, or a generator for streamed cache reads)
         pages = content.get('pages', [])
-        if not pages:
-            return "No pages found to analyze"
 
-        # Score and sort pages
-        scored_pages = []
+        # Score pages as they arrive, keeping only the top N most relevant in memory
+        MAX_PAGES = 5  # Adjust this number based on your needs
+        total_pages = 0
+        top_pages = []
         for page in pages:
+            total_pages += 1
             url = page.get('url', '')
             page_content = page.get('content', '')
             score = _score_page_relevance(url, page_content, 'company')
-            scored_pages.append((score, page))
+            # Page counter breaks score ties so dicts are never compared
+            item = (score, -total_pages, page)
+            if len(top_pages) < MAX_PAGES:
+                heapq.heappush(top_pages, item)
+            else:
+                heapq.heappushpop(top_pages, item)
 
-        # Sort by score and take top N most relevant pages
-        MAX_PAGES = 5  # Adjust this number based on your needs
-        scored_pages.sort(reverse=True, key=lambda x: x[0])
-        selected_pages = scored_pages[:MAX_PAGES]
+        if not total_pages:
+            return "No pages found to analyze"
+        selected_pages = [(score, page) for score, _, page in sorted(top_pages, reverse=True)]
 
         # Log page selection process
         debug_logger.debug(f"\nPage Selection Process:")
-        debug_logger.debug(f"Total pages available: {len(pages)}")
+        debug_logger.debug(f"Total pages available: {total_pages}")
         debug_logger.debug(f"Selected top {MAX_PAGES} most relevant pages:")
         for score, page in selected_pages:
             debug_logger.debug(f"- {page['url']} (score: {score:.1f})")
@@ -6,6 +6,7 @@ from datetime import datetime
 
 # If your scenario is indeed in `Tags/scenarios/`, keep this:
 from Tags.scenarios.scenario_keyword_search import KeywordSearchScenario
+from indexing.scraping_indexing.keyword_prefilter import keyword_prefilter
 
 
 def handle_keyword_search(keyword: str, domain: str, content: Dict) -> str:
@@ -28,63 +29,85 @@ def handle_keyword_search(keyword: str, domain: str, content: Dict) -> str:
         pattern = re.compile(keyword, re.IGNORECASE)
         seen_paragraphs = set()
         
-        for page in pages_data:
-            url = page.get('url', '')
-            text_content = (page.get('content', '') or 
-                            page.get('raw_text', '') or 
-                            page.get('text', ''))
-            timestamp = page.get('timestamp', '')
+        # Narrow the scan to candidate pages through the scraping index when possible
+        skipped = 0
+        with keyword_prefilter(keyword) as is_candidate:
+            for page in pages_data:
+                url = page.get('url', '')
+                text_content = (page.get('content', '') or 
+                                page.get('raw_text', '') or 
+                                page.get('text', ''))
+                timestamp = page.get('timestamp', '')
             
-            if not text_content:
-                continue
+                if not text_content:
+                    continue
+
+                # The index only narrows the scan of the text it holds ('content'):
+                # indexed pages it rules out can't match; unindexed ones are scanned
+                candidates = None
+                if is_candidate is not None and page.get('content'):
+                    candidates = is_candidate(url, timestamp)
+                if candidates is not None and not candidates:
+                    skipped += 1
+                    continue
                 
-            paragraphs = text_content.split('\n\n')
-            url_matches = []
+                paragraphs = text_content.split('\n\n')
+                url_matches = []
+
+                # Only the paragraphs the keyword can occur in
+                if candidates is not None:
+                    indices = sorted(i for i in candidates if i < len(paragraphs))
+                else:
+                    indices = range(len(paragraphs))
             
-            for idx, paragraph in enumerate(paragraphs):
-                if pattern.search(paragraph):
-                    clean_para = re.sub(r'\s+', ' ', paragraph.strip())
-                    if clean_para in seen_paragraphs:
-                        continue
-                    seen_paragraphs.add(clean_para)
+                for idx in indices:
+                    paragraph = paragraphs[idx]
+                    if pattern.search(paragraph):
+                        clean_para = re.sub(r'\s+', ' ', paragraph.strip())
+                        if clean_para in seen_paragraphs:
+                            continue
+                        seen_paragraphs.add(clean_para)
                     
-                    # Store result for tag creation
-                    results_for_tags.append({
-                        'url': url,
-                        'context': clean_para,
-                        'timestamp': timestamp or datetime.now().isoformat()
-                    })
+                        # Store result for tag creation
+                        results_for_tags.append({
+                            'url': url,
+                            'context': clean_para,
+                            'timestamp': timestamp or datetime.now().isoformat()
+                        })
                     
-                    # Build snippet with some preceding/following paragraphs
-                    context = []
-                    context.append("\n=== MATCH FOUND ===\n")
-                    if timestamp:
-                        context.append(f"Date: {timestamp[:8]}\n")
+                        # Build snippet with some preceding/following paragraphs
+                        context = []
+                        context.append("\n=== MATCH FOUND ===\n")
+                        if timestamp:
+                            context.append(f"Date: {timestamp[:8]}\n")
                     
-                    start_idx = max(0, idx - 2)
-                    for i in range(start_idx, idx):
-                        prev_para = paragraphs[i].strip()
-                        if prev_para:
-                            context.append(prev_para)
+                        start_idx = max(0, idx - 2)
+                        for i in range(start_idx, idx):
+                            prev_para = paragraphs[i].strip()
+                            if prev_para:
+                                context.append(prev_para)
                     
-                    # Highlight the matched keyword
-                    highlighted = re.sub(pattern, lambda m: f"**{m.group(0)}**", clean_para)
-                    context.append(f"\n{highlighted}\n")
+                        # Highlight the matched keyword
+                        highlighted = re.sub(pattern, lambda m: f"**{m.group(0)}**", clean_para)
+                        context.append(f"\n{highlighted}\n")
                     
-                    end_idx = min(len(paragraphs), idx + 3)
-                    for i in range(idx + 1, end_idx):
-                        next_para = paragraphs[i].strip()
-                        if next_para:
-                            context.append(next_para)
+                        end_idx = min(len(paragraphs), idx + 3)
+                        for i in range(idx + 1, end_idx):
+                            next_para = paragraphs[i].strip()
+                            if next_para:
+                                context.append(next_para)
                     
-                    context.append("\n" + "=" * 50 + "\n")
-                    url_matches.append("\n".join(context))
+                        context.append("\n" + "=" * 50 + "\n")
+                        url_matches.append("\n".join(context))
             
-            if url_matches:
-                urls_found.add(url)
-                matches.append(f"\n\nURL: {url}")
-                matches.append("=" * (len(url) + 5))
-                matches.extend(url_matches)
+                if url_matches:
+                    urls_found.add(url)
+                    matches.append(f"\n\nURL: {url}")
+                    matches.append("=" * (len(url) + 5))
+                    matches.extend(url_matches)
+
+        if skipped:
+            print(f"Index ruled out {skipped} pages without scanning them")
 
         # Determine search type from metadata
         search_type = "current_page"
@@ -12,6 +12,7 @@ from collections import defaultdict
 import spacy
 from spacy.language import Language
 from scraping.current_scraping import content_controller
+from scraping.caching.page_store import content_digest
 
 # Make sure we can import from project root
 project_root = Path(__file__).parent.parent
@@ -165,12 +166,17 @@ async def search_entities(content: Dict) -> str:
         if not content or 'pages' not in content:
             return "No content to analyze"
 
+        # 'pages' may be a generator when streamed from the cache
         pages = content['pages']
-        logger.info(f"Processing {len(pages)} pages")
+        metadata = content.get('metadata', {})
+        logger.info("Processing pages")
         
         url_results = {}
         entity_results = []
         total_entities = 0
+        # Entities per body digest, so identical bodies (other captures of the
+        # same page) are only run through NER once
+        entities_by_digest = {}
 
         # FIRST PHASE: Extract and show entities immediately
         for page in pages:
@@ -182,8 +188,16 @@ async def search_entities(content: Dict) -> str:
                 if not text:
                     continue
                     
+                digest = content_digest(page)
+                if url_key in url_results and digest in entities_by_digest:
+                    # Another capture of this URL with the same body
+                    continue
                 url_results[url_key] = {}
-                entities = extract_entities(text, 'p')
+                if digest in entities_by_digest:
+                    logger.info("Body already processed, reusing entities")
+                    entities = entities_by_digest[digest]
+                else:
+                    entities = entities_by_digest[digest] = extract_entities(text, 'p')
                 if entities:
                     url_results[url_key]['p'] = sorted(entities)
                     total_entities += len(entities)
@@ -194,6 +208,9 @@ async def search_entities(content: Dict) -> str:
                             'url': url_key
                         })
 
+        # Counted as the pages were read when streamed
+        logger.info(f"Searched {metadata.get('total_pages', len(url_results))} pages")
+
         # Format and IMMEDIATELY return results to user
         result = []
         if url_results:
@@ -247,11 +264,14 @@ async def search_entities(content: Dict) -> str:
         logging.error(f"Error in entity extraction: {e}", exc_info=True)
         return f"Error in entity extraction: {str(e)}"
 
-async def handle_ner_extraction(url: str, ner_types: List[str]) -> str:
+async def handle_ner_extraction(url: str, ner_types: Dict) -> str:
     """Handle NER extraction request from WebsiteSearcher"""
     try:
-        # Get content using the content controller
-        content = await content_controller.get_content(url)
+        # WebsiteSearcher passes the content it already retrieved; only fetch
+        # when called without it, so the cache is read (and touched) once
+        content = ner_types.get('cached_content')
+        if content is None:
+            content = await content_controller.get_content(url, stream=True)
         if not content:
             return "No content found to analyze"
 
@@ -159,7 +159,8 @@ class WebsiteSearcher:
                 progress_logger.info(" done")
             else:
                 progress_logger.info("\nRetrieving current content...")
-                content = await self.content_controller.get_content(scrape_target)
+                # Searchers consume pages one at a time, so let cached pages stream in
+                content = await self.content_controller.get_content(scrape_target, stream=bool(search_object))
                 progress_logger.info(" done")
 
             # If no content, bail